@@ -0,0 +1,126 @@
+from functools import partial
+
+from django.db import connections, transaction
+from django.db.models import Manager, QuerySet
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from apps.posts.cache import post_detail_cache
+
+
+class CommentQueryset(QuerySet):
+    # The replies of the given comments and their replies (recursively),
+    # the depth of the direct replies is 1.
+    descendants_sql = """
+        WITH RECURSIVE thread (id, depth) AS (
+            SELECT id, 1 FROM {table} WHERE {parent_column} = ANY(%s)
+            UNION ALL
+            SELECT c.id, t.depth + 1 FROM {table} c
+            INNER JOIN thread t ON c.{parent_column} = t.id
+            {depth_filter}
+        )
+        SELECT id FROM thread
+    """
+
+    # The first replies of each of the given comments.
+    first_replies_sql = """
+        SELECT id FROM (
+            SELECT id, row_number() OVER (PARTITION BY {parent_column} ORDER BY commented_at, id) AS position
+            FROM {table} WHERE {parent_column} = ANY(%s)
+        ) replies
+        WHERE position <= %s
+    """
+
+    def descendants(self, parent_ids, max_depth=None):
+        """
+        Return the replies of the given comments and all of their nested replies,
+        which are fetched by one recursive query. If `max_depth` is given,
+        only the replies up to that level are returned (1 means the direct replies).
+        """
+        quote_name = connections[self.db].ops.quote_name
+        params = [list(parent_ids)]
+        depth_filter = ''
+        if max_depth is not None:
+            depth_filter = 'WHERE t.depth < %s'
+            params.append(max_depth)
+
+        sql = self.descendants_sql.format(
+            table=quote_name(self.model._meta.db_table),
+            parent_column=quote_name(self.model._meta.get_field('parent').column),
+            depth_filter=depth_filter,
+        )
+        return self.filter(id__in=RawSQL(sql, params))
+
+    def first_replies(self, parent_ids, count):
+        """
+        Return the first replies (by their comment date) of each of the given comments,
+        which are fetched by one query using a window function.
+        """
+        quote_name = connections[self.db].ops.quote_name
+        sql = self.first_replies_sql.format(
+            table=quote_name(self.model._meta.db_table),
+            parent_column=quote_name(self.model._meta.get_field('parent').column),
+        )
+        return self.filter(id__in=RawSQL(sql, [list(parent_ids), count]))
+
+
+class CommentManager(Manager.from_queryset(CommentQueryset)):
+    # A batch of the comments of a user and their replies (by the other users) are deleted,
+    # the replies count of their remaining parents and the comments count of their posts are decreased.
+    # The leaf comments of the threads are deleted first, so a parent is never deleted before its replies.
+    delete_user_comments_sql = """
+        WITH RECURSIVE thread (id) AS (
+            SELECT id FROM {table} WHERE {user_column} = %s
+            UNION
+            SELECT c.id FROM {table} c INNER JOIN thread t ON c.{parent_column} = t.id
+        ),
+        deleted AS (
+            DELETE FROM {table} WHERE id IN (
+                SELECT t.id FROM thread t
+                WHERE NOT EXISTS (SELECT 1 FROM {table} r WHERE r.{parent_column} = t.id)
+                LIMIT %s
+            )
+            RETURNING id, {post_column} AS post_id, {parent_column} AS parent_id
+        ),
+        parents AS (
+            UPDATE {table} c SET replies_count = c.replies_count - d.count
+            FROM (
+                SELECT parent_id, count(*) AS count FROM deleted
+                WHERE parent_id IS NOT NULL AND parent_id NOT IN (SELECT id FROM deleted)
+                GROUP BY parent_id
+            ) d
+            WHERE c.id = d.parent_id
+        )
+        UPDATE {posts_table} p SET comments_count = p.comments_count - d.count, updated_at = %s
+        FROM (SELECT post_id, count(*) AS count FROM deleted GROUP BY post_id) d
+        WHERE p.id = d.post_id
+        RETURNING p.hash
+    """
+
+    def delete_user_comments(self, user_id, batch_size):
+        """
+        Delete the comments of the given user and their replies in batches,
+        the replies count and the comments count of the remaining parents and posts are decreased.
+        Return the number of the changed posts.
+        """
+        connection = connections[self.db]
+        quote_name = connection.ops.quote_name
+        meta = self.model._meta
+        sql = self.delete_user_comments_sql.format(
+            table=quote_name(meta.db_table),
+            user_column=quote_name(meta.get_field('user').column),
+            post_column=quote_name(meta.get_field('post').column),
+            parent_column=quote_name(meta.get_field('parent').column),
+            posts_table=quote_name(meta.get_field('post').related_model._meta.db_table),
+        )
+
+        changed = 0
+        while True:
+            with transaction.atomic(using=self.db), connection.cursor() as cursor:
+                cursor.execute(sql, [user_id, batch_size, timezone.now()])
+                post_hashes = [row[0] for row in cursor.fetchall()]
+                if not post_hashes:
+                    break
+                transaction.on_commit(partial(post_detail_cache.invalidate, *post_hashes))
+            changed += len(post_hashes)
+        return changed
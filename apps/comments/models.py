@@ -1,6 +1,8 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from apps.comments.managers import CommentManager
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -27,5 +29,18 @@ class Comment(models.Model):
     )
     replies_count = models.PositiveSmallIntegerField(_('replies count'), default=0)
 
+    objects = CommentManager()
+
+    class Meta:
+        indexes = [
+            # keyset pagination of post top-level comments and comment replies
+            models.Index(
+                fields=['post', 'commented_at', 'id'],
+                condition=models.Q(parent__isnull=True),
+                name='comment_post_idx',
+            ),
+            models.Index(fields=['parent', 'commented_at', 'id'], name='comment_replies_idx'),
+        ]
+
     def __str__(self):
         return self.text
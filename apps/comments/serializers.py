@@ -21,3 +21,18 @@ class CommentSerializer(serializers.ModelSerializer):
         )
         read_only_fields = ('replies_count', 'commented_at')
         extra_kwargs = {'post': {}}
+
+
+class CommentThreadSerializer(CommentSerializer):
+    """
+    Comment with its nested replies, which are set to the `thread_replies`
+    attribute of the comment (e.g. by the thread view).
+    """
+    replies = serializers.SerializerMethodField()
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ('replies',)
+
+    def get_replies(self, obj):
+        replies = getattr(obj, 'thread_replies', [])
+        return CommentThreadSerializer(replies, many=True, context=self.context).data
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from apps.comments.models import Comment
+from apps.posts.models import Post
+
+UserModel = get_user_model()
+
+
+class CommentDescendantsTest(TestCase):
+    def setUp(self):
+        user = UserModel.objects.create_user(email='test@test.localhost')
+        post = Post.objects.create(title='test', author=user, is_draft=False)
+        self.comment = post.comments.create(text='comment', user=user)
+        self.reply = self.comment.replies.create(text='reply', user=user, post=post)
+        self.nested_reply = self.reply.replies.create(text='nested reply', user=user, post=post)
+        self.other_comment = post.comments.create(text='other comment', user=user)
+
+    def test_descendants(self):
+        self.assertEqual(
+            set(Comment.objects.descendants([self.comment.id])),
+            {self.reply, self.nested_reply},
+        )
+        self.assertFalse(Comment.objects.descendants([self.other_comment.id]).exists())
+
+    def test_descendants_depth(self):
+        self.assertEqual(list(Comment.objects.descendants([self.comment.id], max_depth=1)), [self.reply])
+
+    def test_first_replies(self):
+        user = self.comment.user
+        later_reply = self.comment.replies.create(text='later reply', user=user, post=self.comment.post)
+        other_reply = self.other_comment.replies.create(text='other reply', user=user, post=self.comment.post)
+
+        replies = Comment.objects.first_replies([self.comment.id, self.other_comment.id], 1)
+        self.assertEqual(set(replies), {self.reply, other_reply})
+        replies = Comment.objects.first_replies([self.comment.id], 2)
+        self.assertEqual(set(replies), {self.reply, later_reply})
@@ -37,3 +37,11 @@ class CommentUrlsTest(SimpleTestCase):
             view.func.view_class.__name__,
             views.CommentReplyListAPIView.__name__,
         )
+
+    def test_post_comment_thread_url(self):
+        url = reverse('comments:post_thread', kwargs={'hash': 'sample'})
+        view = resolve(url)
+        self.assertIs(
+            view.func.view_class.__name__,
+            views.PostCommentThreadAPIView.__name__,
+        )
@@ -1,9 +1,13 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import force_authenticate, APIRequestFactory
 
 from apps.comments import views
+from apps.comments.models import Comment
+from apps.core.testing import QueryBudgetMixin
 from apps.posts.models import Post
 
 UserModel = get_user_model()
@@ -19,6 +23,8 @@ class CommentViewsTest(TestCase):
             title='test', author=self.user, is_draft=False,
         )
         self.comment = self.post.comments.create(text='sample comment', user=self.user)
+        self.post.comments_count = 1
+        self.post.save(update_fields=['comments_count'])
 
     def test_add_comment(self):
         """ Test adding a comment to a post. """
@@ -40,6 +46,52 @@ class CommentViewsTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data['parent'], self.comment.id)
 
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.replies_count, 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 2)
+
+    def test_delete_comment(self):
+        """ Test deleting a comment decreases the post comments count by all its replies. """
+        view = views.PostCommentCreateAPIView.as_view()
+        parent = self.comment
+        for _ in range(3):
+            request = factory.post('/comments/add/', data={'text': 'sample reply', 'parent': parent.id})
+            force_authenticate(request, user=self.user)
+            response = view(request, post_hash=self.post.hash)
+            parent = Comment.objects.get(pk=response.data['id'])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 4)
+
+        # delete the first reply, so it and its two nested replies must be deleted
+        reply = Comment.objects.get(parent=self.comment)
+        view = views.PostCommentDestroyAPIView.as_view()
+        request = factory.delete('/comments/delete/')
+        force_authenticate(request, user=self.user)
+
+        response = view(request, pk=reply.pk)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.replies_count, 0)
+
+    def test_delete_deleted_comment(self):
+        """ Test the counts aren't decreased again by a concurrent delete of the same reply. """
+        reply = self.comment.replies.create(text='sample reply', user=self.user, post=self.post)
+        Comment.objects.filter(pk=self.comment.pk).update(replies_count=1)
+        Post.objects.filter(pk=self.post.pk).update(comments_count=2)
+        instances = [Comment.objects.select_related('post').get(pk=reply.pk) for _ in range(2)]
+
+        view = views.PostCommentDestroyAPIView()
+        for instance in instances:
+            view.perform_destroy(instance)
+
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.replies_count, 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
     def test_post_comment_list(self):
         view = views.PostCommentListAPIView.as_view()
         request = factory.get('/comments/post/')
@@ -54,3 +106,134 @@ class CommentViewsTest(TestCase):
 
         response = view(request, parent_id=self.comment)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_post_comment_list_projection(self):
+        view = views.PostCommentListAPIView.as_view()
+        request = factory.get('/comments/post/', {'cursor': ''})
+
+        with CaptureQueriesContext(connection) as context:
+            response = view(request, hash=self.post.hash)
+        self.assertContains(response, 'sample comment')
+        # the comment authors are fetched in the same query, without the unused columns
+        self.assertEqual(len(context), 1)
+        self.assertNotIn('"users_user"."email"', context[0]['sql'])
+
+
+class CommentQueryBudgetTest(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.post = Post.objects.create(
+            title='test', is_draft=False,
+            author=UserModel.objects.create_user(email='test@test.localhost'),
+        )
+        for i in range(10):
+            user = UserModel.objects.create_user(email=f'test{i}@test.localhost')
+            comment = self.post.comments.create(text='sample comment', user=user)
+            comment.replies.create(text='sample reply', user=user, post=self.post)
+
+    def test_comment_list_query_budget(self):
+        view = views.PostCommentListAPIView.as_view()
+        # the comments and their users are fetched in one query
+        with self.assertMaxQueries(1):
+            response = view(factory.get('/comments/post/', {'cursor': ''}), hash=self.post.hash)
+        self.assertEqual(len(response.data['results']), 10)
+
+        # and the count of the page number pagination
+        with self.assertMaxQueries(2):
+            response = view(factory.get('/comments/post/'), hash=self.post.hash)
+        self.assertEqual(response.data['count'], 10)
+
+    def test_reply_list_query_budget(self):
+        view = views.CommentReplyListAPIView.as_view()
+        parent = self.post.comments.filter(parent__isnull=True).first()
+        with self.assertMaxQueries(1):
+            response = view(factory.get('/comments/replies/', {'cursor': ''}), parent_id=parent.id)
+        self.assertEqual(len(response.data['results']), 1)
+
+
+class CommentThreadTest(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.user = UserModel.objects.create_user(email='test@test.localhost')
+        self.post = Post.objects.create(title='test', author=self.user, is_draft=False)
+        # two threads of three levels, each comment has two replies
+        self.comments = []
+        for i in range(2):
+            comment = self.post.comments.create(text=f'comment {i}', user=self.user)
+            self.comments.append(comment)
+            for j in range(2):
+                reply = comment.replies.create(text=f'reply {i}.{j}', user=self.user, post=self.post)
+                for k in range(2):
+                    reply.replies.create(text=f'reply {i}.{j}.{k}', user=self.user, post=self.post)
+
+    def get_thread(self, **params):
+        view = views.PostCommentThreadAPIView.as_view()
+        return view(factory.get('/comments/thread/', {'cursor': '', **params}), hash=self.post.hash)
+
+    def test_thread(self):
+        # the top-level comments and all of their replies
+        with self.assertMaxQueries(2):
+            response = self.get_thread()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        results = response.data['results']
+        self.assertEqual([comment['text'] for comment in results], ['comment 0', 'comment 1'])
+        replies = results[0]['replies']
+        self.assertEqual([reply['text'] for reply in replies], ['reply 0.0', 'reply 0.1'])
+        self.assertEqual(
+            [reply['text'] for reply in replies[1]['replies']],
+            ['reply 0.1.0', 'reply 0.1.1'],
+        )
+        self.assertEqual(replies[1]['replies'][0]['replies'], [])
+
+    def test_thread_depth(self):
+        response = self.get_thread(depth=1)
+        reply = response.data['results'][0]['replies'][0]
+        self.assertEqual(reply['text'], 'reply 0.0')
+        self.assertEqual(reply['replies'], [])
+
+        self.assertEqual(self.get_thread(depth=0).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_comment_list_embedded_replies(self):
+        view = views.PostCommentListAPIView.as_view()
+        # the comments and one query for the replies of all of them
+        with self.assertMaxQueries(2):
+            response = view(factory.get('/comments/post/', {'replies': 1, 'cursor': ''}), hash=self.post.hash)
+
+        results = response.data['results']
+        self.assertEqual(len(results), 2)
+        for i, comment in enumerate(results):
+            self.assertEqual([reply['text'] for reply in comment['replies']], [f'reply {i}.0'])
+
+        response = view(factory.get('/comments/post/'), hash=self.post.hash)
+        self.assertNotIn('replies', response.data['results'][0])
+
+        response = view(factory.get('/comments/post/', {'replies': 'all'}), hash=self.post.hash)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_thread_pagination(self):
+        response = self.get_thread(page_size=1)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(len(response.data['results'][0]['replies']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_hidden_user_comments(self):
+        hidden_user = UserModel.objects.create_user(email='hidden@test.localhost')
+        hidden_comment = self.post.comments.create(text='hidden comment', user=hidden_user)
+        self.comments[0].replies.create(text='hidden reply', user=hidden_user, post=self.post)
+        hidden_comment.replies.create(text='reply to hidden', user=self.user, post=self.post)
+        hidden_user.hide()
+
+        results = self.get_thread().data['results']
+        self.assertEqual([comment['text'] for comment in results], ['comment 0', 'comment 1'])
+        self.assertEqual([reply['text'] for reply in results[0]['replies']], ['reply 0.0', 'reply 0.1'])
+
+        view = views.PostCommentListAPIView.as_view()
+        response = view(factory.get('/comments/post/', {'replies': 3}), hash=self.post.hash)
+        results = response.data['results']
+        self.assertEqual([comment['text'] for comment in results], ['comment 0', 'comment 1'])
+        self.assertEqual([reply['text'] for reply in results[0]['replies']], ['reply 0.0', 'reply 0.1'])
+
+        view = views.CommentReplyListAPIView.as_view()
+        response = view(factory.get('/comments/replies/'), parent_id=self.comments[0].pk)
+        self.assertEqual([reply['text'] for reply in response.data['results']], ['reply 0.0', 'reply 0.1'])
+        response = view(factory.get('/comments/replies/'), parent_id=hidden_comment.pk)
+        self.assertEqual(response.data['results'], [])
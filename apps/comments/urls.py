@@ -1,11 +1,13 @@
 from django.urls import path
 
 from apps.comments import views
+from apps.core.async_views import async_read_view
 
 app_name = 'comments'
 urlpatterns = [
-    path('post/<str:hash>/', views.PostCommentListAPIView.as_view(), name='post_comments'),
-    path('replies/<int:parent_id>/', views.CommentReplyListAPIView.as_view(), name='replies'),
+    path('post/<str:hash>/', async_read_view(views.PostCommentListAPIView.as_view()), name='post_comments'),
+    path('thread/<str:hash>/', async_read_view(views.PostCommentThreadAPIView.as_view()), name='post_thread'),
+    path('replies/<int:parent_id>/', async_read_view(views.CommentReplyListAPIView.as_view()), name='replies'),
 
     path('add/<str:post_hash>/', views.PostCommentCreateAPIView.as_view(), name='add'),
     path('delete/<int:pk>/', views.PostCommentDestroyAPIView.as_view(), name='delete'),
@@ -1,13 +1,24 @@
+from collections import defaultdict
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 from rest_framework.generics import (
     ListAPIView, CreateAPIView, DestroyAPIView,
     get_object_or_404,
 )
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
 from apps.comments.models import Comment
-from apps.comments.serializers import CommentSerializer
+from apps.comments.serializers import CommentSerializer, CommentThreadSerializer
+from apps.posts.cache import post_detail_cache
 from apps.posts.models import Post
-from apps.core.paginators import BaseResultsPagination
+from apps.core.paginators import CursorOrPagePagination
+from apps.core.projections import SerializerProjectionMixin
 
 
 class IsCommentAuthor(IsAuthenticated):
@@ -16,36 +27,131 @@ class IsCommentAuthor(IsAuthenticated):
     """
 
     def has_object_permission(self, request, view, obj):
-        return bool(obj.user == request.user)
+        return bool(obj.user_id == request.user.id)
+
+
+class EmbeddedRepliesMixin:
+    """
+    List the comments with their replies, which are set to the `thread_replies` attribute of the comments.
+    The replies of the whole page are fetched by one query (see `get_replies_queryset`).
+    """
+
+    def get_positive_int_param(self, name):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+        if not value.isdigit() or int(value) < 1:
+            raise ValidationError({name: _('Must be a positive integer.')})
+        return int(value)
+
+    def get_replies_queryset(self, parent_ids):
+        """ Return the replies of the given comments which are embedded, or None if the replies aren't embedded. """
+        return None
+
+    def set_thread_replies(self, comments, replies_queryset):
+        replies = list(
+            replies_queryset
+            .select_related('user')
+            .only(*self.get_projection(Comment))
+            .order_by(*self.ordering)
+        )
 
+        children = defaultdict(list)
+        for reply in replies:
+            children[reply.parent_id].append(reply)
+        for comment in [*comments, *replies]:
+            comment.thread_replies = children[comment.id]
 
-class PostCommentListAPIView(ListAPIView):
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        comments = page if page is not None else list(queryset)
+
+        replies_queryset = self.get_replies_queryset([comment.id for comment in comments])
+        if replies_queryset is not None and comments:
+            self.set_thread_replies(comments, replies_queryset)
+
+        serializer = self.get_serializer(comments, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+
+class PostCommentListAPIView(EmbeddedRepliesMixin, SerializerProjectionMixin, ListAPIView):
     """
     List of post comments.
+
+    `replies` query param embeds the first replies (up to the given number) of each comment,
+    which are fetched by one query for the whole page.
     """
-    serializer_class = CommentSerializer
-    pagination_class = BaseResultsPagination
+    pagination_class = CursorOrPagePagination
+    ordering = ('commented_at', 'id')
+    max_embedded_replies = 10
 
     def get_queryset(self):
         return Comment.objects.filter(
             post__hash=self.kwargs.get('hash'),
+            post__deleted_at__isnull=True,
+            # the comments of the hidden users are deleted with their replies by the `delete_hidden_objects` worker
+            user__deleted_at__isnull=True,
             parent__isnull=True,
         ).select_related('user')
 
+    def get_serializer_class(self):
+        if 'replies' in self.request.query_params:
+            return CommentThreadSerializer
+        return CommentSerializer
+
+    def get_replies_queryset(self, parent_ids):
+        count = self.get_positive_int_param('replies')
+        if count is None:
+            return None
+        return Comment.objects.first_replies(parent_ids, min(count, self.max_embedded_replies)) \
+            .filter(user__deleted_at__isnull=True)
 
-class CommentReplyListAPIView(ListAPIView):
+
+class CommentReplyListAPIView(SerializerProjectionMixin, ListAPIView):
     """
     List of comment replies.
     """
     serializer_class = CommentSerializer
-    pagination_class = BaseResultsPagination
+    pagination_class = CursorOrPagePagination
+    ordering = ('commented_at', 'id')
 
     def get_queryset(self):
         return Comment.objects.filter(
             parent_id=self.kwargs.get('parent_id'),
+            parent__user__deleted_at__isnull=True,
+            post__deleted_at__isnull=True,
+            user__deleted_at__isnull=True,
         ).select_related('user')
 
 
+class PostCommentThreadAPIView(EmbeddedRepliesMixin, SerializerProjectionMixin, ListAPIView):
+    """
+    List of post top-level comments with their nested replies.
+
+    The replies of the page comments are fetched by one recursive query,
+    `depth` query param limits the levels of the replies (e.g. 1 for the direct replies only).
+    """
+    serializer_class = CommentThreadSerializer
+    pagination_class = CursorOrPagePagination
+    ordering = ('commented_at', 'id')
+
+    def get_queryset(self):
+        return Comment.objects.filter(
+            post__hash=self.kwargs.get('hash'),
+            post__deleted_at__isnull=True,
+            # the comments of the hidden users are deleted with their replies by the `delete_hidden_objects` worker
+            user__deleted_at__isnull=True,
+            parent__isnull=True,
+        ).select_related('user')
+
+    def get_replies_queryset(self, parent_ids):
+        return Comment.objects.descendants(parent_ids, max_depth=self.get_positive_int_param('depth')) \
+            .filter(user__deleted_at__isnull=True)
+
+
 class PostCommentCreateAPIView(CreateAPIView):
     """
     Add comment to post or reply to comment.
@@ -55,21 +161,25 @@ class PostCommentCreateAPIView(CreateAPIView):
 
     def perform_create(self, serializer):
         post = get_object_or_404(
-            Post,
+            Post.objects.only('id', 'hash'),
             hash=self.kwargs.get('post_hash'),
             is_draft=False,
         )
-        instance = serializer.save(user=self.request.user, post=post)
+        with transaction.atomic():
+            instance = serializer.save(user=self.request.user, post=post)
 
-        # if the created comment has parent comment,
-        # increase the parent comment replies count
-        if instance.parent:
-            instance.parent.replies_count += 1
-            instance.parent.save(update_fields=['replies_count'])
+            # if the created comment has parent comment,
+            # increase the parent comment replies count
+            if instance.parent_id:
+                Comment.objects \
+                    .filter(pk=instance.parent_id) \
+                    .update(replies_count=F('replies_count') + 1)
 
-        # increase the post comments count
-        post.comments_count += 1
-        post.save(update_fields=['comments_count'])
+            # increase the post comments count
+            Post.objects \
+                .filter(pk=post.pk) \
+                .update(comments_count=F('comments_count') + 1, updated_at=timezone.now())
+            transaction.on_commit(partial(post_detail_cache.invalidate, post.hash))
 
 
 class PostCommentDestroyAPIView(DestroyAPIView):
@@ -77,16 +187,25 @@ class PostCommentDestroyAPIView(DestroyAPIView):
     Delete a comment or reply by id.
     """
     permission_classes = (IsCommentAuthor,)
-    queryset = Comment.objects.select_related('post', 'parent', 'user')
+    queryset = Comment.objects.select_related('post').only('post__hash', 'parent', 'user')
 
     def perform_destroy(self, instance):
-        super().perform_destroy(instance)
-        # if the deleted comment had parent comment,
-        # decrease the parent comment replies count
-        if instance.parent:
-            instance.parent.replies_count -= 1
-            instance.parent.save(update_fields=['replies_count'])
-
-        # decrease the post comment count
-        instance.post.comments_count -= 1
-        instance.post.save(update_fields=['comments_count'])
+        with transaction.atomic():
+            # the replies of the comment are deleted too
+            deleted = instance.delete()[1].get(Comment._meta.label, 0)
+            # the comment was deleted by a concurrent request, which decreased the counts
+            if not deleted:
+                return
+
+            # if the deleted comment had parent comment,
+            # decrease the parent comment replies count
+            if instance.parent_id:
+                Comment.objects \
+                    .filter(pk=instance.parent_id) \
+                    .update(replies_count=F('replies_count') - 1)
+
+            # decrease the post comment count by all the deleted comments
+            Post.objects \
+                .filter(pk=instance.post_id) \
+                .update(comments_count=F('comments_count') - deleted, updated_at=timezone.now())
+            transaction.on_commit(partial(post_detail_cache.invalidate, instance.post.hash))
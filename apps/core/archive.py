@@ -0,0 +1,240 @@
+"""
+The archive of the users, tags, posts, likes and comments, which is exported and imported by
+PostgreSQL COPY. Each table is a CSV file (optionally gzipped) with a header line in the archive directory.
+"""
+import gzip
+import os
+
+from django.contrib.auth import get_user_model
+
+from apps.comments.models import Comment
+from apps.posts.models import Post
+from apps.tags.models import Tag
+
+UserModel = get_user_model()
+
+# an url-safe 12 letters hash (like `apps.posts.models.gen_hash`) of 71 random bits
+HASH_SQL = "substr(translate(encode(decode(md5(random()::text || {id}::text), 'hex'), 'base64'), '+/=', ''), 1, 12)"
+
+
+class ArchiveTable:
+    """
+    A table of the archive.
+
+    The rows are copied into a temporary staging table which has the archive columns,
+    and inserted from it into the model table by the `insert_sql`, which can read the other staging tables
+    (e.g. to precompute the counters). The `export_sql` selects the archive columns of the model table.
+
+    The staging table has the `generated_columns` too, which aren't read from the archive. They are filled
+    by the `generate_sql` before the insert, which is repeated until it changes no row (e.g. to generate
+    the unique hashes again when they collide).
+    """
+
+    def __init__(
+        self, name, model, columns, required, insert_sql, export_sql, generated_columns=None, generate_sql=None,
+    ):
+        self.name = name
+        self.model = model
+        # the archive column names and their postgres types
+        self.columns = columns
+        self.required = required
+        self.insert_sql = insert_sql
+        self.export_sql = export_sql
+        self.generated_columns = generated_columns or {}
+        self.generate_sql = generate_sql
+
+    @property
+    def staging_table(self):
+        return f'archive_{self.name}'
+
+    def get_path(self, directory):
+        """ Return the path of the table file in the given directory, or None if it doesn't exist. """
+        for path in (os.path.join(directory, f'{self.name}.csv'), os.path.join(directory, f'{self.name}.csv.gz')):
+            if os.path.exists(path):
+                return path
+        return None
+
+    @staticmethod
+    def open(path, mode='rb'):
+        if path.endswith('.gz'):
+            return gzip.open(path, mode)
+        return open(path, mode)
+
+    def get_tables(self):
+        """ Return the names of the staging tables and the model tables which are used in the sql. """
+        return {
+            **{table.name: table.model._meta.db_table for table in ARCHIVE_TABLES},
+            **{f'archive_{table.name}': table.staging_table for table in ARCHIVE_TABLES},
+        }
+
+    def create_staging_table_sql(self):
+        columns = ', '.join(
+            f'{column} {column_type}' for column, column_type in {**self.columns, **self.generated_columns}.items()
+        )
+        return f'CREATE TEMPORARY TABLE {self.staging_table} ({columns})'
+
+    def drop_staging_table_sql(self):
+        return f'DROP TABLE {self.staging_table}'
+
+    def copy_from_sql(self, columns):
+        return f"COPY {self.staging_table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, ENCODING 'UTF8')"
+
+    def copy_to_sql(self):
+        query = self.export_sql.format(**self.get_tables())
+        return f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER, ENCODING 'UTF8')"
+
+    def get_insert_sql(self):
+        return self.insert_sql.format(**self.get_tables())
+
+    def get_generate_sql(self):
+        if self.generate_sql is None:
+            return None
+        return self.generate_sql.format(**self.get_tables())
+
+
+ARCHIVE_TABLES = (
+    ArchiveTable(
+        name='users',
+        model=UserModel,
+        columns={
+            'id': 'bigint', 'email': 'text', 'username': 'text', 'full_name': 'text', 'biography': 'text',
+            'avatar': 'text', 'is_active': 'boolean', 'is_staff': 'boolean', 'is_superuser': 'boolean',
+            'date_joined': 'timestamptz', 'last_login': 'timestamptz',
+        },
+        required=('id', 'email'),
+        # the username and full name are the email username by default, the same as `User.save()`
+        insert_sql="""
+            INSERT INTO {users} (
+                id, email, username, full_name, biography, avatar,
+                is_active, is_staff, is_superuser, date_joined, last_login, updated_at
+            )
+            SELECT
+                id, email,
+                COALESCE(NULLIF(username, ''), split_part(email, '@', 1)),
+                COALESCE(NULLIF(full_name, ''), split_part(email, '@', 1)),
+                COALESCE(biography, ''),
+                COALESCE(NULLIF(avatar, ''), 'default-avatar.jpg'),
+                COALESCE(is_active, true), COALESCE(is_staff, false), COALESCE(is_superuser, false),
+                COALESCE(date_joined, now()), last_login, now()
+            FROM {archive_users}
+        """,
+        export_sql="""
+            SELECT
+                id, email, username, full_name, biography, avatar,
+                is_active, is_staff, is_superuser, date_joined, last_login
+            FROM {users} ORDER BY id
+        """,
+    ),
+    ArchiveTable(
+        name='tags',
+        model=Tag,
+        columns={'id': 'bigint', 'tag': 'text'},
+        required=('id', 'tag'),
+        insert_sql='INSERT INTO {tags} (id, tag) SELECT id, tag FROM {archive_tags}',
+        export_sql='SELECT id, tag FROM {tags} ORDER BY id',
+    ),
+    ArchiveTable(
+        name='posts',
+        model=Post,
+        columns={
+            'id': 'bigint', 'author_id': 'bigint', 'title': 'text', 'description': 'text', 'content': 'text',
+            'raw_slug': 'text', 'hash': 'text', 'is_draft': 'boolean', 'primary_image': 'text',
+            'created_at': 'timestamptz', 'published_at': 'timestamptz',
+        },
+        required=('id', 'author_id', 'title', 'content'),
+        # the missing hashes are generated, again for the ones which collide with
+        # the existing hashes, the archive hashes or the other generated hashes
+        generated_columns={'generated_hash': 'text'},
+        generate_sql=f"""
+            UPDATE {{archive_posts}} a SET generated_hash = {HASH_SQL.format(id='a.id')}
+            WHERE a.id IN (
+                SELECT id FROM {{archive_posts}} WHERE COALESCE(hash, '') = '' AND generated_hash IS NULL
+                UNION
+                SELECT s.id FROM {{archive_posts}} s INNER JOIN {{posts}} p ON p.hash = s.generated_hash
+                UNION
+                SELECT s.id FROM {{archive_posts}} s INNER JOIN {{archive_posts}} o ON o.hash = s.generated_hash
+                UNION
+                SELECT id FROM (
+                    SELECT id, row_number() OVER (PARTITION BY generated_hash ORDER BY id) AS position
+                    FROM {{archive_posts}} WHERE generated_hash IS NOT NULL
+                ) generated
+                WHERE position > 1
+            )
+        """,
+        # the slug of the published posts is the raw slug (or the title) and the hash, the same as `Post.save()`
+        insert_sql="""
+            WITH rows AS (
+                SELECT
+                    p.*,
+                    COALESCE(NULLIF(p.hash, ''), p.generated_hash) AS post_hash,
+                    COALESCE(
+                        NULLIF(p.raw_slug, ''),
+                        CASE WHEN COALESCE(p.is_draft, false) THEN '' ELSE p.title END
+                    ) AS post_raw_slug
+                FROM {archive_posts} p
+            )
+            INSERT INTO {posts} (
+                id, author_id, title, description, content, raw_slug, slug, hash, is_draft,
+                primary_image, primary_image_variants, likes_count, comments_count,
+                created_at, published_at, updated_at
+            )
+            SELECT
+                r.id, r.author_id, r.title, COALESCE(r.description, ''), r.content, r.post_raw_slug,
+                CASE WHEN COALESCE(r.is_draft, false) THEN '' ELSE r.post_raw_slug || '-' || r.post_hash END,
+                r.post_hash, COALESCE(r.is_draft, false), NULLIF(r.primary_image, ''), '{{}}',
+                COALESCE(l.count, 0), COALESCE(c.count, 0),
+                COALESCE(r.created_at, now()), r.published_at, now()
+            FROM rows r
+            LEFT JOIN (
+                SELECT post_id, count(*) AS count FROM {archive_likes} GROUP BY post_id
+            ) l ON l.post_id = r.id
+            LEFT JOIN (
+                SELECT post_id, count(*) AS count FROM {archive_comments} GROUP BY post_id
+            ) c ON c.post_id = r.id
+        """,
+        export_sql="""
+            SELECT
+                id, author_id, title, description, content, raw_slug, hash, is_draft,
+                primary_image, created_at, published_at
+            FROM {posts} ORDER BY id
+        """,
+    ),
+    ArchiveTable(
+        name='post_tags',
+        model=Post.tags.through,
+        columns={'post_id': 'bigint', 'tag_id': 'bigint'},
+        required=('post_id', 'tag_id'),
+        insert_sql='INSERT INTO {post_tags} (post_id, tag_id) SELECT DISTINCT post_id, tag_id FROM {archive_post_tags}',
+        export_sql='SELECT post_id, tag_id FROM {post_tags} ORDER BY id',
+    ),
+    ArchiveTable(
+        name='likes',
+        model=Post.likes.through,
+        columns={'post_id': 'bigint', 'user_id': 'bigint'},
+        required=('post_id', 'user_id'),
+        insert_sql='INSERT INTO {likes} (post_id, user_id) SELECT post_id, user_id FROM {archive_likes}',
+        export_sql='SELECT post_id, user_id FROM {likes} ORDER BY id',
+    ),
+    ArchiveTable(
+        name='comments',
+        model=Comment,
+        columns={
+            'id': 'bigint', 'post_id': 'bigint', 'user_id': 'bigint', 'parent_id': 'bigint',
+            'text': 'text', 'commented_at': 'timestamptz',
+        },
+        required=('id', 'post_id', 'user_id', 'text'),
+        insert_sql="""
+            INSERT INTO {comments} (id, post_id, user_id, parent_id, text, commented_at, replies_count)
+            SELECT c.id, c.post_id, c.user_id, c.parent_id, c.text, COALESCE(c.commented_at, now()), COALESCE(r.count, 0)
+            FROM {archive_comments} c
+            LEFT JOIN (
+                SELECT parent_id, count(*) AS count FROM {archive_comments}
+                WHERE parent_id IS NOT NULL GROUP BY parent_id
+            ) r ON r.parent_id = c.id
+        """,
+        export_sql="""
+            SELECT id, post_id, user_id, parent_id, text, commented_at
+            FROM {comments} ORDER BY id
+        """,
+    ),
+)
@@ -0,0 +1,40 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from apps.core.instrumentation import record_queries
+
+
+def async_read_view(view):
+    """
+    Return an async version of the given view if the `ASYNC_READ_VIEWS` setting is True.
+
+    Django 4.0 has no async ORM, so the view runs in a thread of the async pool. The thread isn't
+    the shared thread of the sync code (`thread_sensitive=False`), so the concurrent requests of an
+    ASGI server are served by separate threads (and database connections) at the same time.
+    The view must not change the shared state of the process, e.g. the read-only views.
+    """
+    if not settings.ASYNC_READ_VIEWS:
+        return view
+
+    def run_view(request, *args, **kwargs):
+        # the request handler doesn't close the old database connections of the pool threads
+        close_old_connections()
+        try:
+            with record_queries(getattr(request, 'query_stats', None)):
+                response = view(request, *args, **kwargs)
+                # render the response in this thread rather than in the shared thread
+                if hasattr(response, 'render') and callable(response.render):
+                    response = response.render()
+                return response
+        finally:
+            close_old_connections()
+
+    # the view attributes (e.g. `csrf_exempt` and `view_class`) are kept
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        return await sync_to_async(run_view, thread_sensitive=False)(request, *args, **kwargs)
+
+    return async_view
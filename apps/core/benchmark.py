@@ -0,0 +1,70 @@
+import math
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+
+def percentile(values, percent):
+    """ Return the given percentile of the values (nearest-rank method). """
+    ordered = sorted(values)
+    index = max(math.ceil(len(ordered) * percent / 100) - 1, 0)
+    return ordered[index]
+
+
+@contextmanager
+def benchmark_environment(rollback=True):
+    """
+    Prepare the environment for calling the views by the test client.
+    All of the database changes (e.g. the benchmark data) are rolled back at the end if `rollback` is True,
+    otherwise the changes aren't wrapped in a transaction, e.g. when the views are called in other threads.
+    """
+    try:
+        setup_test_environment()
+    except RuntimeError:
+        # the environment is already prepared by the test runner
+        teardown = False
+    else:
+        teardown = True
+
+    try:
+        if rollback:
+            with transaction.atomic():
+                yield
+                transaction.set_rollback(True)
+        else:
+            yield
+    finally:
+        if teardown:
+            teardown_test_environment()
+
+
+def measure(func, requests=100, warmup=10):
+    """
+    Call the func (e.g. a test client request) several times and
+    return the statistics of its latency (in milliseconds), throughput (requests per second)
+    and database queries.
+    """
+    for _ in range(warmup):
+        func()
+
+    latencies = []
+    queries = []
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            func()
+            latencies.append((time.perf_counter() - start) * 1000)
+        queries.append(len(context))
+
+    return {
+        'requests': requests,
+        'mean': statistics.mean(latencies),
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'rps': requests * 1000 / sum(latencies),
+        'queries': statistics.mean(queries),
+    }
@@ -0,0 +1,76 @@
+import hashlib
+from calendar import timegm
+
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+def get_field_value(obj, field):
+    """ Return the value of a field of the object, the related fields are joined by `__` (e.g. author__updated_at). """
+    for attr in field.split('__'):
+        obj = getattr(obj, attr)
+    return obj
+
+
+class ConditionalRetrieveMixin:
+    """
+    Add ETag and Last-Modified headers to the retrieve response.
+
+    The conditional requests (If-None-Match / If-Modified-Since) are answered
+    by 304 from a lookup of the object version fields, so the object is not
+    fetched and serialized when the client already has its current version.
+    """
+    # the date fields which are changed by any change of the response, e.g. ('updated_at', 'author__updated_at')
+    version_fields = ()
+
+    def get_version(self):
+        """ Return the values of the version fields of the requested object. """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        version = self.filter_queryset(self.get_queryset()) \
+            .filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]}) \
+            .values_list(*self.version_fields) \
+            .first()
+        if version is None:
+            raise Http404
+        return version
+
+    def get_instance_version(self, instance):
+        return tuple(get_field_value(instance, field) for field in self.version_fields)
+
+    def get_validators(self, version):
+        """ Return the etag and the last modified date of the given version. """
+        # the response may differ for each user, e.g. `is_liked` of a post
+        key = ':'.join([str(self.request.user.pk)] + [value.isoformat() for value in version])
+        etag = '"%s"' % hashlib.md5(key.encode()).hexdigest()
+        return etag, max(version)
+
+    @staticmethod
+    def set_validators(response, etag, last_modified):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(timegm(last_modified.utctimetuple()))
+        return response
+
+    def get_conditional_response(self, etag, last_modified):
+        """ Return the 304 (or 412) response if the client has the given version, otherwise None. """
+        response = get_conditional_response(
+            self.request,
+            etag=etag,
+            last_modified=timegm(last_modified.utctimetuple()),
+        )
+        if response is not None:
+            return self.set_validators(response, etag, last_modified)
+        return None
+
+    def retrieve(self, request, *args, **kwargs):
+        if 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            response = self.get_conditional_response(*self.get_validators(self.get_version()))
+            if response is not None:
+                return response
+
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        response = Response(serializer.data)
+        etag, last_modified = self.get_validators(self.get_instance_version(instance))
+        return self.set_validators(response, etag, last_modified)
@@ -0,0 +1,63 @@
+"""
+PostgreSQL backend which takes the connections from a pool of the current process (see `pool.ConnectionPool`)
+and returns them to it instead of closing them. The pool is configured by the `POOL` key of the database settings,
+e.g. {'MAX_SIZE': 10, 'TIMEOUT': 30, 'MAX_IDLE': 300, 'MAX_LIFETIME': 3600, 'HEALTH_CHECK_INTERVAL': 0}.
+"""
+from functools import partial
+
+import psycopg2.extras
+from django.db.backends.postgresql import base
+from django.utils.asyncio import async_unsafe
+
+from .creation import DatabaseCreation
+from .pool import get_pool
+
+
+def create_connection(conn_params):
+    connection = psycopg2.connect(**conn_params)
+    # the same as the postgresql backend
+    psycopg2.extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+    return connection
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_pool(self, conn_params=None):
+        """ Return the pool of the connections which have the given (or the current) connection parameters. """
+        if conn_params is None:
+            conn_params = self.get_connection_params()
+        # e.g. the test database has the same alias and another name
+        key = (self.alias, repr(sorted(conn_params.items())))
+        options = {name.lower(): value for name, value in self.settings_dict.get('POOL', {}).items()}
+        return get_pool(key, partial(create_connection, conn_params), **options)
+
+    @property
+    def pool(self):
+        return self.get_pool()
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        self._pool = self.get_pool(conn_params)
+        connection = self._pool.getconn()
+
+        try:
+            # the same as the postgresql backend, the pooled connection may have another isolation level
+            options = self.settings_dict['OPTIONS']
+            try:
+                self.isolation_level = options['isolation_level']
+            except KeyError:
+                self.isolation_level = connection.isolation_level
+            else:
+                if self.isolation_level != connection.isolation_level:
+                    connection.set_session(isolation_level=self.isolation_level)
+        except BaseException:
+            # give the place of the connection back to the pool
+            self._pool.putconn(connection)
+            raise
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self._pool.putconn(self.connection)
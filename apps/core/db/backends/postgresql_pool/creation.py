@@ -0,0 +1,15 @@
+from django.db.backends.postgresql.creation import DatabaseCreation as PostgresDatabaseCreation
+
+from .pool import close_pools
+
+
+class DatabaseCreation(PostgresDatabaseCreation):
+    """ Close the idle pooled connections before the test database is cloned or dropped, which needs no connection to it. """
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        close_pools()
+        return super()._clone_test_db(suffix, verbosity, keepdb)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pools()
+        return super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,212 @@
+import os
+import threading
+import time
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """ There was no free connection in the pool during the timeout. """
+
+
+class ConnectionPool:
+    """
+    A bounded pool of the database connections of the current process, which is shared by its threads.
+
+    The connections are created by the `connect` function when there is no idle connection and the pool
+    isn't full, otherwise the checkout waits for a returned connection up to `timeout` seconds.
+    The idle connections are checked (`SELECT 1`) at checkout if they weren't used for `health_check_interval`
+    seconds, and are closed after `max_idle` seconds of idleness or `max_lifetime` seconds of age.
+    """
+
+    def __init__(self, connect, max_size=10, timeout=30, max_idle=300, max_lifetime=3600, health_check_interval=0):
+        self.connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+
+        self._condition = threading.Condition()
+        # the idle connections and their return times, the last returned connection is the last one
+        self._idle = []
+        self._created_at = {}
+        self._size = 0
+        self._stats = {
+            'connections_created': 0,
+            'connections_closed': 0,
+            'checkouts': 0,
+            'waits': 0,
+            # milliseconds
+            'wait_time': 0.0,
+            'timeouts': 0,
+            'health_check_failures': 0,
+        }
+
+    def getconn(self):
+        """ Return an idle (and healthy) connection or a new one, wait for a returned connection if the pool is full. """
+        deadline = time.monotonic() + self.timeout
+        waited_at = None
+        while True:
+            with self._condition:
+                self._reap()
+                if self._idle:
+                    # the most recently used connection, so the others may be reaped
+                    connection, returned_at = self._idle.pop()
+                elif self._size < self.max_size:
+                    # reserve the place of the new connection
+                    connection = None
+                    self._size += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if waited_at is None:
+                        waited_at = time.monotonic()
+                        self._stats['waits'] += 1
+                    if remaining <= 0 or not self._condition.wait(remaining):
+                        self._stats['timeouts'] += 1
+                        self._stats['wait_time'] += (time.monotonic() - waited_at) * 1000
+                        raise PoolTimeout(f'No database connection was returned to the pool in {self.timeout}s.')
+                    continue
+
+                self._stats['checkouts'] += 1
+                if waited_at is not None:
+                    self._stats['wait_time'] += (time.monotonic() - waited_at) * 1000
+
+            if connection is None:
+                return self._create()
+            if time.monotonic() - returned_at < self.health_check_interval or self._is_usable(connection):
+                return connection
+
+            with self._condition:
+                self._stats['health_check_failures'] += 1
+                self._discard(connection)
+
+    def putconn(self, connection):
+        """ Reset the connection and return it to the pool, the broken and expired connections are closed. """
+        is_reset = self._reset(connection)
+
+        with self._condition:
+            if not is_reset or self._is_broken(connection) or self._is_expired(connection):
+                self._discard(connection)
+            else:
+                self._idle.append((connection, time.monotonic()))
+                self._condition.notify()
+
+    def close_idle(self):
+        """ Close all of the idle connections, e.g. before the database is dropped. """
+        with self._condition:
+            while self._idle:
+                connection, _ = self._idle.pop()
+                self._discard(connection)
+
+    def stats(self):
+        with self._condition:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+                **self._stats,
+            }
+
+    def _create(self):
+        try:
+            connection = self.connect()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._created_at[connection] = time.monotonic()
+            self._stats['connections_created'] += 1
+        return connection
+
+    def _reap(self):
+        """ Close the connections which were idle for `max_idle` seconds, the oldest returned ones are the first. """
+        reaped_at = time.monotonic() - self.max_idle
+        while self._idle and self._idle[0][1] <= reaped_at:
+            connection, _ = self._idle.pop(0)
+            self._discard(connection)
+
+    def _discard(self, connection):
+        self._size -= 1
+        self._created_at.pop(connection, None)
+        self._stats['connections_closed'] += 1
+        self._condition.notify()
+        if not connection.closed:
+            try:
+                connection.close()
+            except psycopg2.Error:
+                pass
+
+    def _is_expired(self, connection):
+        return time.monotonic() - self._created_at.get(connection, 0) >= self.max_lifetime
+
+    @staticmethod
+    def _reset(connection):
+        """
+        Roll back the transaction of the connection and reset its session (the settings, the temporary tables,
+        the prepared statements, etc.), so the next borrower gets a clean connection in autocommit mode.
+        """
+        if connection.closed:
+            return False
+        try:
+            if connection.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute('DISCARD ALL')
+        except psycopg2.Error:
+            return False
+        return True
+
+    @staticmethod
+    def _is_broken(connection):
+        return connection.closed or connection.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE
+
+    @staticmethod
+    def _is_usable(connection):
+        # the idle connections are in autocommit mode (see `_reset()`), so the check doesn't open a transaction
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except psycopg2.Error:
+            return False
+        return True
+
+
+# the pools of the current process by their database alias and connection parameters
+pools = {}
+pools_lock = threading.Lock()
+# the pools of the parent process, which are kept so the garbage collector doesn't close their connections
+inherited_pools = []
+
+
+def get_pool(key, connect, **options):
+    with pools_lock:
+        if key not in pools:
+            pools[key] = ConnectionPool(connect, **options)
+        return pools[key]
+
+
+def close_pools():
+    """ Close the idle connections of all pools. """
+    with pools_lock:
+        for pool in pools.values():
+            pool.close_idle()
+
+
+def forget_pools():
+    """ Drop the pools of the parent process in a forked child, their connections belong to the parent. """
+    global pools_lock
+    inherited_pools.extend(pools.values())
+    pools.clear()
+    pools_lock = threading.Lock()
+
+
+# the connections can't be shared by the forked processes (e.g. the preloaded gunicorn workers),
+# the idle ones are closed before forking and the child process creates its own pools
+os.register_at_fork(before=close_pools, after_in_child=forget_pools)
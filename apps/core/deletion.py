@@ -0,0 +1,34 @@
+from django.db import connections, transaction
+from django.db.models import Exists, OuterRef
+
+
+def delete_in_batches(queryset, batch_size, parent_field=None):
+    """
+    Delete the rows of the queryset by SQL in batches of descending ids, each batch in its own transaction.
+    The rows are not loaded and their dependents are not collected (unlike `QuerySet.delete()`),
+    so the dependent rows must be deleted before. If the rows reference each other by `parent_field`
+    (e.g. the replies of the comments), the leaf rows are deleted first, so a parent isn't deleted
+    before its children whatever their ids are. Return the number of the deleted rows.
+    """
+    model = queryset.model
+    connection = connections[queryset.db]
+    quote_name = connection.ops.quote_name
+    sql = 'DELETE FROM {table} WHERE {pk_column} = ANY(%s)'.format(
+        table=quote_name(model._meta.db_table),
+        pk_column=quote_name(model._meta.pk.column),
+    )
+    if parent_field is not None:
+        children = model._base_manager.using(queryset.db).filter(**{parent_field: OuterRef('pk')})
+        queryset = queryset.filter(~Exists(children))
+
+    deleted = 0
+    while True:
+        with transaction.atomic(using=queryset.db), connection.cursor() as cursor:
+            pks = list(queryset.order_by('-pk').values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            cursor.execute(sql, [pks])
+            deleted += cursor.rowcount
+        if len(pks) < batch_size and parent_field is None:
+            break
+    return deleted
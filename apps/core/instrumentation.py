@@ -0,0 +1,64 @@
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+# the placeholder lists, e.g. `IN (%s, %s, %s)` of a prefetch
+PLACEHOLDERS_LIST_RE = re.compile(r'%s(?:\s*,\s*%s)+')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """
+    Return the fingerprint of the given sql, the queries which differ only in their
+    parameters (including the number of the parameters of a list) have the same fingerprint.
+    """
+    return WHITESPACE_RE.sub(' ', PLACEHOLDERS_LIST_RE.sub('%s', sql)).strip()
+
+
+class QueryStats:
+    """
+    Database execute wrapper which records the executed queries count, their total
+    time (in milliseconds) and the count of each query fingerprint.
+
+    Usage:
+        stats = QueryStats()
+        with connection.execute_wrapper(stats):
+            ...
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """ Return the fingerprints which are executed more than once and their count. """
+        return {sql: count for sql, count in self.fingerprints.items() if count > 1}
+
+    @property
+    def duplicates_count(self):
+        """ Return the number of the queries which repeat a previous query fingerprint. """
+        return sum(count - 1 for count in self.duplicates.values())
+
+
+@contextmanager
+def record_queries(stats):
+    """ Record the queries of all of the database connections of the current thread to the given stats. """
+    with ExitStack() as stack:
+        if stats is not None:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+        yield stats
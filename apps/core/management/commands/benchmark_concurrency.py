@@ -0,0 +1,162 @@
+import asyncio
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, connections
+from django.test import AsyncClient, Client, override_settings
+from django.urls import path, resolve, reverse
+
+from apps.core.async_views import async_read_view
+from apps.core.benchmark import benchmark_environment, percentile
+from apps.posts.models import Post
+from apps.tags.models import Tag
+
+
+class URLConf:
+    """ A URLconf object (the url resolvers are cached by their URLconf, so it's hashable unlike a namespace). """
+
+    def __init__(self, urlpatterns):
+        self.urlpatterns = urlpatterns
+
+
+def get_benchmark_urlconf(urls, async_views):
+    """
+    Return a URLconf of the benchmarked urls whose views are built with (or without) the async read views,
+    the url patterns of the project decide it once when they are imported.
+    """
+    urlpatterns = []
+    with override_settings(ASYNC_READ_VIEWS=async_views):
+        for url in urls:
+            match = resolve(urlsplit(url).path)
+            view = match.func.cls.as_view(**match.func.initkwargs)
+            urlpatterns.append(path(match.route, async_read_view(view)))
+    return URLConf(urlpatterns)
+
+
+def get_stats(latencies, duration):
+    return {
+        'requests': len(latencies),
+        'mean': statistics.mean(latencies),
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'rps': len(latencies) / duration,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the latency and throughput of the read endpoints under concurrent clients, '
+        'served by the sync views and a limited number of sync workers (like the WSGI server) '
+        'and by the async read views in one process (like the ASGI server). '
+        'The endpoints read the dataset of the `generate_dataset` command.'
+    )
+    endpoints = ('latest', 'detail', 'search', 'comment_list', 'tag_posts')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--endpoints', nargs='+', default=list(self.endpoints), choices=self.endpoints,
+            help='Endpoints which are benchmarked.',
+        )
+        parser.add_argument(
+            '--concurrency', nargs='+', type=int, default=[1, 8, 32],
+            help='Numbers of the concurrent clients.',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=100,
+            help='Number of requests to each endpoint in each concurrency.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Number of the sync workers, the requests of the other clients wait for a free worker.',
+        )
+
+    def handle(self, *args, **options):
+        post = Post.objects.filter(is_draft=False).exclude(comments=None).order_by('-id').first()
+        tag = Tag.objects.exclude(posts=None).order_by('id').first()
+        if post is None or tag is None:
+            raise CommandError('There is no dataset, generate it by the `generate_dataset` command first.')
+
+        urls = {
+            'latest': reverse('posts:latest'),
+            'detail': reverse('posts:detail', kwargs={'slug': post.slug}),
+            'search': reverse('posts:search') + f'?q={post.title.split()[0]}',
+            'comment_list': reverse('comments:post_comments', kwargs={'hash': post.hash}),
+            'tag_posts': reverse('tags:tag_posts', kwargs={'tag': tag.tag}),
+        }
+
+        sync_urlconf = get_benchmark_urlconf(urls.values(), async_views=False)
+        async_urlconf = get_benchmark_urlconf(urls.values(), async_views=True)
+
+        # the clients run in other threads, so they can't share a transaction
+        with benchmark_environment(rollback=False):
+            for name in options['endpoints']:
+                for concurrency in options['concurrency']:
+                    requests = max(options['requests'], concurrency)
+                    with override_settings(ROOT_URLCONF=sync_urlconf):
+                        wsgi = self.run_sync(urls[name], concurrency, requests, options['workers'])
+                    with override_settings(ROOT_URLCONF=async_urlconf):
+                        asgi = asyncio.run(self.run_async(urls[name], concurrency, requests))
+                    for mode, result in (('wsgi', wsgi), ('asgi', asgi)):
+                        self.stdout.write(
+                            f'{name:<13} {mode} concurrency {concurrency:<3} '
+                            f'p50: {result["p50"]:.2f}ms, p95: {result["p95"]:.2f}ms, '
+                            f'p99: {result["p99"]:.2f}ms, rps: {result["rps"]:.0f}'
+                        )
+
+        # the connections of the clients are taken from the pool of the pooled database backend
+        if hasattr(connection, 'pool'):
+            stats = connection.pool.stats()
+            self.stdout.write('pool ' + ', '.join(f'{name}: {value:.0f}' for name, value in stats.items()))
+
+    @staticmethod
+    def run_sync(url, concurrency, requests, workers):
+        """ Send the requests by the concurrent clients, which are served by the limited sync workers. """
+        workers = threading.Semaphore(workers)
+        latencies = []
+
+        def client(count):
+            http = Client()
+            try:
+                for _ in range(count):
+                    start = time.perf_counter()
+                    with workers:
+                        http.get(url)
+                        # the test client doesn't close the connections like the WSGI handler
+                        close_old_connections()
+                    latencies.append((time.perf_counter() - start) * 1000)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=client, args=(requests // concurrency + (i < requests % concurrency),))
+            for i in range(concurrency)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return get_stats(latencies, time.perf_counter() - start)
+
+    @staticmethod
+    async def run_async(url, concurrency, requests):
+        """ Send the requests by the concurrent clients to the async views of one process. """
+        latencies = []
+
+        async def client(count):
+            http = AsyncClient()
+            for _ in range(count):
+                start = time.perf_counter()
+                await http.get(url)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            client(requests // concurrency + (i < requests % concurrency))
+            for i in range(concurrency)
+        ))
+        return get_stats(latencies, time.perf_counter() - start)
@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from apps.posts.models import Post
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete the hidden posts and users with their comments, likes and tags '
+        'in batches of SQL deletes, and delete their files after that.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.DELETION_BATCH_SIZE,
+            help='Number of rows deleted in each transaction.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=settings.DELETION_POLL_INTERVAL,
+            help='Seconds to wait before checking the hidden objects again when there is none.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when there is no hidden object instead of waiting for new ones.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        try:
+            while True:
+                post_ids = list(Post.objects.hidden().order_by('deleted_at').values_list('pk', flat=True)[:100])
+                user_ids = list(UserModel.objects.hidden().order_by('deleted_at').values_list('pk', flat=True)[:100])
+                if not post_ids and not user_ids:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+
+                for post_id in post_ids:
+                    if Post.objects.delete_hidden(post_id, batch_size):
+                        self.stdout.write(f'Post {post_id} was deleted.')
+                for user_id in user_ids:
+                    if UserModel.objects.delete_hidden(user_id, batch_size):
+                        self.stdout.write(f'User {user_id} was deleted.')
+        except KeyboardInterrupt:
+            pass
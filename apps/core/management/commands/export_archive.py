@@ -0,0 +1,44 @@
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.core.archive import ARCHIVE_TABLES
+from apps.posts.models import Post
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Export the users, tags, posts, likes and comments to an archive directory by PostgreSQL COPY, '
+        'which can be imported by the `import_archive` command.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='The archive directory, it is created if it does not exist.')
+        parser.add_argument('--gzip', action='store_true', help='Compress the archive files.')
+
+    def handle(self, *args, **options):
+        # the dependents of the hidden objects (e.g. the replies to the comments of a hidden user) would be orphans
+        if Post.objects.hidden().exists() or UserModel.objects.hidden().exists():
+            raise CommandError(
+                'There are hidden posts or users, delete them by the `delete_hidden_objects --once` command first.'
+            )
+
+        os.makedirs(options['directory'], exist_ok=True)
+        extension = '.csv.gz' if options['gzip'] else '.csv'
+
+        # the tables are exported from one snapshot
+        outermost = not connection.in_atomic_block
+        with transaction.atomic(), connection.cursor() as cursor:
+            if outermost:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+            for table in ARCHIVE_TABLES:
+                path = os.path.join(options['directory'], table.name + extension)
+                with table.open(path, 'wb') as file:
+                    cursor.copy_expert(table.copy_to_sql(), file)
+                self.stdout.write(f'{cursor.rowcount} {table.name} were exported to {path}.')
+
+        self.stdout.write(self.style.SUCCESS('The archive was exported.'))
@@ -0,0 +1,180 @@
+import random
+import string
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from apps.comments.models import Comment
+from apps.posts.models import Post
+from apps.tags.models import Tag
+
+UserModel = get_user_model()
+
+# the users of the dataset have this email domain
+DATASET_EMAIL_DOMAIN = 'dataset.localhost'
+
+WORDS = (
+    'django', 'python', 'postgres', 'query', 'index', 'cache', 'server', 'request', 'response', 'latency',
+    'blog', 'post', 'writer', 'reader', 'story', 'idea', 'design', 'product', 'startup', 'team',
+    'data', 'model', 'view', 'template', 'api', 'client', 'browser', 'mobile', 'cloud', 'deploy',
+    'the', 'a', 'of', 'and', 'to', 'in', 'is', 'for', 'on', 'with',
+    'that', 'it', 'as', 'was', 'by', 'this', 'are', 'from', 'at', 'be',
+    'fast', 'slow', 'simple', 'large', 'small', 'new', 'old', 'good', 'better', 'best',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a reproducible dataset of users, posts, tags, likes and nested comments '
+        f'for benchmarks. The dataset users have the `{DATASET_EMAIL_DOMAIN}` email domain.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Number of users.')
+        parser.add_argument('--posts', type=int, default=2000, help='Number of posts.')
+        parser.add_argument('--tags', type=int, default=100, help='Number of tags.')
+        parser.add_argument('--max-likes', type=int, default=50, help='Maximum number of likes of a post.')
+        parser.add_argument(
+            '--max-comments', type=int, default=10,
+            help='Maximum number of comments of a post, each one may have a few replies.',
+        )
+        parser.add_argument(
+            '--content-words', type=int, default=800,
+            help='Average number of words of the post contents.',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of posts created in each batch.')
+        parser.add_argument(
+            '--clear', action='store_true',
+            help='Delete the existing dataset (the dataset users and their posts) first.',
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.options = options
+        dataset_users = UserModel.objects.filter(email__endswith=f'@{DATASET_EMAIL_DOMAIN}')
+
+        if options['clear']:
+            deleted = dataset_users.delete()[1].get(UserModel._meta.label, 0)
+            self.stdout.write(f'{deleted} dataset users and their posts were deleted.')
+        elif dataset_users.exists():
+            raise CommandError('The dataset already exists, use --clear to generate it again.')
+
+        with transaction.atomic():
+            users = self.create_users(options['users'])
+            tags = self.create_tags(options['tags'])
+
+            created = 0
+            while created < options['posts']:
+                batch_size = min(options['batch_size'], options['posts'] - created)
+                self.create_posts(batch_size, users, tags)
+                created += batch_size
+                self.stdout.write(f'{created} posts created.')
+
+            Post.objects.filter(author__in=users).update_search_vector()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'The dataset of {len(users)} users, {len(tags)} tags and {created} posts was generated.'
+        ))
+
+    def gen_text(self, words):
+        return ' '.join(self.random.choices(WORDS, k=max(words, 1)))
+
+    def gen_hash(self):
+        return ''.join(self.random.sample(string.digits + string.ascii_letters, 12))
+
+    def create_users(self, count):
+        users = []
+        for i in range(count):
+            username = f'dataset_user_{i}'
+            # the save method (which fills these fields) is not called by bulk create
+            users.append(UserModel(
+                email=f'{username}@{DATASET_EMAIL_DOMAIN}',
+                username=username,
+                full_name=f'Dataset User {i}',
+                biography=self.gen_text(self.random.randint(0, 20)),
+            ))
+        return UserModel.objects.bulk_create(users)
+
+    def create_tags(self, count):
+        # the tags may be shared with the existing posts
+        Tag.objects.bulk_create([Tag(tag=f'tag{i}') for i in range(count)], ignore_conflicts=True)
+        return list(Tag.objects.filter(tag__in=[f'tag{i}' for i in range(count)]))
+
+    def create_posts(self, count, users, tags):
+        now = timezone.now()
+        posts = []
+        post_likes = []
+        post_comments = []
+        for _ in range(count):
+            # the slug (the title and the hash) must fit in 50 characters
+            title = self.gen_text(self.random.randint(2, 5))[:35].strip()
+            is_draft = self.random.random() < 0.1
+            # the draft posts have no likes and comments
+            likes, comments = [], []
+            if not is_draft:
+                likes = self.random.sample(users, self.random.randint(0, min(self.options['max_likes'], len(users))))
+                # the replies count of each comment
+                comments = [
+                    self.random.choice((0, 0, 1, 2, 3))
+                    for _ in range(self.random.randint(0, self.options['max_comments']))
+                ]
+            post = Post(
+                title=title,
+                description=self.gen_text(self.random.randint(5, 15))[:100],
+                content=self.gen_text(int(self.random.gauss(self.options['content_words'], self.options['content_words'] / 4))),
+                raw_slug=title.replace(' ', '-'),
+                hash=self.gen_hash(),
+                author=self.random.choice(users),
+                is_draft=is_draft,
+                published_at=None if is_draft else now - timedelta(seconds=self.random.randint(0, 60 * 24 * 3600)),
+                likes_count=len(likes),
+                comments_count=len(comments) + sum(comments),
+            )
+            if not is_draft:
+                post.slug = f'{post.raw_slug}-{post.hash}'
+            posts.append(post)
+            post_likes.append(likes)
+            post_comments.append(comments)
+
+        posts = Post.objects.bulk_create(posts)
+
+        Post.tags.through.objects.bulk_create([
+            Post.tags.through(post_id=post.id, tag_id=tag.id)
+            for post in posts
+            for tag in self.random.sample(tags, self.random.randint(0, min(5, len(tags))))
+        ])
+        Post.likes.through.objects.bulk_create([
+            Post.likes.through(post_id=post.id, user_id=user.id)
+            for post, likes in zip(posts, post_likes)
+            for user in likes
+        ])
+        self.create_comments(posts, post_comments, users)
+
+    def create_comments(self, posts, post_comments, users):
+        comments = []
+        replies_counts = []
+        for post, post_replies_counts in zip(posts, post_comments):
+            for replies_count in post_replies_counts:
+                comments.append(Comment(
+                    post_id=post.id,
+                    user=self.random.choice(users),
+                    text=self.gen_text(self.random.randint(3, 60)),
+                    replies_count=replies_count,
+                ))
+                replies_counts.append(replies_count)
+        comments = Comment.objects.bulk_create(comments)
+
+        Comment.objects.bulk_create([
+            Comment(
+                post_id=comment.post_id,
+                parent_id=comment.id,
+                user=self.random.choice(users),
+                text=self.gen_text(self.random.randint(3, 30)),
+            )
+            for comment, replies_count in zip(comments, replies_counts)
+            for _ in range(replies_count)
+        ])
@@ -0,0 +1,92 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DataError, IntegrityError, connection, transaction
+
+from apps.core.archive import ARCHIVE_TABLES
+from apps.posts.cache import latest_feed_cache
+
+
+class Command(BaseCommand):
+    help = (
+        'Import the users, tags, posts, likes and comments of an archive directory by PostgreSQL COPY. '
+        'Each table is a `<table>.csv` (or `<table>.csv.gz`) file with a header line, the tables are '
+        + ', '.join(table.name for table in ARCHIVE_TABLES) + '. The missing files are skipped. '
+        'The rows keep their archive ids, the post hashes and slugs and the likes, comments and replies counters '
+        'are generated in the database.'
+    )
+
+    # the generated values which collide are generated again, up to the number of attempts
+    max_generate_attempts = 10
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='The archive directory.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of posts whose search document is built in each query.',
+        )
+
+    def handle(self, *args, **options):
+        paths = {table.name: table.get_path(options['directory']) for table in ARCHIVE_TABLES}
+        if not any(paths.values()):
+            raise CommandError(f'There is no archive file in {options["directory"]}.')
+
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                # the rows are streamed into the staging tables and then inserted from them at once
+                for table in ARCHIVE_TABLES:
+                    cursor.execute(table.create_staging_table_sql())
+                    if paths[table.name]:
+                        staged = self.copy_from(cursor, table, paths[table.name])
+                        self.stdout.write(f'{staged} rows of {table.name} were read.')
+
+                for table in ARCHIVE_TABLES:
+                    self.generate_columns(cursor, table)
+                for table in ARCHIVE_TABLES:
+                    cursor.execute(table.get_insert_sql())
+                    self.stdout.write(f'{cursor.rowcount} {table.name} were imported.')
+                for table in ARCHIVE_TABLES:
+                    cursor.execute(table.drop_staging_table_sql())
+
+                models = [table.model for table in ARCHIVE_TABLES if not table.model._meta.auto_created]
+                for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                    cursor.execute(sql)
+        except IntegrityError as e:
+            raise CommandError(f'The archive conflicts with the existing rows: {e}')
+        except DataError as e:
+            # e.g. a too long title or slug, or a counter which is out of its column range
+            raise CommandError(f'The archive has invalid values: {e}')
+
+        with connection.cursor() as cursor:
+            for table in ARCHIVE_TABLES:
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(table.model._meta.db_table)}')
+
+        call_command('update_post_search_vectors', missing_only=True, batch_size=options['batch_size'], stdout=self.stdout)
+        latest_feed_cache.invalidate()
+        self.stdout.write(self.style.SUCCESS('The archive was imported.'))
+
+    def generate_columns(self, cursor, table):
+        """ Fill the generated columns of the staging table, again while they collide (e.g. the hashes). """
+        generate_sql = table.get_generate_sql()
+        if generate_sql is None:
+            return
+
+        for _ in range(self.max_generate_attempts):
+            cursor.execute(generate_sql)
+            if not cursor.rowcount:
+                return
+        raise CommandError(f'Unable to generate the unique columns of {table.name}.')
+
+    @staticmethod
+    def copy_from(cursor, table, path):
+        with table.open(path) as file:
+            columns = file.readline().decode().strip().lstrip('﻿').split(',')
+            unknown = set(columns) - set(table.columns)
+            if unknown:
+                raise CommandError(f'Unknown columns of {table.name}: {", ".join(sorted(unknown))}')
+            missing = set(table.required) - set(columns)
+            if missing:
+                raise CommandError(f'Missing columns of {table.name}: {", ".join(sorted(missing))}')
+
+            cursor.copy_expert(table.copy_from_sql(columns), file)
+        return cursor.rowcount
@@ -0,0 +1,97 @@
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+# the paths aren't reversed, reversing loads the url patterns before the measurement
+REQUEST_PATHS = ('/posts/search/?q=django', '/tags/search/?q=django', '/users/search/?q=django')
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the startup of new server processes with and without the warm-up of the production '
+        'server (see `config/gunicorn.py`): the time until the process is ready, the duration of '
+        'the application load and each warm-up step and the latency of the first and second requests.'
+    )
+    # the checks load the url patterns before the measurement
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--runs', type=int, default=5,
+            help='Number of the measured processes of each mode, the medians are reported.',
+        )
+        parser.add_argument(
+            '--process', choices=('cold', 'warm'),
+            help='Measure the current process in the given mode and write the result as JSON (used internally).',
+        )
+
+    def handle(self, *args, **options):
+        if options['process']:
+            result = self.measure_process(warm=options['process'] == 'warm')
+            self.stdout.write(json.dumps(result))
+            return
+
+        results = {'cold': [], 'warm': []}
+        for _ in range(options['runs']):
+            for mode in results:
+                results[mode].append(self.run_process(mode))
+
+        for mode, runs in results.items():
+            self.stdout.write(f'{mode}:')
+            for step in runs[0]:
+                self.stdout.write(f'  {step:<15} {statistics.median(run[step] for run in runs):.2f}ms')
+
+    @staticmethod
+    def run_process(mode):
+        """ Run a new process which measures itself, and return its result and its wall time until it was ready. """
+        start = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, '-m', 'django', 'measure_startup', '--process', mode],
+            capture_output=True, text=True,
+        )
+        wall_time = (time.perf_counter() - start) * 1000
+        if process.returncode:
+            raise CommandError(f'The measured process failed:\n{process.stderr}')
+
+        result = json.loads(process.stdout.splitlines()[-1])
+        # the time of the requests isn't a part of the startup
+        return {'ready': wall_time - result.pop('requests'), **result}
+
+    @staticmethod
+    def measure_process(warm):
+        """ Load the application, warm it up if `warm` is True and send the requests to it. """
+        from django.core.wsgi import get_wsgi_application
+        from django.test import Client
+
+        from apps.core.benchmark import benchmark_environment
+        from apps.core.warmup import warm_up
+
+        result = {}
+        start = time.perf_counter()
+        get_wsgi_application()
+        result['application'] = (time.perf_counter() - start) * 1000
+
+        if warm:
+            result.update(warm_up())
+
+        first, second = [], []
+        requests_start = time.perf_counter()
+        # the requests don't change the data, and a transaction would open the database connection before them
+        with benchmark_environment(rollback=False):
+            http = Client()
+            for path in REQUEST_PATHS:
+                for latencies in (first, second):
+                    start = time.perf_counter()
+                    response = http.get(path)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    if response.status_code != 200:
+                        raise CommandError(f'{path} responded {response.status_code}.')
+
+        result['first requests'] = sum(first)
+        result['second requests'] = sum(second)
+        result['requests'] = (time.perf_counter() - requests_start) * 1000
+        return result
@@ -0,0 +1,163 @@
+import itertools
+import json
+import platform
+import random
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.benchmark import benchmark_environment, measure
+from apps.core.management.commands.generate_dataset import DATASET_EMAIL_DOMAIN, WORDS
+from apps.posts.models import Post
+from apps.tags.models import Tag
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the main endpoints on the dataset of the `generate_dataset` command '
+        'and report the latency percentiles, requests per second and queries per request. '
+        'The changes of the benchmarks (e.g. likes and comments) are rolled back at the end.'
+    )
+    endpoints = (
+        'latest', 'search', 'detail', 'like', 'comment_add',
+        'comment_list', 'tag_posts', 'user_search',
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--endpoints', nargs='+', default=list(self.endpoints), choices=self.endpoints,
+            help='Endpoints which are benchmarked.',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Number of measured requests to each endpoint.',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=20,
+            help='Number of requests to each endpoint before measuring.',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator.')
+        parser.add_argument('--output', help='Save the results as JSON to this file.')
+        parser.add_argument('--compare', help='Compare the results with the saved results of this file.')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)['results']
+
+        self.random = random.Random(options['seed'])
+        users = list(UserModel.objects.filter(email__endswith=f'@{DATASET_EMAIL_DOMAIN}').order_by('id')[:100])
+        posts = list(
+            Post.objects.filter(author__in=users, is_draft=False)
+            .order_by('id').values_list('slug', 'hash')[:1000]
+        )
+        tags = list(Tag.objects.filter(posts__author__in=users).distinct().order_by('id').values_list('tag', flat=True)[:100])
+        if not users or not posts:
+            raise CommandError('There is no dataset, generate it by the `generate_dataset` command first.')
+
+        self.anonymous_client = Client()
+        self.client = Client()
+        self.posts = posts
+        self.tags = tags or ['tag0']
+
+        results = {}
+        with benchmark_environment():
+            # the session and the last login of the user are rolled back (or deleted from the cache) too
+            self.client.force_login(self.random.choice(users))
+            try:
+                for name in options['endpoints']:
+                    func = getattr(self, f'get_{name}_request')()
+                    results[name] = result = measure(func, requests=options['requests'], warmup=options['warmup'])
+                    self.stdout.write(self.format_result(name, result, baseline and baseline.get(name)))
+            finally:
+                self.client.logout()
+
+        if options['output']:
+            data = {
+                'meta': {
+                    'created_at': timezone.now().isoformat(),
+                    'python': platform.python_version(),
+                    'database': connection.vendor,
+                    'users': UserModel.objects.count(),
+                    'posts': Post.objects.count(),
+                    'requests': options['requests'],
+                    'warmup': options['warmup'],
+                    'seed': options['seed'],
+                },
+                'results': results,
+            }
+            with open(options['output'], 'w') as f:
+                json.dump(data, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'The results were saved to {options["output"]}.'))
+
+    @staticmethod
+    def format_result(name, result, baseline=None):
+        line = (
+            f'{name:<13} p50: {result["p50"]:.2f}ms, p95: {result["p95"]:.2f}ms, p99: {result["p99"]:.2f}ms, '
+            f'rps: {result["rps"]:.0f}, queries/request: {result["queries"]:.1f}'
+        )
+        if baseline:
+            changes = ', '.join(
+                f'{key} {(result[key] - baseline[key]) / baseline[key]:+.0%}'
+                for key in ('p50', 'p95', 'rps') if baseline.get(key)
+            )
+            line += f' ({changes})'
+        return line
+
+    def cycle(self, values):
+        values = list(values)
+        self.random.shuffle(values)
+        return itertools.cycle(values)
+
+    def get_latest_request(self):
+        url = reverse('posts:latest')
+        return lambda: self.anonymous_client.get(url)
+
+    def get_search_request(self):
+        url = reverse('posts:search')
+        queries = self.cycle(WORDS)
+        return lambda: self.client.get(url, {'q': next(queries)})
+
+    def get_detail_request(self):
+        urls = self.cycle(reverse('posts:detail', kwargs={'slug': slug}) for slug, _ in self.posts)
+        return lambda: self.anonymous_client.get(next(urls))
+
+    def get_like_request(self):
+        urls = self.cycle(reverse('posts:like', kwargs={'hash': hash}) for _, hash in self.posts)
+        liked = set()
+
+        def like():
+            # like and unlike in turn, so each request changes the likes
+            url = next(urls)
+            if url in liked:
+                self.client.delete(url)
+                liked.remove(url)
+            else:
+                self.client.post(url)
+                liked.add(url)
+
+        return like
+
+    def get_comment_add_request(self):
+        urls = self.cycle(reverse('comments:add', kwargs={'post_hash': hash}) for _, hash in self.posts)
+        return lambda: self.client.post(next(urls), {'text': ' '.join(self.random.choices(WORDS, k=20))})
+
+    def get_comment_list_request(self):
+        urls = self.cycle(reverse('comments:post_comments', kwargs={'hash': hash}) for _, hash in self.posts)
+        return lambda: self.client.get(next(urls))
+
+    def get_tag_posts_request(self):
+        urls = self.cycle(reverse('tags:tag_posts', kwargs={'tag': tag}) for tag in self.tags)
+        return lambda: self.client.get(next(urls))
+
+    def get_user_search_request(self):
+        url = reverse('users:search')
+        queries = self.cycle(['dataset', 'user', 'dataset user 1'])
+        return lambda: self.client.get(url, {'q': next(queries)})
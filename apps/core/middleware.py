@@ -0,0 +1,45 @@
+import logging
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from apps.core.instrumentation import QueryStats, record_queries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record the database queries count, time and duplicate queries of each request.
+
+    The stats are logged and in the debug mode added to the response headers
+    (X-DB-Query-Count, X-DB-Time in milliseconds and X-DB-Duplicate-Queries).
+    It's enabled by the `QUERY_INSTRUMENTATION` setting.
+    The stats are kept in `request.query_stats`, so the views which run in other threads can record to them.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = request.query_stats = QueryStats()
+        with record_queries(stats):
+            response = self.get_response(request)
+
+        self.log(request, response, stats)
+        if settings.DEBUG:
+            response['X-DB-Query-Count'] = stats.count
+            response['X-DB-Time'] = f'{stats.duration:.2f}'
+            response['X-DB-Duplicate-Queries'] = stats.duplicates_count
+        return response
+
+    @staticmethod
+    def log(request, response, stats):
+        logger.debug(
+            '%s %s %s: %d queries in %.2fms',
+            request.method, request.path, response.status_code, stats.count, stats.duration,
+        )
+        for sql, count in stats.duplicates.items():
+            logger.warning('%s %s executed the same query %d times: %s', request.method, request.path, count, sql)
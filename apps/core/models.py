@@ -0,0 +1,44 @@
+class FileTrackerMixin:
+    """
+    Track the saved file names of `tracked_file_fields`,
+    to find out a new file is going to be saved or not.
+    """
+    tracked_file_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.update_saved_file_names()
+
+    def _get_file_name(self, field_name):
+        # a deferred field is not in the instance dict, and it must not be loaded here
+        file = self.__dict__.get(field_name)
+        return getattr(file, 'name', file)
+
+    def update_saved_file_names(self):
+        self._saved_file_names = {
+            field_name: self._get_file_name(field_name)
+            for field_name in self.tracked_file_fields
+        }
+
+    def get_saved_file_name(self, field_name):
+        return self._saved_file_names[field_name]
+
+    def file_changed(self, field_name, update_fields=None):
+        """ Return True if a new file is going to be saved in the given field. """
+        if update_fields is not None and field_name not in update_fields:
+            return False
+
+        file = self.__dict__.get(field_name)
+        if not file or file == self._meta.get_field(field_name).default:
+            return False
+        # an uploaded file which is not saved yet, or another saved file
+        return not getattr(file, '_committed', True) or self._get_file_name(field_name) != self._saved_file_names[field_name]
+
+    def file_cleared(self, field_name, update_fields=None):
+        """ Return True if the saved file of the given field is going to be removed from it. """
+        if update_fields is not None and field_name not in update_fields:
+            return False
+        # a deferred field isn't changed
+        if field_name not in self.__dict__:
+            return False
+        return not self._get_file_name(field_name) and bool(self._saved_file_names[field_name])
@@ -1,4 +1,11 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date
+
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, Cursor, CursorPagination, PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
 
 
 class BaseResultsPagination(PageNumberPagination):
@@ -6,3 +13,218 @@ class BaseResultsPagination(PageNumberPagination):
     page_size = 25
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+class BaseCursorPagination(CursorPagination):
+    """
+    Keyset paginator for any objects result.
+
+    The results are ordered by the view `ordering` fields (or the paginator `ordering`)
+    and the last ordering field must be unique, e.g. `('-published_at', '-id')`.
+    Each page is fetched by filtering on the ordering values of the previous page
+    edge, so a deep page costs the same as the first one.
+    """
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        queryset = queryset.order_by(*self._get_order_by(reverse))
+        if self.cursor is not None:
+            queryset = queryset.filter(self._get_following_filter(self.cursor.position, reverse))
+
+        # fetch one more item to find out there is a following page or not
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following = len(results) > self.page_size
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = self.cursor is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        return tuple(ordering)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        if self.page:
+            position = self._get_position_from_instance(self.page[-1], self.ordering)
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        if self.page:
+            position = self._get_position_from_instance(self.page[0], self.ordering)
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            tokens = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            position = tokens['p']
+            reverse = bool(tokens.get('r', False))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=reverse, position=position)
+
+    def encode_cursor(self, cursor):
+        tokens = {'p': cursor.position}
+        if cursor.reverse:
+            tokens['r'] = 1
+
+        encoded = urlsafe_b64encode(json.dumps(tokens, separators=(',', ':')).encode()).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position_from_instance(self, instance, ordering):
+        position = []
+        for field_name in ordering:
+            field_name = field_name.lstrip('-')
+            # the results may be the `.values()` rows
+            value = instance[field_name] if isinstance(instance, dict) else getattr(instance, field_name)
+            if isinstance(value, date):
+                value = value.isoformat()
+            position.append(value)
+        return position
+
+    def _get_order_by(self, reverse):
+        """
+        Return the order by expressions. Null values are placed at the end of the
+        results, so in reverse direction they come first.
+        """
+        order_by = []
+        for field_name in self.ordering:
+            descending = field_name.startswith('-') != reverse
+            expression = F(field_name.lstrip('-'))
+            if reverse:
+                order_by.append(expression.desc(nulls_first=True) if descending else expression.asc(nulls_first=True))
+            else:
+                order_by.append(expression.desc(nulls_last=True) if descending else expression.asc(nulls_last=True))
+        return order_by
+
+    def _get_following_filter(self, position, reverse):
+        """
+        Return a filter which matches the items placed after the given position,
+        e.g. for `('-published_at', '-id')` ordering it matches
+        `published_at < p0 OR (published_at = p0 AND id < p1)`.
+        """
+        following = Q()
+        equal = Q()
+        for field_name, value in zip(self.ordering, position):
+            descending = field_name.startswith('-') != reverse
+            field_name = field_name.lstrip('-')
+
+            if value is None:
+                # nulls are at the end, so only non-null values follow a null in reverse direction
+                after = Q(**{f'{field_name}__isnull': False}) if reverse else Q(pk__in=[])
+                same = Q(**{f'{field_name}__isnull': True})
+            else:
+                after = Q(**{f'{field_name}__{"lt" if descending else "gt"}': value})
+                if not reverse:
+                    after |= Q(**{f'{field_name}__isnull': True})
+                same = Q(**{field_name: value})
+
+            following |= equal & after
+            equal &= same
+        return following
+
+
+class CursorOrPagePagination(BasePagination):
+    """
+    Page number paginator (`BaseResultsPagination`) which pages by keyset (`BaseCursorPagination`)
+    instead when the request has the `cursor` query param, e.g. `?cursor=` for the first page.
+    So the clients which use the page numbers and the count keep working and the other clients
+    can opt in to the cursors, which cost the same for the deep pages.
+    The page number results are ordered by the view `ordering` too.
+    """
+    page_number_class = BaseResultsPagination
+    cursor_class = BaseCursorPagination
+
+    def __init__(self):
+        self.paginator = None
+
+    def __getattr__(self, name):
+        # e.g. `display_page_controls` and `template` of the browsable api
+        paginator = self.__dict__.get('paginator')
+        if paginator is None:
+            raise AttributeError(name)
+        return getattr(paginator, name)
+
+    def is_cursor_request(self, request):
+        return self.cursor_class.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_request(request):
+            self.paginator = self.cursor_class()
+        else:
+            self.paginator = self.page_number_class()
+            ordering = getattr(view, 'ordering', None)
+            if ordering:
+                queryset = queryset.order_by(*self.get_order_by((ordering,) if isinstance(ordering, str) else ordering))
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    @staticmethod
+    def get_order_by(ordering):
+        """ Return the order by expressions, null values are placed at the end the same as the cursor pages. """
+        return [
+            F(field_name[1:]).desc(nulls_last=True) if field_name.startswith('-') else F(field_name).asc(nulls_last=True)
+            for field_name in ordering
+        ]
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number_class().get_paginated_response_schema(schema)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    def get_results(self, data):
+        return self.paginator.get_results(data)
+
+    def get_schema_fields(self, view):
+        # the page size param is shared by both paginators
+        fields = [*self.page_number_class().get_schema_fields(view), *self.cursor_class().get_schema_fields(view)]
+        return list({field.name: field for field in fields}.values())
+
+    def get_schema_operation_parameters(self, view):
+        parameters = [
+            *self.page_number_class().get_schema_operation_parameters(view),
+            *self.cursor_class().get_schema_operation_parameters(view),
+        ]
+        return list({parameter['name']: parameter for parameter in parameters}.values())
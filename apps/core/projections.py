@@ -0,0 +1,75 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def _get_model_field(model, name):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    # only the columns of the model table can be projected
+    return field if field.concrete and not field.many_to_many else None
+
+
+@lru_cache(maxsize=None)
+def get_serializer_projection(serializer_class, prefix=''):
+    """
+    Return the model field names which are read by the given model serializer fields,
+    e.g. ('id', 'title', 'author', 'author__id', 'author__username') for a post serializer
+    which has a nested author serializer.
+
+    The nested serializers of the foreign keys are projected by the `field__` prefix,
+    the method fields by the model field of the same name (if there is) and the many-to-many
+    fields and the fields which aren't a model field are ignored.
+    """
+    model = serializer_class.Meta.model
+    names = [prefix + model._meta.pk.name]
+
+    for field_name, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+
+        if isinstance(field, serializers.SerializerMethodField):
+            source = field_name
+        elif field.source == '*':
+            continue
+        else:
+            source = field.source
+
+        # e.g. `author.username` source
+        source_parts = source.split('.')
+        model_field = _get_model_field(model, source_parts[0])
+        if model_field is None:
+            continue
+        names.append(prefix + model_field.name)
+
+        if isinstance(field, serializers.ModelSerializer) and model_field.is_relation:
+            names.extend(get_serializer_projection(type(field), prefix=f'{prefix}{model_field.name}__'))
+        elif len(source_parts) > 1 and model_field.is_relation:
+            names.append(prefix + '__'.join(source_parts))
+
+    # keep the order and drop the duplicates
+    return tuple(dict.fromkeys(names))
+
+
+class SerializerProjectionMixin:
+    """
+    Fetch only the model fields which are used by the view serializer (including the nested serializers),
+    the view `ordering` fields and the view `projection_fields` (e.g. the fields which the permissions need).
+    """
+    projection_fields = ()
+
+    def get_projection(self, model):
+        # the ordering may be by an annotation, e.g. search rank
+        ordering = [
+            field_name for field_name in (field.lstrip('-') for field in getattr(self, 'ordering', None) or ())
+            if _get_model_field(model, field_name) is not None
+        ]
+        projection = get_serializer_projection(self.get_serializer_class())
+        return tuple(dict.fromkeys((*projection, *ordering, *self.projection_fields)))
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return queryset.only(*self.get_projection(queryset.model))
@@ -0,0 +1,33 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer which encodes by orjson.
+
+    The output is the same bytes as `JSONRenderer` output (compact and unicode),
+    the values which orjson encodes differently (e.g. dates) are passed to the
+    `JSONRenderer` encoder. Indented responses and the data which orjson can't
+    encode are rendered by `JSONRenderer` itself.
+    Note that the floats in exponent notation (1e16) and NaN are written differently,
+    so use it for the responses which have no float.
+    """
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        except orjson.JSONEncodeError:
+            # e.g. the integers which are larger than 64-bit
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # escape \u2028 and \u2029 the same as `JSONRenderer`
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
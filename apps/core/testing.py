@@ -0,0 +1,41 @@
+from contextlib import contextmanager
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from apps.core.instrumentation import QueryStats, record_queries
+
+
+class QueryBudgetMixin:
+    """
+    Test case mixin for declaring the maximum number of queries of a view,
+    which fails on the N+1 regressions.
+    """
+
+    @contextmanager
+    def assertMaxQueries(self, budget, allow_duplicates=False):
+        """
+        Fail if the block executes more than `budget` queries,
+        or the same query more than once unless `allow_duplicates` is true.
+        """
+        with record_queries(QueryStats()) as stats:
+            yield stats
+
+        queries = '\n'.join(f'{count}x {sql}' for sql, count in stats.fingerprints.items())
+        self.assertLessEqual(
+            stats.count, budget,
+            f'{stats.count} queries were executed, the budget is {budget}:\n{queries}',
+        )
+        if not allow_duplicates:
+            self.assertEqual(
+                stats.duplicates, {},
+                f'The same queries were executed more than once:\n{queries}',
+            )
+
+
+def create_image_file(name='image.jpg', size=(400, 300), image_format='JPEG', mode='RGB'):
+    """ Create an uploaded image with given size, format and color mode. """
+    content = BytesIO()
+    Image.new(mode, size, color='red').save(content, format=image_format)
+    return SimpleUploadedFile(name, content.getvalue(), content_type=f'image/{image_format.lower()}')
@@ -0,0 +1,39 @@
+import asyncio
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncRequestFactory, TransactionTestCase, override_settings
+
+from apps.core.async_views import async_read_view
+from apps.posts import views
+from apps.posts.models import Post
+
+UserModel = get_user_model()
+
+
+class AsyncReadViewTest(TransactionTestCase):
+    def setUp(self):
+        user = UserModel.objects.create_user(email='sample@sample.sample')
+        self.post = Post.objects.create(title='sample', content='sample', author=user)
+        self.post.publish()
+
+    @override_settings(ASYNC_READ_VIEWS=False)
+    def test_sync_view(self):
+        view = views.PostSearchListAPIView.as_view()
+        self.assertIs(async_read_view(view), view)
+
+    @override_settings(ASYNC_READ_VIEWS=True)
+    def test_async_view(self):
+        view = async_read_view(views.PostSearchListAPIView.as_view())
+        self.assertTrue(asyncio.iscoroutinefunction(view))
+        self.assertIs(view.view_class, views.PostSearchListAPIView)
+        self.assertTrue(view.csrf_exempt)
+
+        async def search():
+            # the concurrent requests are served by separate threads
+            requests = [view(AsyncRequestFactory().get('/posts/search/', {'q': 'sample'})) for _ in range(3)]
+            return await asyncio.gather(*requests)
+
+        for response in asyncio.run(search()):
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.is_rendered)
+            self.assertEqual(response.data['results'][0]['hash'], self.post.hash)
@@ -0,0 +1,332 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from apps.comments.models import Comment
+from apps.core.archive import ARCHIVE_TABLES, HASH_SQL
+from apps.core.management.commands.benchmark_concurrency import get_benchmark_urlconf
+from apps.posts.models import Post
+from apps.tags.models import Tag
+
+UserModel = get_user_model()
+
+
+class GenerateDatasetCommandTest(TestCase):
+    def generate(self, **options):
+        options = {'users': 5, 'posts': 20, 'tags': 5, 'max_likes': 3, 'max_comments': 3, 'batch_size': 7, **options}
+        call_command('generate_dataset', stdout=StringIO(), **options)
+
+    def test_generate_dataset(self):
+        self.generate()
+
+        self.assertEqual(UserModel.objects.count(), 5)
+        self.assertEqual(Post.objects.count(), 20)
+        # the precomputed counters are the same as the created rows
+        for post in Post.objects.all():
+            self.assertEqual(post.likes_count, post.likes.count())
+            self.assertEqual(post.comments_count, post.comments.count())
+        for comment in Comment.objects.filter(parent__isnull=True):
+            self.assertEqual(comment.replies_count, comment.replies.count())
+
+        published = Post.objects.filter(is_draft=False).first()
+        self.assertEqual(published.slug, f'{published.raw_slug}-{published.hash}')
+        self.assertTrue(Post.objects.search(published.title.split()[0]).exists())
+
+    def test_generate_dataset_is_reproducible(self):
+        self.generate(seed=1)
+        hashes = list(Post.objects.order_by('id').values_list('hash', flat=True))
+
+        self.generate(seed=1, clear=True)
+        self.assertEqual(list(Post.objects.order_by('id').values_list('hash', flat=True)), hashes)
+
+    def test_existing_dataset(self):
+        self.generate()
+        with self.assertRaises(CommandError):
+            self.generate()
+
+
+class RunBenchmarksCommandTest(TestCase):
+    def test_run_benchmarks(self):
+        call_command('generate_dataset', users=3, posts=5, tags=2, stdout=StringIO())
+        comments_count = Comment.objects.count()
+
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+            call_command('run_benchmarks', requests=2, warmup=1, output=output, stdout=StringIO())
+            with open(output) as f:
+                results = json.load(f)['results']
+
+            out = StringIO()
+            call_command('run_benchmarks', endpoints=['latest'], requests=2, warmup=0, compare=output, stdout=out)
+
+        self.assertEqual(set(results), {
+            'latest', 'search', 'detail', 'like', 'comment_add',
+            'comment_list', 'tag_posts', 'user_search',
+        })
+        self.assertEqual(set(results['latest']), {'requests', 'mean', 'p50', 'p95', 'p99', 'rps', 'queries'})
+        self.assertIn('rps', out.getvalue())
+        # the added comments, the session and the last login are rolled back
+        self.assertEqual(Comment.objects.count(), comments_count)
+        self.assertFalse(Session.objects.exists())
+        self.assertFalse(UserModel.objects.filter(last_login__isnull=False).exists())
+
+    def test_no_dataset(self):
+        with self.assertRaises(CommandError):
+            call_command('run_benchmarks', stdout=StringIO())
+
+
+class ArchiveCommandsTest(TestCase):
+    def setUp(self):
+        call_command('generate_dataset', users=5, posts=20, tags=5, max_likes=3, max_comments=3, stdout=StringIO())
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def delete_all(self):
+        UserModel.objects.all().delete()
+        Tag.objects.all().delete()
+
+    def get_posts(self):
+        return list(Post.objects.order_by('id').values(
+            'id', 'title', 'slug', 'hash', 'author_id', 'is_draft', 'published_at', 'likes_count', 'comments_count',
+        ))
+
+    def get_comments(self):
+        return list(Comment.objects.order_by('id').values('id', 'post_id', 'parent_id', 'text', 'replies_count'))
+
+    def test_export_and_import(self):
+        posts = self.get_posts()
+        comments = self.get_comments()
+        call_command('export_archive', self.directory.name, gzip=True, stdout=StringIO())
+        self.delete_all()
+
+        call_command('import_archive', self.directory.name, stdout=StringIO())
+        self.assertEqual(self.get_posts(), posts)
+        self.assertEqual(self.get_comments(), comments)
+        self.assertEqual(UserModel.objects.count(), 5)
+        published = Post.objects.filter(is_draft=False).first()
+        self.assertTrue(Post.objects.search(published.title.split()[0]).exists())
+
+        # the sequences are reset after the imported ids
+        user = UserModel.objects.create_user(email='sample@sample.sample')
+        self.assertGreater(user.id, max(UserModel.objects.exclude(pk=user.pk).values_list('id', flat=True)))
+
+    def test_import_generates_hash_and_slug(self):
+        self.delete_all()
+        with open(os.path.join(self.directory.name, 'users.csv'), 'w') as f:
+            f.write('id,email\n1,archive@archive.localhost\n')
+        with open(os.path.join(self.directory.name, 'posts.csv'), 'w') as f:
+            f.write('id,author_id,title,content,is_draft\n1,1,archive post,content,false\n2,1,draft post,content,true\n')
+        with open(os.path.join(self.directory.name, 'likes.csv'), 'w') as f:
+            f.write('post_id,user_id\n1,1\n')
+
+        call_command('import_archive', self.directory.name, stdout=StringIO())
+        user = UserModel.objects.get()
+        self.assertEqual(user.username, 'archive')
+        post = Post.objects.get(id=1)
+        self.assertEqual(len(post.hash), 12)
+        self.assertEqual(post.slug, f'archive post-{post.hash}')
+        self.assertEqual(post.likes_count, 1)
+        self.assertEqual(Post.objects.get(id=2).slug, '')
+
+    def test_import_regenerates_colliding_hashes(self):
+        existing_hash = Post.objects.first().hash
+        posts_table = next(table for table in ARCHIVE_TABLES if table.name == 'posts')
+        generated_hash = HASH_SQL.format(id='a.id')
+        # the first generated hashes collide with an existing post and with each other
+        generate_sql = posts_table.generate_sql.replace(
+            generated_hash, f"CASE WHEN a.generated_hash IS NULL THEN '{existing_hash}' ELSE {generated_hash} END",
+        )
+        author_id = UserModel.objects.first().pk
+        with open(os.path.join(self.directory.name, 'posts.csv'), 'w') as f:
+            f.write(f'id,author_id,title,content\n1001,{author_id},first,content\n1002,{author_id},second,content\n')
+
+        with mock.patch.object(posts_table, 'generate_sql', generate_sql):
+            call_command('import_archive', self.directory.name, stdout=StringIO())
+        hashes = set(Post.objects.filter(id__in=[1001, 1002]).values_list('hash', flat=True))
+        self.assertEqual(len(hashes), 2)
+        self.assertNotIn(existing_hash, hashes)
+
+    def test_import_invalid_values(self):
+        self.delete_all()
+        with open(os.path.join(self.directory.name, 'users.csv'), 'w') as f:
+            f.write('id,email\n1,archive@archive.localhost\n')
+        with open(os.path.join(self.directory.name, 'posts.csv'), 'w') as f:
+            f.write(f'id,author_id,title,content\n1,1,{"long title " * 10},content\n')
+
+        with self.assertRaises(CommandError):
+            call_command('import_archive', self.directory.name, stdout=StringIO())
+
+    def test_import_conflict(self):
+        call_command('export_archive', self.directory.name, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('import_archive', self.directory.name, stdout=StringIO())
+
+    def test_export_with_hidden_objects(self):
+        Post.objects.first().hide()
+        with self.assertRaises(CommandError):
+            call_command('export_archive', self.directory.name, stdout=StringIO())
+
+    def test_import_unknown_column(self):
+        with open(os.path.join(self.directory.name, 'tags.csv'), 'w') as f:
+            f.write('id,name\n1,tag\n')
+        with self.assertRaises(CommandError):
+            call_command('import_archive', self.directory.name, stdout=StringIO())
+
+
+class DeleteHiddenObjectsCommandTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = UserModel.objects.create_user(email='user@sample.sample')
+        self.other_user = UserModel.objects.create_user(email='other@sample.sample')
+        self.post = self.create_post(self.user)
+        self.other_post = self.create_post(self.other_user)
+
+    @staticmethod
+    def create_post(author):
+        post = Post.objects.create(title='sample', content='sample', author=author)
+        post.publish()
+        post.tags.add(Tag.objects.get_or_create(tag='sample')[0])
+        return post
+
+    def add_comment(self, user, post, parent=None):
+        comment = Comment.objects.create(user=user, post=post, parent=parent, text='sample')
+        Post.objects.filter(pk=post.pk).update(comments_count=post.comments.count())
+        if parent is not None:
+            Comment.objects.filter(pk=parent.pk).update(replies_count=parent.replies.count())
+        return comment
+
+    def delete_hidden_objects(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('delete_hidden_objects', once=True, batch_size=2, stdout=StringIO())
+
+    def test_delete_hidden_post(self):
+        comment = self.add_comment(self.other_user, self.post)
+        for _ in range(3):
+            self.add_comment(self.user, self.post, parent=self.add_comment(self.user, self.post, parent=comment))
+        self.other_user.like(self.post)
+        image_name = default_storage.save('posts/sample.jpg', ContentFile(b'image'))
+        Post.objects.filter(pk=self.post.pk).update(primary_image=image_name)
+
+        self.post.hide()
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+        self.delete_hidden_objects()
+
+        self.assertFalse(Post.objects.hidden().exists())
+        self.assertFalse(Comment.objects.filter(post_id=self.post.pk).exists())
+        self.assertFalse(Post.likes.through.objects.filter(post_id=self.post.pk).exists())
+        self.assertEqual(Post.tags.through.objects.get().post_id, self.other_post.pk)
+        self.assertFalse(default_storage.exists(image_name))
+        self.assertTrue(Post.objects.filter(pk=self.other_post.pk).exists())
+
+    def add_reversed_thread(self, user, post):
+        """ Add a thread whose replies have smaller ids than their parents (e.g. an imported archive). """
+        comments = [self.add_comment(user, post) for _ in range(3)]
+        for reply, parent in zip(comments, comments[1:]):
+            Comment.objects.filter(pk=reply.pk).update(parent=parent)
+            Comment.objects.filter(pk=parent.pk).update(replies_count=1)
+        return comments
+
+    def test_delete_hidden_post_replies_first(self):
+        self.add_reversed_thread(self.other_user, self.post)
+
+        self.post.hide()
+        self.delete_hidden_objects()
+
+        self.assertFalse(Post.objects.hidden().exists())
+        self.assertFalse(Comment.objects.filter(post_id=self.post.pk).exists())
+
+    def test_delete_hidden_user(self):
+        # a comment of the user with a reply of the other user, and a reply of the user to the other user
+        comment = self.add_comment(self.user, self.other_post)
+        self.add_comment(self.other_user, self.other_post, parent=comment)
+        other_comment = self.add_comment(self.other_user, self.other_post)
+        self.add_comment(self.user, self.other_post, parent=other_comment)
+        self.add_comment(self.other_user, self.other_post, parent=other_comment)
+        self.user.like(self.other_post)
+        self.other_user.like(self.post)
+        avatar_name = default_storage.save('users/avatar.jpg', ContentFile(b'image'))
+        UserModel.objects.filter(pk=self.user.pk).update(avatar=avatar_name)
+
+        self.user.hide()
+        self.assertFalse(UserModel.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+        self.delete_hidden_objects()
+
+        self.assertFalse(UserModel.objects.hidden().exists())
+        self.assertFalse(Post.objects.hidden().exists())
+        self.assertFalse(default_storage.exists(avatar_name))
+        self.assertFalse(Post.likes.through.objects.exists())
+
+        self.other_post.refresh_from_db()
+        self.assertEqual(self.other_post.likes_count, 0)
+        self.assertEqual(self.other_post.comments_count, 2)
+        other_comment.refresh_from_db()
+        self.assertEqual(other_comment.replies_count, 1)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_delete_hidden_user_replies_first(self):
+        comments = self.add_reversed_thread(self.other_user, self.other_post)
+        Comment.objects.filter(pk=comments[-1].pk).update(user=self.user)
+
+        self.user.hide()
+        self.delete_hidden_objects()
+
+        self.assertFalse(UserModel.objects.hidden().exists())
+        self.assertFalse(Comment.objects.exists())
+        self.other_post.refresh_from_db()
+        self.assertEqual(self.other_post.comments_count, 0)
+
+
+class BenchmarkConcurrencyCommandTest(TransactionTestCase):
+    def test_benchmark_concurrency(self):
+        call_command('generate_dataset', users=3, posts=5, tags=2, max_comments=3, stdout=StringIO())
+        out = StringIO()
+        call_command(
+            'benchmark_concurrency', endpoints=['search', 'comment_list'],
+            concurrency=[2], requests=4, workers=1, stdout=out,
+        )
+
+        # the pool stats are written after the results if the database backend is pooled
+        lines = [line for line in out.getvalue().splitlines() if not line.startswith('pool ')]
+        self.assertEqual(len(lines), 4)
+        self.assertIn('asgi concurrency 2', lines[1])
+
+    def test_benchmark_urlconf(self):
+        urls = [reverse('posts:latest'), reverse('posts:search') + '?q=sample']
+        for async_views in (False, True):
+            urlconf = get_benchmark_urlconf(urls, async_views=async_views)
+            routes = [str(pattern.pattern) for pattern in urlconf.urlpatterns]
+            self.assertEqual(routes, ['posts/latest/', 'posts/search/'])
+            for pattern in urlconf.urlpatterns:
+                self.assertIs(asyncio.iscoroutinefunction(pattern.callback), async_views)
+
+
+class MeasureStartupCommandTest(TestCase):
+    def test_measure_process(self):
+        out = StringIO()
+        call_command('measure_startup', process='warm', stdout=out)
+
+        result = json.loads(out.getvalue())
+        self.assertEqual(
+            set(result),
+            {'application', 'urls', 'serializers', 'databases', 'first requests', 'second requests', 'requests'},
+        )
+
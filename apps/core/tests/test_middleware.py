@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.core.instrumentation import fingerprint
+from apps.posts.models import Post
+
+UserModel = get_user_model()
+
+
+class QueryInstrumentationMiddlewareTest(TestCase):
+    def setUp(self):
+        self.user = UserModel.objects.create_user(email='sample@sample.sample')
+        self.post = Post.objects.create(title='sample', content='sample', author=self.user)
+        self.post.publish()
+
+    def test_fingerprint(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "t"\n WHERE "id" IN (%s, %s,%s) AND "a" = %s'),
+            fingerprint('SELECT * FROM "t" WHERE "id" IN (%s) AND "a" = %s'),
+        )
+
+    @override_settings(DEBUG=True, QUERY_INSTRUMENTATION=True)
+    def test_query_headers(self):
+        self.client.force_login(self.user)
+        with self.assertLogs('apps.core.middleware', 'DEBUG') as logs:
+            response = self.client.get(reverse('users:profile', kwargs={'username': self.user.username}))
+
+        self.assertGreater(int(response['X-DB-Query-Count']), 0)
+        self.assertGreaterEqual(float(response['X-DB-Time']), 0)
+        self.assertEqual(response['X-DB-Duplicate-Queries'], '0')
+        self.assertIn('queries in', logs.output[0])
+
+    @override_settings(DEBUG=False, QUERY_INSTRUMENTATION=True)
+    def test_no_query_headers_without_debug(self):
+        response = self.client.get(reverse('posts:latest'))
+        self.assertNotIn('X-DB-Query-Count', response)
+
+    @override_settings(QUERY_INSTRUMENTATION=False)
+    def test_disabled(self):
+        response = self.client.get(reverse('posts:latest'))
+        self.assertNotIn('X-DB-Query-Count', response)
@@ -0,0 +1,151 @@
+from functools import partial
+
+from django.db import OperationalError, connection
+from django.test import TestCase
+
+from apps.core.db.backends.postgresql_pool.base import DatabaseWrapper, create_connection
+from apps.core.db.backends.postgresql_pool.pool import ConnectionPool, PoolTimeout
+
+
+class ConnectionPoolTest(TestCase):
+    def setUp(self):
+        self.pools = []
+
+    def tearDown(self):
+        # close the connections which are still taken too, the test database can't be dropped with them
+        for pool in self.pools:
+            for conn in list(pool._created_at):
+                conn.close()
+
+    def get_pool(self, **options):
+        pool = ConnectionPool(partial(create_connection, connection.get_connection_params()), **options)
+        self.pools.append(pool)
+        return pool
+
+    def test_reuse_connection(self):
+        pool = self.get_pool()
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.assertIs(pool.getconn(), conn)
+
+        stats = pool.stats()
+        self.assertEqual(stats['connections_created'], 1)
+        self.assertEqual(stats['checkouts'], 2)
+        self.assertEqual(stats['in_use'], 1)
+
+    def test_bounded_size(self):
+        pool = self.get_pool(max_size=1, timeout=0.05)
+        conn = pool.getconn()
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+        pool.putconn(conn)
+        self.assertIs(pool.getconn(), conn)
+
+    def test_rollback_returned_connection(self):
+        pool = self.get_pool()
+        conn = pool.getconn()
+        with conn.cursor() as cursor:
+            cursor.execute('CREATE TEMPORARY TABLE pool_test (id int)')
+        pool.putconn(conn)
+
+        conn = pool.getconn()
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('pool_test')")
+            self.assertIsNone(cursor.fetchone()[0])
+
+    def test_reset_returned_connection(self):
+        pool = self.get_pool()
+        conn = pool.getconn()
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute("SET statement_timeout = '1s'")
+            cursor.execute('CREATE TEMPORARY TABLE pool_test (id int)')
+        pool.putconn(conn)
+
+        conn = pool.getconn()
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('pool_test')")
+            self.assertIsNone(cursor.fetchone()[0])
+            cursor.execute('SHOW statement_timeout')
+            self.assertEqual(cursor.fetchone()[0], '0')
+
+    def test_health_check(self):
+        pool = self.get_pool()
+        conn = pool.getconn()
+        pool.putconn(conn)
+        # the idle connection is closed by the server
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [conn.info.backend_pid])
+
+        self.assertIsNot(pool.getconn(), conn)
+        stats = pool.stats()
+        self.assertEqual(stats['health_check_failures'], 1)
+        self.assertEqual(stats['size'], 1)
+
+    def test_reap_idle_connections(self):
+        pool = self.get_pool(max_idle=0)
+        conn = pool.getconn()
+        pool.putconn(conn)
+
+        self.assertIsNot(pool.getconn(), conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()['connections_closed'], 1)
+
+    def test_expired_connection(self):
+        pool = self.get_pool(max_lifetime=0)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+
+
+class PooledDatabaseWrapperTest(TestCase):
+    def get_wrapper(self, name, **pool):
+        settings_dict = {
+            **connection.settings_dict,
+            'ENGINE': 'apps.core.db.backends.postgresql_pool',
+            # the connection parameters are a part of the pool key
+            'OPTIONS': {**connection.settings_dict['OPTIONS'], 'application_name': name},
+            'POOL': pool,
+        }
+        wrapper = DatabaseWrapper(settings_dict, alias=connection.alias)
+        self.addCleanup(wrapper.pool.close_idle)
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_close_returns_connection(self):
+        wrapper = self.get_wrapper('pool_test')
+        for _ in range(3):
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            wrapper.close()
+
+        stats = wrapper.pool.stats()
+        self.assertEqual(stats['connections_created'], 1)
+        self.assertEqual(stats['checkouts'], 3)
+        self.assertEqual(stats['idle'], 1)
+
+    def test_close_without_autocommit(self):
+        wrapper = self.get_wrapper('pool_autocommit_test', MAX_SIZE=1, TIMEOUT=0.05)
+        wrapper.ensure_connection()
+        wrapper.set_autocommit(False)
+        wrapper.close()
+
+        # the health check of the returned connection doesn't leave it in a transaction
+        for _ in range(2):
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            self.assertTrue(wrapper.get_autocommit())
+            wrapper.close()
+        self.assertEqual(wrapper.pool.stats()['size'], 1)
+
+    def test_pool_timeout(self):
+        wrapper = self.get_wrapper('pool_timeout_test', MAX_SIZE=1, TIMEOUT=0.05)
+        other = self.get_wrapper('pool_timeout_test', MAX_SIZE=1, TIMEOUT=0.05)
+        wrapper.ensure_connection()
+
+        with self.assertRaises(OperationalError) as cm:
+            other.ensure_connection()
+        self.assertIsInstance(cm.exception.__cause__, PoolTimeout)
@@ -0,0 +1,53 @@
+import os
+import runpy
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from apps.core.projections import get_serializer_projection
+from apps.core.warmup import build_serializers, get_view_classes, resolve_urls, warm_up
+from apps.posts.serializers import PostListSerializer
+from apps.posts.views import LatestPostListView, PostRetrieveAPIView
+
+
+class WarmUpTest(SimpleTestCase):
+    def test_get_view_classes(self):
+        view_classes = get_view_classes(resolve_urls().url_patterns)
+        # the async read views keep the view class
+        self.assertIn(LatestPostListView, view_classes)
+        self.assertIn(PostRetrieveAPIView, view_classes)
+        self.assertEqual(len(view_classes), len(set(view_classes)))
+
+    def test_build_serializers(self):
+        get_serializer_projection.cache_clear()
+        self.assertGreater(build_serializers(resolve_urls().url_patterns), 0)
+        # the projections of the list views are cached
+        get_serializer_projection(PostListSerializer)
+        self.assertGreater(get_serializer_projection.cache_info().hits, 0)
+
+    def test_warm_up_without_connections(self):
+        self.assertEqual(set(warm_up(connect=False)), {'urls', 'serializers'})
+
+
+class GunicornConfigTest(SimpleTestCase):
+    path = os.path.join(settings.BASE_DIR, 'config', 'gunicorn.py')
+
+    def load_config(self, **environ):
+        with mock.patch.dict(os.environ, environ), mock.patch('multiprocessing.cpu_count', return_value=2):
+            return runpy.run_path(self.path)
+
+    def test_wsgi_workers(self):
+        config = self.load_config(SERVER_INTERFACE='wsgi')
+        self.assertTrue(config['preload_app'])
+        self.assertEqual(config['workers'], 5)
+        self.assertEqual(config['worker_class'], 'gthread')
+
+        config = self.load_config(SERVER_INTERFACE='wsgi', GUNICORN_WORKERS='3', GUNICORN_THREADS='1')
+        self.assertEqual(config['workers'], 3)
+        self.assertEqual(config['worker_class'], 'sync')
+
+    def test_asgi_workers(self):
+        config = self.load_config(SERVER_INTERFACE='asgi')
+        self.assertEqual(config['workers'], 3)
+        self.assertEqual(config['worker_class'], 'uvicorn.workers.UvicornWorker')
@@ -0,0 +1,98 @@
+"""
+Warm up a server process before it accepts the requests, so the first requests of each worker
+don't pay for the url patterns compilation, the serializer fields construction and the database connections.
+"""
+import time
+
+from django.db import connections
+from django.urls import URLPattern, URLResolver, get_resolver
+
+from apps.core.projections import SerializerProjectionMixin, get_serializer_projection
+
+
+def iter_url_patterns(patterns):
+    """ Yield the url patterns of the given patterns and their included patterns. """
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_url_patterns(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            yield pattern
+
+
+def get_view_classes(patterns):
+    """ Return the class based views of the given url patterns. """
+    view_classes = []
+    for pattern in iter_url_patterns(patterns):
+        # `as_view()` of rest framework sets `cls` and of django sets `view_class`
+        view_class = getattr(pattern.callback, 'cls', None) or getattr(pattern.callback, 'view_class', None)
+        if view_class is not None and view_class not in view_classes:
+            view_classes.append(view_class)
+    return view_classes
+
+
+def resolve_urls():
+    """ Compile the regexes of all url patterns and build the reverse lookups of the root resolver. """
+    resolver = get_resolver()
+
+    def compile_patterns(patterns):
+        for pattern in patterns:
+            # the regexes are compiled lazily on the first access
+            pattern.pattern.regex
+            if isinstance(pattern, URLResolver):
+                compile_patterns(pattern.url_patterns)
+
+    compile_patterns(resolver.url_patterns)
+    resolver.reverse_dict
+    return resolver
+
+
+def build_serializers(patterns):
+    """
+    Construct the serializer fields of the views and cache the projections of the views which use them.
+    Return the number of the serializer classes.
+    """
+    serializer_classes = set()
+    for view_class in get_view_classes(patterns):
+        serializer_class = getattr(view_class, 'serializer_class', None)
+        if serializer_class is None:
+            continue
+
+        serializer_class().fields
+        if issubclass(view_class, SerializerProjectionMixin):
+            get_serializer_projection(serializer_class)
+        serializer_classes.add(serializer_class)
+    return len(serializer_classes)
+
+
+def connect_databases():
+    """
+    Open the connections of the current thread to the databases which keep their connections
+    (`CONN_MAX_AGE` isn't 0) or return them to a pool, the other connections are closed
+    at the start of the first request anyway.
+    """
+    for connection in connections.all():
+        if connection.settings_dict['CONN_MAX_AGE'] != 0 or hasattr(connection, 'pool'):
+            connection.ensure_connection()
+
+
+def warm_up(connect=True):
+    """
+    Resolve the url patterns, build the serializers and (if `connect` is True) open the database connections.
+    Return the duration (in milliseconds) of each step.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    resolver = resolve_urls()
+    timings['urls'] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    build_serializers(resolver.url_patterns)
+    timings['serializers'] = (time.perf_counter() - start) * 1000
+
+    if connect:
+        start = time.perf_counter()
+        connect_databases()
+        timings['databases'] = (time.perf_counter() - start) * 1000
+
+    return timings
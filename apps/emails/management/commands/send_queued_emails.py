@@ -0,0 +1,56 @@
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from apps.emails.models import OutboxEmail
+
+
+class Command(BaseCommand):
+    help = 'Send the queued emails in batches over a single email connection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Number of emails sent in each transaction.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=settings.EMAIL_OUTBOX_POLL_INTERVAL,
+            help='Seconds to wait before checking the outbox again when it is empty.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when there is no due email instead of waiting for new ones.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        connection = None
+        try:
+            while True:
+                purged = OutboxEmail.objects.purge_failed()
+                if purged:
+                    self.stdout.write(f'{purged} failed or expired emails deleted.')
+
+                if not OutboxEmail.objects.due().exists():
+                    # don't keep the email connection open while the outbox is empty
+                    if connection is not None:
+                        connection.close()
+                        connection = None
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+
+                if connection is None:
+                    connection = get_connection()
+                    connection.open()
+
+                sent, failed = OutboxEmail.objects.send_batch(connection, batch_size)
+                self.stdout.write(f'{sent} emails sent, {failed} failed.')
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if connection is not None:
+                connection.close()
@@ -0,0 +1,107 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.db.models import Manager, Q, QuerySet
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxEmailQueryset(QuerySet):
+    def due(self):
+        """ Emails which are waiting to be sent, have attempts left and haven't expired. """
+        now = timezone.now()
+        return self.filter(
+            Q(expires_at__isnull=True) | Q(expires_at__gt=now),
+            next_attempt_at__lte=now,
+            attempts__lt=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+        )
+
+    def failed(self):
+        """ Emails which couldn't be sent in any of the allowed attempts or before they expired. """
+        return self.filter(
+            Q(attempts__gte=settings.EMAIL_OUTBOX_MAX_ATTEMPTS) | Q(expires_at__lte=timezone.now()),
+        )
+
+
+class OutboxEmailManager(Manager.from_queryset(OutboxEmailQueryset)):
+    def enqueue(self, to, subject, body, expires_in=None):
+        """
+        Queue an email to be sent by the `send_queued_emails` worker.
+        The email isn't sent (or retried) after `expires_in` seconds, e.g. when the code it contains has expired.
+        """
+        expires_at = None
+        if expires_in is not None:
+            expires_at = timezone.now() + timedelta(seconds=expires_in)
+        return self.create(to=to, subject=subject, body=body, expires_at=expires_at)
+
+    def purge_failed(self):
+        """
+        Delete the emails which failed permanently or expired, their bodies may contain
+        the verification codes. Return the number of the deleted emails.
+        """
+        deleted, _ = self.failed().delete()
+        return deleted
+
+    def claim_batch(self, batch_size):
+        """
+        Claim up to `batch_size` due emails, which aren't due for the other workers
+        until `EMAIL_OUTBOX_LEASE` seconds pass (e.g. if this worker dies while sending them).
+        """
+        with transaction.atomic():
+            # skip the emails which are being claimed by other workers
+            emails = list(
+                self.due().select_for_update(skip_locked=True).order_by('next_attempt_at', 'id')[:batch_size]
+            )
+            if emails:
+                lease_expires_at = timezone.now() + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+                self.filter(pk__in=[email.pk for email in emails]).update(next_attempt_at=lease_expires_at)
+        return emails
+
+    def send_batch(self, connection, batch_size):
+        """
+        Send up to `batch_size` due emails over the given (open) email connection.
+        The emails are claimed in a short transaction and sent outside of it, so no lock is held
+        while the email server responds. Sent emails are removed from the outbox and failed ones
+        are retried later with an exponential backoff, the connection is reopened after a failure.
+        Return a tuple of (sent, failed) counts.
+        """
+        sent = failed = 0
+        sent_ids = []
+        for email in self.claim_batch(batch_size):
+            message = EmailMessage(email.subject, email.body, to=[email.to], connection=connection)
+            try:
+                message.send()
+            except Exception as e:
+                logger.warning('Sending email %s to %s failed: %s', email.pk, email.to, e)
+                self._retry_later(email, e)
+                failed += 1
+                # the connection may be broken, the next emails are sent over a new one
+                self._reopen(connection)
+            else:
+                sent_ids.append(email.pk)
+                sent += 1
+
+        if sent_ids:
+            self.filter(pk__in=sent_ids).delete()
+        return sent, failed
+
+    @staticmethod
+    def _retry_later(email, error):
+        email.attempts += 1
+        email.last_error = str(error)
+        delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (email.attempts - 1)
+        email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        email.save(update_fields=['attempts', 'last_error', 'next_attempt_at'])
+
+    @staticmethod
+    def _reopen(connection):
+        try:
+            connection.close()
+            connection.open()
+        except Exception as e:
+            # the next send opens the connection again
+            logger.warning('Reopening the email connection failed: %s', e)
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.3 on 2026-10-18 10:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emails', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxemail',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='expires at'),
+        ),
+    ]
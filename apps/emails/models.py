@@ -0,0 +1,27 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from apps.emails.managers import OutboxEmailManager
+
+
+class OutboxEmail(models.Model):
+    """ An email which is waiting to be sent by the `send_queued_emails` worker. """
+    to = models.EmailField(_('to'))
+    subject = models.CharField(_('subject'), max_length=255)
+    body = models.TextField(_('body'))
+    attempts = models.PositiveSmallIntegerField(_('attempts'), default=0)
+    last_error = models.TextField(_('last error'), blank=True)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    next_attempt_at = models.DateTimeField(_('next attempt at'), default=timezone.now)
+    expires_at = models.DateTimeField(_('expires at'), null=True, blank=True)
+
+    objects = OutboxEmailManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_attempt_at', 'id'], name='outbox_email_due_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} to {self.to}'
@@ -0,0 +1,119 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.emails.models import OutboxEmail
+
+
+class CountingEmailBackend(EmailBackend):
+    """ Locmem backend which counts the opened connections. """
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return True
+
+
+class FailingEmailBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError('SMTP server is down.')
+
+
+class FlakyEmailBackend(CountingEmailBackend):
+    """ Counting backend whose first send fails, e.g. because the server dropped the connection. """
+    failures = 0
+
+    def send_messages(self, messages):
+        if FlakyEmailBackend.failures < 1:
+            FlakyEmailBackend.failures += 1
+            raise ConnectionError('Connection unexpectedly closed.')
+        return super().send_messages(messages)
+
+
+class SendQueuedEmailsCommandTest(TestCase):
+    def setUp(self):
+        for i in range(5):
+            OutboxEmail.objects.enqueue(f'user{i}@sample.sample', 'subject', f'body {i}')
+
+    @override_settings(EMAIL_BACKEND='apps.emails.tests.test_commands.CountingEmailBackend')
+    def test_send_queued_emails(self):
+        CountingEmailBackend.opened = 0
+        call_command('send_queued_emails', once=True, batch_size=2, stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(mail.outbox[0].to, ['user0@sample.sample'])
+        self.assertEqual(mail.outbox[0].body, 'body 0')
+        # all the batches are sent over one connection
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_not_due_emails_are_not_sent(self):
+        OutboxEmail.objects.update(next_attempt_at=timezone.now() + timedelta(minutes=1))
+        call_command('send_queued_emails', once=True, stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxEmail.objects.count(), 5)
+
+    @override_settings(
+        EMAIL_BACKEND='apps.emails.tests.test_commands.FailingEmailBackend',
+        EMAIL_OUTBOX_MAX_ATTEMPTS=2,
+        EMAIL_OUTBOX_RETRY_DELAY=0,
+    )
+    def test_failed_emails_are_retried(self):
+        OutboxEmail.objects.send_batch(get_connection(), batch_size=5)
+        email = OutboxEmail.objects.first()
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.last_error, 'SMTP server is down.')
+
+        out = StringIO()
+        call_command('send_queued_emails', once=True, stdout=out)
+        # every email was tried until no attempt was left, then it was deleted
+        self.assertEqual(out.getvalue().count('0 emails sent, 5 failed.'), 1)
+        self.assertIn('5 failed or expired emails deleted.', out.getvalue())
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    @override_settings(
+        EMAIL_BACKEND='apps.emails.tests.test_commands.FailingEmailBackend',
+        EMAIL_OUTBOX_RETRY_DELAY=60,
+    )
+    def test_failed_emails_wait_before_retry(self):
+        call_command('send_queued_emails', once=True, stdout=StringIO())
+
+        self.assertFalse(OutboxEmail.objects.due().exists())
+        self.assertTrue(OutboxEmail.objects.filter(attempts=1, next_attempt_at__gt=timezone.now()).exists())
+
+    @override_settings(EMAIL_BACKEND='apps.emails.tests.test_commands.FlakyEmailBackend')
+    def test_connection_is_reopened_after_failure(self):
+        CountingEmailBackend.opened = FlakyEmailBackend.failures = 0
+        call_command('send_queued_emails', once=True, batch_size=5, stdout=StringIO())
+
+        # the emails after the failed one are sent over a new connection in the same batch
+        self.assertEqual(CountingEmailBackend.opened, 2)
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertEqual(OutboxEmail.objects.get().attempts, 1)
+
+    def test_expired_emails_are_not_sent(self):
+        OutboxEmail.objects.all().delete()
+        OutboxEmail.objects.enqueue('user@sample.sample', 'subject', 'body', expires_in=60)
+        expired = OutboxEmail.objects.enqueue('expired@sample.sample', 'subject', 'body', expires_in=60)
+        OutboxEmail.objects.filter(pk=expired.pk).update(expires_at=timezone.now())
+        call_command('send_queued_emails', once=True, stdout=StringIO())
+
+        self.assertEqual([message.to for message in mail.outbox], [['user@sample.sample']])
+        # the expired email is deleted with its code
+        self.assertFalse(OutboxEmail.objects.filter(pk=expired.pk).exists())
+
+    @override_settings(EMAIL_OUTBOX_LEASE=60)
+    def test_claimed_emails_are_leased(self):
+        emails = OutboxEmail.objects.claim_batch(2)
+
+        self.assertEqual(len(emails), 2)
+        # the claimed emails aren't claimed by the other workers until the lease expires
+        self.assertEqual(OutboxEmail.objects.due().count(), 3)
+        self.assertNotIn(emails[0], OutboxEmail.objects.claim_batch(5))
@@ -0,0 +1,154 @@
+import hashlib
+import time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class LatestFeedCache:
+    """
+    Cache of the serialized latest posts feed pages for anonymous users.
+
+    The pages are stored under a feed version, so invalidating the feed
+    only replaces the version and every stored page is left to expire.
+    Hits and misses are counted in the cache to measure the hit ratio.
+    """
+    key_prefix = 'posts:latest'
+    cacheable_params = {'cursor', 'page', 'page_size'}
+
+    def get_key(self, *parts):
+        return ':'.join((self.key_prefix,) + parts)
+
+    def get_version(self):
+        key = self.get_key('version')
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid4().hex, None)
+            version = cache.get(key)
+        return version
+
+    def get_page_key(self, request):
+        url_hash = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        return self.get_key(self.get_version(), 'page', url_hash)
+
+    def is_cacheable(self, request):
+        """ Only anonymous pages without extra query params are cached. """
+        return request.user.is_anonymous and set(request.query_params) <= self.cacheable_params
+
+    def get(self, request):
+        """ Return the cached page data for the given request, or None. """
+        data = cache.get(self.get_page_key(request))
+        self.count('hits' if data is not None else 'misses')
+        return data
+
+    def set(self, request, data):
+        cache.set(self.get_page_key(request), data, settings.LATEST_FEED_CACHE_TTL)
+
+    def invalidate(self):
+        """ Invalidate all cached pages. """
+        cache.set(self.get_key('version'), uuid4().hex, None)
+
+    def count(self, counter):
+        key = self.get_key(counter)
+        if not cache.add(key, 1, None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                # the counter has been evicted right now
+                cache.set(key, 1, None)
+
+    def get_stats(self):
+        hits = cache.get(self.get_key('hits'), 0)
+        misses = cache.get(self.get_key('misses'), 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / total if total else 0,
+        }
+
+    def reset_stats(self):
+        cache.delete_many([self.get_key('hits'), self.get_key('misses')])
+
+
+latest_feed_cache = LatestFeedCache()
+
+
+class PostDetailCache:
+    """
+    Cache of the rendered post details for anonymous users.
+
+    The entries are stored by the post hash (the end of the slug), so the post can be
+    invalidated where only its hash is known. The entry keeps the rendered JSON and
+    the validators of the response, so the hits don't touch the database at all.
+
+    When an entry is missing, only one request builds it and the other requests wait
+    for it up to `POST_DETAIL_CACHE_LOCK_WAIT` seconds, then they build it themselves
+    (without storing it), so a slow build doesn't hold them for long. An entry which
+    was built during an invalidation may be stale, which is limited by
+    `POST_DETAIL_CACHE_TTL`.
+    """
+    key_prefix = 'posts:detail'
+    # seconds between the checks of a waiting request for the entry which is being built
+    poll_interval = 0.05
+
+    def get_key(self, post_hash):
+        return f'{self.key_prefix}:{post_hash}'
+
+    @staticmethod
+    def get_hash(slug):
+        """ Return the post hash of the given slug. """
+        return slug.rsplit('-', 1)[-1]
+
+    def is_cacheable(self, request):
+        """ Only the anonymous JSON responses without query params are cached. """
+        return (
+            request.user.is_anonymous and
+            not request.query_params and
+            request.accepted_media_type == 'application/json'
+        )
+
+    def get(self, slug):
+        entry = cache.get(self.get_key(self.get_hash(slug)))
+        # the slug is changed when the post raw slug is changed
+        if entry is not None and entry['slug'] == slug:
+            return entry
+        return None
+
+    def get_or_build(self, slug, build):
+        """
+        Return a tuple of (entry, hit). The build function is called to build the missing
+        entry, only by one of the concurrent requests for the same post.
+        """
+        entry = self.get(slug)
+        if entry is not None:
+            return entry, True
+
+        key = self.get_key(self.get_hash(slug))
+        lock_key = f'{key}:lock'
+        if not cache.add(lock_key, 1, settings.POST_DETAIL_CACHE_LOCK_TIMEOUT):
+            # another request is building the entry
+            deadline = time.monotonic() + settings.POST_DETAIL_CACHE_LOCK_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                entry = self.get(slug)
+                if entry is not None:
+                    return entry, True
+                if cache.get(lock_key) is None:
+                    # the build failed, e.g. there is no such post
+                    break
+            return build(), False
+
+        try:
+            entry = build()
+            cache.set(key, entry, settings.POST_DETAIL_CACHE_TTL)
+        finally:
+            cache.delete(lock_key)
+        return entry, False
+
+    def invalidate(self, *post_hashes):
+        cache.delete_many([self.get_key(post_hash) for post_hash in post_hashes])
+
+
+post_detail_cache = PostDetailCache()
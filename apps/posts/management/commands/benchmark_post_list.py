@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.core.benchmark import benchmark_environment, measure
+from apps.core.renderers import FastJSONRenderer
+from apps.posts.models import Post
+from apps.posts.serializers import PostListSerializer, PostListValuesSerializer
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare rendering a page of the posts list by the model serializer and by the `.values()` rows. '
+        'The benchmark data is rolled back at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size', type=int, default=100,
+            help='Number of posts in the rendered page.',
+        )
+        parser.add_argument(
+            '--repeats', type=int, default=50,
+            help='Number of measured renders of each mode.',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=5,
+            help='Number of renders of each mode before measuring.',
+        )
+
+    def handle(self, *args, **options):
+        page_size = options['page_size']
+
+        with benchmark_environment():
+            self.create_posts(page_size)
+            request = Request(APIRequestFactory().get('/posts/latest/'))
+            context = {'request': request}
+            queryset = Post.objects.latest().select_related('author').order_by('-published_at', '-id')
+
+            def render_serializer():
+                data = PostListSerializer(queryset[:page_size], many=True, context=context).data
+                return JSONRenderer().render(data)
+
+            values_serializer = PostListValuesSerializer(context=context)
+
+            def render_values():
+                data = values_serializer.to_representation(values_serializer.get_values(queryset)[:page_size])
+                return FastJSONRenderer().render(data)
+
+            if render_serializer() != render_values():
+                self.stderr.write(self.style.ERROR('The rendered pages are not the same.'))
+
+            results = {}
+            for name, func in (('serializer', render_serializer), ('values', render_values)):
+                results[name] = result = measure(func, requests=options['repeats'], warmup=options['warmup'])
+                self.stdout.write(
+                    f'{name:<10} mean: {result["mean"]:.2f}ms, p50: {result["p50"]:.2f}ms, '
+                    f'p95: {result["p95"]:.2f}ms, queries: {result["queries"]:.1f}'
+                )
+
+        speedup = results['serializer']['mean'] / results['values']['mean']
+        self.stdout.write(self.style.SUCCESS(f'The values rendering is {speedup:.1f}x faster.'))
+
+    @staticmethod
+    def create_posts(count):
+        authors = [
+            UserModel.objects.create_user(email=f'post-list-benchmark-{i}@benchmark.localhost')
+            for i in range(10)
+        ]
+        now = timezone.now()
+        posts = []
+        for i in range(count):
+            post = Post(
+                title=f'Benchmark post {i}', description='description', content='content ' * 200,
+                author=authors[i % len(authors)], is_draft=False, published_at=now,
+            )
+            post.raw_slug = post.title
+            post.slug = f'{post.raw_slug}-{post.hash}'
+            posts.append(post)
+        Post.objects.bulk_create(posts)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.posts.cache import latest_feed_cache
+
+
+class Command(BaseCommand):
+    help = 'Show the hit and miss counters of the latest posts feed cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Reset the counters after showing them.',
+        )
+
+    def handle(self, *args, **options):
+        stats = latest_feed_cache.get_stats()
+        self.stdout.write(
+            f'hits: {stats["hits"]}, misses: {stats["misses"]}, hit ratio: {stats["hit_ratio"]:.2%}'
+        )
+
+        if options['reset']:
+            latest_feed_cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Counters were reset.'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from apps.posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Build the search document of existing posts in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of posts updated in each query.',
+        )
+        parser.add_argument(
+            '--missing-only', action='store_true',
+            help='Only update the posts which have no search document.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Post.objects.order_by('pk')
+        if options['missing_only']:
+            queryset = queryset.filter(search_vector__isnull=True)
+
+        last_pk = 0
+        updated = 0
+        while True:
+            pks = list(queryset.filter(pk__gt=last_pk).values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+
+            updated += Post.objects.filter(pk__in=pks).update_search_vector()
+            last_pk = pks[-1]
+            self.stdout.write(f'{updated} posts updated.')
+
+        self.stdout.write(self.style.SUCCESS(f'Search document of {updated} posts was built.'))
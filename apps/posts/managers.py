@@ -1,25 +1,235 @@
+import os
 from datetime import timedelta
+from functools import partial
 
-from django.db.models import Manager, Q, QuerySet
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections, transaction
+from django.db.models import F, FloatField, Manager, QuerySet
+from django.db.models.functions import Cast
 from django.utils import timezone
 
+from apps.core.deletion import delete_in_batches
+from apps.posts.cache import latest_feed_cache, post_detail_cache
+
+# posts published in this period are listed in the latest posts
+LATEST_POSTS_PERIOD = timedelta(days=30)
+
+
+def post_search_vector():
+    """
+    Weighted search document of a post.
+    Title has the highest weight, then description and then content.
+    """
+    config = settings.POST_SEARCH_CONFIG
+    return (
+        SearchVector('title', weight='A', config=config) +
+        SearchVector('description', weight='B', config=config) +
+        SearchVector('content', weight='C', config=config)
+    )
+
 
 class PostQueryset(QuerySet):
     def latest(self):
         """ List of posts published in the last month. """
-        last_month = timezone.now() - timedelta(days=30)
+        last_month = timezone.now() - LATEST_POSTS_PERIOD
         return self.filter(published_at__gte=last_month, is_draft=False)
 
     def search(self, query):
         """
         Search the given string (query) in title, description and content fields.
+        Results are ordered by relevance. The rank is a double precision number (unlike the real
+        number of `ts_rank`), so the rank of a cursor is compared to the ranks exactly.
         """
-        return self.filter(
-            Q(title__icontains=query) | Q(title__trigram_word_similar=query) |
-            Q(description__icontains=query) | Q(description__trigram_word_similar=query) |
-            Q(content__icontains=query) | Q(content__trigram_word_similar=query)
-        )
+        if not query:
+            return self.none()
+
+        search_query = SearchQuery(query, config=settings.POST_SEARCH_CONFIG, search_type='websearch')
+        return self \
+            .filter(search_vector=search_query) \
+            .annotate(rank=Cast(SearchRank(F('search_vector'), search_query), FloatField())) \
+            .order_by('-rank', '-id')
+
+    def touch(self):
+        """ Mark the posts as updated, e.g. when their tags are changed. """
+        return self.update(updated_at=timezone.now())
+
+    def update_search_vector(self):
+        """ Rebuild the search document of the posts. """
+        return self.update(search_vector=post_search_vector())
 
 
 class PostManager(Manager.from_queryset(PostQueryset)):
-    pass
+    # The like row and the likes count are changed in one statement, and the
+    # count is changed only if the like row was inserted or deleted.
+    add_like_sql = """
+        WITH changed AS (
+            INSERT INTO {likes_table} ({post_column}, {user_column}) VALUES (%s, %s)
+            ON CONFLICT DO NOTHING
+            RETURNING 1
+        )
+        UPDATE {posts_table} SET likes_count = likes_count + 1, updated_at = %s
+        WHERE id = %s AND EXISTS (SELECT 1 FROM changed)
+        RETURNING likes_count, updated_at
+    """
+    remove_like_sql = """
+        WITH changed AS (
+            DELETE FROM {likes_table} WHERE {post_column} = %s AND {user_column} = %s
+            RETURNING 1
+        )
+        UPDATE {posts_table} SET likes_count = likes_count - 1, updated_at = %s
+        WHERE id = %s AND EXISTS (SELECT 1 FROM changed)
+        RETURNING likes_count, updated_at
+    """
+    # A batch of the likes of a user are deleted and the likes count of their posts are decreased.
+    delete_user_likes_sql = """
+        WITH deleted AS (
+            DELETE FROM {likes_table} WHERE id IN (
+                SELECT id FROM {likes_table} WHERE {user_column} = %s LIMIT %s
+            )
+            RETURNING {post_column} AS post_id
+        )
+        UPDATE {posts_table} p SET likes_count = p.likes_count - d.count, updated_at = %s
+        FROM (SELECT post_id, count(*) AS count FROM deleted GROUP BY post_id) d
+        WHERE p.id = d.post_id
+        RETURNING p.hash
+    """
+
+    def get_queryset(self):
+        # the hidden posts are deleted by the `delete_hidden_objects` worker
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+    def hidden(self):
+        """ Return the hidden posts, which are waiting to be deleted. """
+        return super().get_queryset().filter(deleted_at__isnull=False)
+
+    def delete_hidden(self, post_id, batch_size):
+        """
+        Delete a hidden post with its comments, likes and tags.
+        The dependent rows are deleted by SQL in batches of separate transactions, so a post with
+        many comments isn't loaded into memory or deleted in one long transaction.
+        The post files are deleted after the post is deleted. Return False if the post isn't hidden.
+        """
+        comment_model = self.model._meta.get_field('comments').related_model
+        dependents = (
+            # the replies are deleted before their parents
+            (comment_model._base_manager.filter(post_id=post_id), 'parent'),
+            (self.model.likes.through.objects.filter(post_id=post_id), None),
+            (self.model.tags.through.objects.filter(post_id=post_id), None),
+        )
+        for queryset, parent_field in dependents:
+            delete_in_batches(queryset, batch_size, parent_field)
+
+        with transaction.atomic():
+            post = self.hidden().select_for_update().filter(pk=post_id) \
+                .only('primary_image', 'primary_image_variants').first()
+            if post is None:
+                return False
+
+            # the rows which were added meanwhile
+            for queryset, parent_field in dependents:
+                delete_in_batches(queryset, batch_size, parent_field)
+            delete_in_batches(self.hidden().filter(pk=post_id), batch_size)
+            transaction.on_commit(partial(
+                self.delete_primary_image, post.primary_image.name, post.primary_image_variants,
+            ))
+        return True
+
+    def delete_user_likes(self, user_id, batch_size):
+        """
+        Delete the likes of the given user in batches, the likes count of the liked posts are decreased.
+        Return the number of the changed posts.
+        """
+        connection = connections[self.db]
+        quote_name = connection.ops.quote_name
+        likes_meta = self.model.likes.through._meta
+        sql = self.delete_user_likes_sql.format(
+            likes_table=quote_name(likes_meta.db_table),
+            post_column=quote_name(likes_meta.get_field('post').column),
+            user_column=quote_name(likes_meta.get_field('user').column),
+            posts_table=quote_name(self.model._meta.db_table),
+        )
+
+        changed = 0
+        while True:
+            with transaction.atomic(using=self.db), connection.cursor() as cursor:
+                cursor.execute(sql, [user_id, batch_size, timezone.now()])
+                post_hashes = [row[0] for row in cursor.fetchall()]
+                if not post_hashes:
+                    break
+                transaction.on_commit(partial(post_detail_cache.invalidate, *post_hashes))
+            changed += len(post_hashes)
+        return changed
+
+    def set_primary_image_variants(self, post_id, image_name, variant_paths):
+        """
+        Save the created variants of the post primary image.
+        If the primary image was changed meanwhile, the variants are deleted.
+        """
+        storage = self.model._meta.get_field('primary_image').storage
+        variants = {
+            variant: {
+                image_format: os.path.relpath(variant_path, storage.location)
+                for image_format, variant_path in formats.items()
+            }
+            for variant, formats in variant_paths.items()
+        }
+
+        updated = self.filter(pk=post_id, primary_image=image_name).update(
+            primary_image_variants=variants, updated_at=timezone.now(),
+        )
+        if not updated:
+            self.delete_primary_image_variants(variants)
+            return
+
+        # the post may be listed in the cached latest posts
+        latest_feed_cache.invalidate()
+        post_detail_cache.invalidate(*self.filter(pk=post_id).values_list('hash', flat=True))
+
+    def delete_primary_image(self, name, variants):
+        """ Delete the file of the given primary image and its variants. """
+        if name:
+            self.model._meta.get_field('primary_image').storage.delete(name)
+        self.delete_primary_image_variants(variants)
+
+    def delete_primary_image_variants(self, variants):
+        """ Delete the files of the given primary image variants. """
+        storage = self.model._meta.get_field('primary_image').storage
+        for formats in variants.values():
+            for name in formats.values():
+                storage.delete(name)
+
+    def add_like(self, post, user):
+        """
+        Add the user to the post likes and increase the post likes count.
+        Return True if the post wasn't already liked by the user.
+        """
+        return self._change_like(self.add_like_sql, post, user)
+
+    def remove_like(self, post, user):
+        """
+        Remove the user from the post likes and decrease the post likes count.
+        Return True if the post was liked by the user.
+        """
+        return self._change_like(self.remove_like_sql, post, user)
+
+    def _change_like(self, sql, post, user):
+        connection = connections[self.db]
+        quote_name = connection.ops.quote_name
+        likes_meta = self.model.likes.through._meta
+
+        sql = sql.format(
+            likes_table=quote_name(likes_meta.db_table),
+            post_column=quote_name(likes_meta.get_field('post').column),
+            user_column=quote_name(likes_meta.get_field('user').column),
+            posts_table=quote_name(self.model._meta.db_table),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [post.pk, user.pk, timezone.now(), post.pk])
+            row = cursor.fetchone()
+
+        if row is None:
+            return False
+        post.likes_count, post.updated_at = row
+        transaction.on_commit(partial(post_detail_cache.invalidate, post.hash))
+        return True
@@ -0,0 +1,17 @@
+# Generated by Django 4.0.3 on 2026-10-18 09:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_post_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_draft', False)), fields=['-published_at', '-id'], name='post_published_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.3 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='primary_image_variants',
+            field=models.JSONField(default=dict, editable=False, verbose_name='primary image variants'),
+        ),
+    ]
@@ -1,13 +1,22 @@
 import random
 import string
+from functools import partial
 from os import path
+from uuid import uuid4
 
-from django.db import models
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from rest_framework.exceptions import ValidationError
 
-from apps.posts.managers import PostManager
+from apps.core.models import FileTrackerMixin
+from apps.posts.cache import latest_feed_cache, post_detail_cache
+from apps.posts.managers import LATEST_POSTS_PERIOD, PostManager
+from apps.utils.images import create_image_variants
+from apps.utils.tasks import run_in_background, run_in_process_pool
 
 
 def post_primary_image_upload_path(instance, filename):
@@ -20,7 +29,7 @@ def gen_hash():
     return ''.join(random.sample(string.digits + string.ascii_letters, 12))
 
 
-class Post(models.Model):
+class Post(FileTrackerMixin, models.Model):
     is_draft = models.BooleanField(_('draft'), default=True)
     title = models.CharField(_('title'), max_length=50)
     description = models.CharField(_('description'), max_length=100, blank=True)
@@ -29,6 +38,7 @@ class Post(models.Model):
     slug = models.SlugField(_('slug'), blank=True, allow_unicode=True)
     hash = models.CharField(_('hash'), max_length=15, unique=True, default=gen_hash, editable=False)
     primary_image = models.ImageField(_('primary image'), upload_to=post_primary_image_upload_path, null=True)
+    primary_image_variants = models.JSONField(_('primary image variants'), default=dict, editable=False)
     author = models.ForeignKey(
         'users.User',
         verbose_name=_('author'),
@@ -41,22 +51,114 @@ class Post(models.Model):
     comments_count = models.PositiveSmallIntegerField(_('comments count'), default=0)
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     published_at = models.DateTimeField(_('published at'), null=True)
+    # changed by any change of the post details, e.g. likes count and tags
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    search_vector = SearchVectorField(_('search vector'), null=True, editable=False)
+    # the hidden posts are deleted by the `delete_hidden_objects` worker
+    deleted_at = models.DateTimeField(_('deleted at'), null=True, editable=False)
 
     objects = PostManager()
 
+    # fields which make up the search document
+    search_fields = ('title', 'description', 'content')
+    tracked_file_fields = ('primary_image',)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='post_search_vector_idx'),
+            # keyset pagination of published posts
+            models.Index(
+                fields=['-published_at', '-id'],
+                condition=models.Q(is_draft=False),
+                name='post_published_idx',
+            ),
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(deleted_at__isnull=False),
+                name='post_hidden_idx',
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
-    def save(self, updating_likes_count=False, *args, **kwargs):
-        if not updating_likes_count and not self.is_draft:
+    def save(self, *args, **kwargs):
+        if not self.is_draft:
             # if raw slag was not considered, use title as raw slug
             if not self.raw_slug:
                 self.raw_slug = self.title
 
             # create original slug
             self.slug = self.raw_slug + '-' + self.hash
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields:
+            update_fields = kwargs['update_fields'] = [*update_fields, 'updated_at']
+        update_search_vector = self._search_fields_changed(update_fields)
+
+        # the variants of the old primary image are replaced by the new image variants
+        image_changed = self.file_changed('primary_image', update_fields)
+        # the variants of a removed primary image are removed too
+        image_cleared = self.file_cleared('primary_image', update_fields)
+        if image_changed or image_cleared:
+            old_image_variants = self.__dict__.get('primary_image_variants') or {}
+            self.primary_image_variants = {}
+            if update_fields is not None:
+                kwargs['update_fields'] = [*update_fields, 'primary_image_variants']
+
         super().save(*args, **kwargs)
 
+        if update_search_vector:
+            Post.objects.filter(pk=self.pk).update_search_vector()
+
+        if (image_changed or image_cleared) and old_image_variants:
+            run_in_background(Post.objects.delete_primary_image_variants, old_image_variants)
+        if image_changed:
+            self._create_primary_image_variants()
+        self.update_saved_file_names()
+
+        if self.in_latest_feed():
+            transaction.on_commit(latest_feed_cache.invalidate)
+        if not self.is_draft:
+            transaction.on_commit(partial(post_detail_cache.invalidate, self.hash))
+
+    def delete(self, *args, **kwargs):
+        in_latest_feed = self.in_latest_feed()
+        result = super().delete(*args, **kwargs)
+
+        if in_latest_feed:
+            transaction.on_commit(latest_feed_cache.invalidate)
+        if not self.is_draft:
+            transaction.on_commit(partial(post_detail_cache.invalidate, self.hash))
+        if self.primary_image_variants:
+            run_in_background(Post.objects.delete_primary_image_variants, self.primary_image_variants)
+        return result
+
+    def _create_primary_image_variants(self):
+        """ Create the resized variants of the primary image in the process pool. """
+        # a new suffix for each image, so the variants of the old and new images never have the same name
+        suffix = '-' + uuid4().hex[:8]
+        run_in_process_pool(
+            create_image_variants, self.primary_image.path, settings.POST_IMAGE_VARIANTS, suffix,
+            callback=partial(Post.objects.set_primary_image_variants, self.pk, self.primary_image.name),
+        )
+
+    def in_latest_feed(self):
+        """ Return True if the post may be listed in the latest posts. """
+        if self.is_draft:
+            return False
+        # don't query for the deferred publish date
+        if 'published_at' in self.get_deferred_fields():
+            return True
+        return self.published_at is not None and self.published_at >= timezone.now() - LATEST_POSTS_PERIOD
+
+    def _search_fields_changed(self, update_fields):
+        """ Return True if the save may change any of the search document fields. """
+        if update_fields is None:
+            # deferred fields are not saved, so they can't be changed
+            return bool(set(self.search_fields) - self.get_deferred_fields())
+        return bool(set(self.search_fields) & set(update_fields))
+
     def publish(self):
         """ Publish the post object. """
         if not self.is_draft:
@@ -69,10 +171,22 @@ class Post(models.Model):
 
         self.save(update_fields=['is_draft', 'published_at', 'slug', 'raw_slug'])
 
+    def hide(self):
+        """
+        Hide the post. It's deleted with its comments, likes and tags by the `delete_hidden_objects` worker.
+        """
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['deleted_at'])
+
     def draft(self):
         """ draft the post object. """
         if self.is_draft:
             return
 
+        in_latest_feed = self.in_latest_feed()
         self.is_draft = True
         self.save()
+
+        if in_latest_feed:
+            transaction.on_commit(latest_feed_cache.invalidate)
+        transaction.on_commit(partial(post_detail_cache.invalidate, self.hash))
@@ -1,8 +1,61 @@
+from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
 from apps.posts.models import Post
 from apps.users.serializers import UserDetailsSerializer
 
+UserModel = get_user_model()
+
+
+class PostLikesListSerializer(serializers.ListSerializer):
+    """
+    Resolve the posts which are liked by the request user in one query for the whole list.
+    """
+
+    def to_representation(self, data):
+        request = self.context.get('request')
+        if request is not None and request.user.is_authenticated:
+            data = list(data)
+            self.child.liked_post_ids = request.user.get_liked_post_ids([post.id for post in data])
+        return super().to_representation(data)
+
+
+class IsLikedMixin(serializers.Serializer):
+    is_liked = serializers.SerializerMethodField()
+
+    # the ids of liked posts which are resolved by `PostLikesListSerializer`
+    liked_post_ids = None
+
+    def get_is_liked(self, obj):
+        request = self.context['request']
+        if request.user.is_anonymous:
+            return False
+        if self.liked_post_ids is not None:
+            return obj.id in self.liked_post_ids
+        return request.user.is_liked(obj)
+
+
+def get_file_url(storage, name, request):
+    """ Return the (absolute) url of the stored file the same as the serializer file fields. """
+    url = storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def get_primary_image_variant_urls(variants, request):
+    """ Return the urls of the primary image variants, e.g. {'thumbnail': {'jpeg': url, 'webp': url}}. """
+    storage = Post._meta.get_field('primary_image').storage
+    return {
+        variant: {image_format: get_file_url(storage, name, request) for image_format, name in formats.items()}
+        for variant, formats in variants.items()
+    }
+
+
+class PrimaryImageVariantsMixin(serializers.Serializer):
+    primary_image_variants = serializers.SerializerMethodField()
+
+    def get_primary_image_variants(self, obj):
+        return get_primary_image_variant_urls(obj.primary_image_variants, self.context.get('request'))
+
 
 class PostCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,15 +65,71 @@ class PostCreateSerializer(serializers.ModelSerializer):
         extra_kwargs = {'author': {}}
 
 
-class PostListSerializer(serializers.ModelSerializer):
+class PostListSerializer(IsLikedMixin, PrimaryImageVariantsMixin, serializers.ModelSerializer):
     author = UserDetailsSerializer()
 
     class Meta:
         model = Post
         fields = (
             'id', 'is_draft', 'hash', 'slug',
-            'created_at', 'title', 'author',
+            'created_at', 'title', 'author', 'is_liked',
+            'primary_image_variants',
         )
+        list_serializer_class = PostLikesListSerializer
+
+
+class PostListValuesSerializer:
+    """
+    Build the `PostListSerializer` representation of the posts from `.values()` rows.
+
+    No model instance and serializer field is created for each row, so it's much
+    faster for the large pages. The output must be kept the same as `PostListSerializer`.
+    """
+    fields = ('id', 'is_draft', 'hash', 'slug', 'created_at', 'title', 'primary_image_variants')
+    author_fields = tuple(f'author__{field}' for field in UserDetailsSerializer.Meta.fields)
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        self.datetime_field = serializers.DateTimeField()
+
+    def get_values(self, queryset, extra_fields=()):
+        """ Return the rows of the fields which make up the representation and the given extra fields. """
+        fields = self.fields + self.author_fields
+        return queryset.values(*fields, *[field for field in extra_fields if field not in fields])
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        request = self.context.get('request')
+        liked_post_ids = set()
+        if request is not None and request.user.is_authenticated:
+            liked_post_ids = request.user.get_liked_post_ids([row['id'] for row in rows])
+
+        avatar_storage = UserModel._meta.get_field('avatar').storage
+        to_datetime = self.datetime_field.to_representation
+        return [
+            {
+                'id': row['id'],
+                'is_draft': row['is_draft'],
+                'hash': row['hash'],
+                'slug': row['slug'],
+                'created_at': to_datetime(row['created_at']),
+                'title': row['title'],
+                'author': {
+                    'id': row['author__id'],
+                    'email': row['author__email'],
+                    'full_name': row['author__full_name'],
+                    'avatar': (
+                        get_file_url(avatar_storage, row['author__avatar'], request)
+                        if row['author__avatar'] else None
+                    ),
+                    'biography': row['author__biography'],
+                    'username': row['author__username'],
+                },
+                'is_liked': row['id'] in liked_post_ids,
+                'primary_image_variants': get_primary_image_variant_urls(row['primary_image_variants'], request),
+            }
+            for row in rows
+        ]
 
 
 class PostUpdateSerializer(serializers.ModelSerializer):
@@ -39,22 +148,15 @@ class PostUpdateSerializer(serializers.ModelSerializer):
         return [tag.tag for tag in obj.tags.all()]
 
 
-class PostRetrieveSerializer(serializers.ModelSerializer):
+class PostRetrieveSerializer(IsLikedMixin, PrimaryImageVariantsMixin, serializers.ModelSerializer):
     author = UserDetailsSerializer()
-    is_liked = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
         fields = (
             'id', 'title', 'description',
             'content', 'raw_slug', 'slug',
-            'hash', 'primary_image', 'author',
+            'hash', 'primary_image', 'primary_image_variants', 'author',
             'tags', 'likes_count', 'comments_count',
             'created_at', 'published_at', 'is_liked',
         )
-
-    def get_is_liked(self, obj):
-        request = self.context['request']
-        if request.user.is_anonymous:
-            return False
-        return request.user.is_liked(obj)
@@ -0,0 +1,38 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from apps.posts.models import Post
+
+UserModel = get_user_model()
+
+
+class UpdatePostSearchVectorsCommandTest(TestCase):
+    def setUp(self):
+        self.user = UserModel.objects.create_user(
+            email='sample@sample.sample',
+        )
+        self.post = Post.objects.create(title='sample', content='sample', author=self.user)
+        # simulate a post which was created before the search document existed
+        Post.objects.update(search_vector=None)
+
+    def test_update_post_search_vectors(self):
+        self.assertNotIn(self.post, Post.objects.search(query='sample'))
+
+        call_command('update_post_search_vectors', batch_size=1, stdout=StringIO())
+        self.assertIn(self.post, Post.objects.search(query='sample'))
+
+
+class BenchmarkPostListCommandTest(TestCase):
+    def test_benchmark_post_list(self):
+        out = StringIO()
+        err = StringIO()
+        call_command('benchmark_post_list', page_size=5, repeats=2, warmup=1, stdout=out, stderr=err)
+
+        self.assertIn('faster', out.getvalue())
+        # the rendered pages are the same
+        self.assertEqual(err.getvalue(), '')
+        # the benchmark data is rolled back
+        self.assertFalse(Post.objects.exists())
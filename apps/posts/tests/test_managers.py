@@ -35,3 +35,21 @@ class PostManagersTest(TestCase):
     def test_search_query_failure(self):
         result = Post.objects.search(query='does not exist')
         self.assertNotIn(self.post, result)
+
+    def test_search_query_ranking(self):
+        content_post = Post.objects.create(title='other', content='django', author=self.user)
+        title_post = Post.objects.create(title='django', content='other', author=self.user)
+
+        result = list(Post.objects.search(query='django'))
+        self.assertEqual(result, [title_post, content_post])
+
+    def test_search_query_after_update(self):
+        self.post.content = 'updated content'
+        self.post.save(update_fields=['content'])
+
+        result = Post.objects.search(query='updated')
+        self.assertIn(self.post, result)
+
+    def test_empty_search_query(self):
+        result = Post.objects.search(query='')
+        self.assertFalse(result.exists())
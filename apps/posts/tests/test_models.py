@@ -1,7 +1,13 @@
+import os
+import shutil
+import tempfile
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from PIL import Image
 from rest_framework.exceptions import ValidationError
 
+from apps.core.testing import create_image_file
 from apps.posts.models import Post
 
 UserModel = get_user_model()
@@ -45,3 +51,71 @@ class PostModelsTest(TestCase):
 
         post.draft()
         self.assertTrue(post.is_draft)
+
+
+@override_settings(
+    BACKGROUND_TASKS_EAGER=True,
+    POST_IMAGE_VARIANTS={'thumbnail': (320, 320), 'medium': (960, 960)},
+)
+class PostPrimaryImageTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = UserModel.objects.create_user(email='test@test.localhost')
+        self.post = Post.objects.create(title='sample', author=self.user)
+
+    def upload_image(self, post):
+        post.primary_image = create_image_file('image.png', size=(2000, 1000), image_format='PNG', mode='RGBA')
+        with self.captureOnCommitCallbacks(execute=True):
+            post.save()
+        post.refresh_from_db()
+
+    def test_primary_image_variants(self):
+        self.upload_image(self.post)
+
+        variants = self.post.primary_image_variants
+        self.assertEqual(set(variants), {'thumbnail', 'medium'})
+        storage = self.post.primary_image.storage
+        with Image.open(storage.path(variants['thumbnail']['jpeg'])) as image:
+            self.assertEqual(image.size, (320, 160))
+            self.assertEqual(image.format, 'JPEG')
+        with Image.open(storage.path(variants['medium']['jpeg'])) as image:
+            self.assertEqual(image.size, (960, 480))
+
+    def test_primary_image_variants_replaced(self):
+        self.upload_image(self.post)
+        old_variants = self.post.primary_image_variants
+
+        self.upload_image(self.post)
+        storage = self.post.primary_image.storage
+        for formats in old_variants.values():
+            for name in formats.values():
+                self.assertFalse(os.path.exists(storage.path(name)))
+        self.assertNotEqual(self.post.primary_image_variants, old_variants)
+
+    def test_primary_image_variants_cleared(self):
+        self.upload_image(self.post)
+        old_variants = self.post.primary_image_variants
+
+        self.post.primary_image = None
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        self.post.refresh_from_db()
+
+        self.assertEqual(self.post.primary_image_variants, {})
+        storage = self.post.primary_image.storage
+        for formats in old_variants.values():
+            for name in formats.values():
+                self.assertFalse(os.path.exists(storage.path(name)))
+
+    def test_save_without_image_change(self):
+        self.upload_image(self.post)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.post.title = 'new title'
+            self.post.save()
+        self.assertEqual(callbacks, [])
@@ -0,0 +1,100 @@
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.core.renderers import FastJSONRenderer
+from apps.posts import views
+from apps.posts.models import Post
+from apps.posts.serializers import PostListSerializer, PostListValuesSerializer
+
+UserModel = get_user_model()
+factory = APIRequestFactory()
+
+
+class PostListValuesSerializerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserModel.objects.create_user(email='sample@sample.sample')
+        self.user.full_name = 'نویسنده \u2028 "quoted"'
+        self.user.biography = 'line\nbreak </script>'
+        self.user.avatar = 'users/1/avatar.jpg'
+        self.user.save()
+        another_user = UserModel.objects.create_user(email='another@sample.sample')
+        another_user.avatar = ''
+        another_user.save()
+
+        for i, author in enumerate((self.user, another_user, self.user)):
+            post = Post.objects.create(title=f'پست {i} \u2029', content='content', author=author)
+            post.publish()
+        Post.objects.filter(author=another_user).update(primary_image_variants={
+            'thumbnail': {'jpeg': 'users/2/posts/a-thumbnail.jpg', 'webp': 'users/2/posts/a-thumbnail.webp'},
+        })
+        self.user.like(Post.objects.first())
+
+    def render_both(self, user=None):
+        request = factory.get('/posts/latest/')
+        if user is not None:
+            force_authenticate(request, user=user)
+        view = views.LatestPostListView()
+        request = view.initialize_request(request)
+        view.request = request
+        context = {'request': request}
+        queryset = Post.objects.latest().select_related('author').order_by('-published_at', '-id')
+
+        expected = JSONRenderer().render(PostListSerializer(queryset, many=True, context=context).data)
+        serializer = PostListValuesSerializer(context=context)
+        content = FastJSONRenderer().render(serializer.to_representation(serializer.get_values(queryset)))
+        return expected, content
+
+    def test_same_output_anonymous(self):
+        expected, content = self.render_both()
+        self.assertEqual(content, expected)
+
+    def test_same_output_authenticated(self):
+        expected, content = self.render_both(user=self.user)
+        self.assertIn(b'"is_liked":true', content)
+        self.assertEqual(content, expected)
+
+    def test_same_list_response(self):
+        view = views.LatestPostListView.as_view()
+        responses = []
+        for enabled in (False, True):
+            with override_settings(POST_LIST_VALUES_RENDERING=enabled):
+                request = factory.get('/posts/latest/', {'page_size': 2}, HTTP_ACCEPT='application/json')
+                force_authenticate(request, user=self.user)
+                response = view(request)
+                responses.append(response.render().content)
+        self.assertEqual(responses[0], responses[1])
+
+
+class FastJSONRendererTest(TestCase):
+    def test_same_output(self):
+        data = {
+            'text': 'unicode متن \u2028\u2029 \x1f "quoted" \\ </script>',
+            'date': datetime.date(2022, 3, 1),
+            'datetime': datetime.datetime(2022, 3, 1, 10, 20, 30, 123456, tzinfo=datetime.timezone.utc),
+            'time': datetime.time(10, 20, 30),
+            'decimal': Decimal('1.50'),
+            'numbers': [1, -2, 0.5, True, None],
+            'tuple': (1, 2),
+            1: 'integer key',
+            'big': 2 ** 70,
+        }
+        request = Request(factory.get('/'))
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json', {'request': request}),
+            JSONRenderer().render(data, 'application/json', {'request': request}),
+        )
+
+    def test_indented_output(self):
+        data = {'a': [1, 2]}
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=4'),
+            JSONRenderer().render(data, 'application/json; indent=4'),
+        )
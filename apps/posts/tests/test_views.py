@@ -1,10 +1,24 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier, Event
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import force_authenticate, APIRequestFactory
 
+from apps.comments import views as comment_views
+from apps.core.testing import QueryBudgetMixin
 from apps.posts import views
+from apps.posts.cache import latest_feed_cache, post_detail_cache
 from apps.posts.models import Post
+from apps.tags import views as tag_views
+from apps.tags.models import Tag
 
 UserModel = get_user_model()
 factory = APIRequestFactory()
@@ -34,8 +48,7 @@ class PostRatingTest(TestCase):
         request = factory.delete('/posts/like/')
         force_authenticate(request, user=self.user)
 
-        self.post.likes_count = 1
-        self.post.save()
+        self.user.like(self.post)
 
         response = view(request, hash=self.post.hash)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
@@ -43,6 +56,27 @@ class PostRatingTest(TestCase):
         self.post.refresh_from_db()
         self.assertEqual(self.post.likes_count, 0)
 
+    def test_post_like_twice(self):
+        view = views.PostLikeAPIView.as_view()
+        for _ in range(2):
+            request = factory.post('/posts/like/')
+            force_authenticate(request, user=self.user)
+            response = view(request, hash=self.post.hash)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+
+    def test_post_unlike_not_liked(self):
+        view = views.PostLikeAPIView.as_view()
+        request = factory.delete('/posts/like/')
+        force_authenticate(request, user=self.user)
+
+        response = view(request, hash=self.post.hash)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
     def test_like_draft_post(self):
         self.post.draft()
 
@@ -64,6 +98,89 @@ class PostRatingTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
+class PostLikeConcurrencyTest(TransactionTestCase):
+    threads = 8
+
+    def setUp(self):
+        self.author = UserModel.objects.create_user(email='author@sample.sample')
+        self.users = [
+            UserModel.objects.create_user(email=f'user{i}@sample.sample')
+            for i in range(self.threads)
+        ]
+        self.post = Post.objects.create(title='sample', content='sample', author=self.author)
+        self.post.publish()
+
+    def hammer(self, method, likes_per_user=5):
+        """ Send like requests of all users concurrently. """
+        view = views.PostLikeAPIView.as_view()
+        barrier = Barrier(self.threads)
+
+        def send_requests(user):
+            try:
+                barrier.wait()
+                for _ in range(likes_per_user):
+                    request = getattr(factory, method)('/posts/like/')
+                    force_authenticate(request, user=user)
+                    view(request, hash=self.post.hash)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(self.threads) as executor:
+            list(executor.map(send_requests, self.users))
+
+    def test_concurrent_likes(self):
+        self.hammer('post')
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes.count(), self.threads)
+        self.assertEqual(self.post.likes_count, self.threads)
+
+    def test_concurrent_unlikes(self):
+        self.hammer('post', likes_per_user=1)
+        self.hammer('delete')
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes.count(), 0)
+        self.assertEqual(self.post.likes_count, 0)
+
+
+class PostIsLikedTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserModel.objects.create_user(
+            email='sample@sample.sample',
+        )
+        self.posts = []
+        for i in range(3):
+            post = Post.objects.create(title=f'sample {i}', content='sample', author=self.user)
+            post.publish()
+            self.posts.append(post)
+        self.user.like(self.posts[0])
+        self.user.like(self.posts[2])
+
+    def test_latest_post_list_is_liked(self):
+        view = views.LatestPostListView.as_view()
+        request = factory.get('/posts/latest/', {'cursor': ''})
+        force_authenticate(request, user=self.user)
+
+        # one query for the posts and one query for the liked posts
+        with self.assertNumQueries(2):
+            response = view(request)
+            response.render()
+
+        is_liked = {post['id']: post['is_liked'] for post in response.data['results']}
+        self.assertEqual(is_liked, {
+            self.posts[0].id: True,
+            self.posts[1].id: False,
+            self.posts[2].id: True,
+        })
+
+    def test_latest_post_list_is_liked_anonymous(self):
+        view = views.LatestPostListView.as_view()
+        response = view(factory.get('/posts/latest/'))
+        self.assertFalse(any(post['is_liked'] for post in response.data['results']))
+
+
 class PostCRUDTest(TestCase):
     def setUp(self):
         self.user = UserModel.objects.create_user(
@@ -116,8 +233,9 @@ class PostCRUDTest(TestCase):
         response = view(request, hash=self.post.hash)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
-        with self.assertRaises(self.post.DoesNotExist):
-            self.post.refresh_from_db()
+        # the post is hidden and deleted later by the worker
+        self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+        self.assertTrue(Post.objects.hidden().filter(pk=self.post.pk).exists())
 
     def test_user_draft_post_list_view(self):
         view = views.UserDraftPostListAPIView.as_view()
@@ -189,3 +307,378 @@ class PostPublicationTest(TestCase):
         self.assertEqual(response.data, {'success': True})
         self.post.refresh_from_db()
         self.assertTrue(self.post.is_draft)
+
+
+class PostPaginationTest(TestCase):
+    def setUp(self):
+        self.user = UserModel.objects.create_user(
+            email='sample@sample.sample',
+        )
+        # posts with equal publish date, so the `id` must break the ties
+        published_at = timezone.now()
+        self.posts = [
+            Post.objects.create(
+                title=f'sample {i}', content='sample', author=self.user,
+                is_draft=False, published_at=published_at,
+            )
+            for i in range(5)
+        ]
+
+    def get_page(self, url, view_class=views.LatestPostListView):
+        response = view_class.as_view()(factory.get(url))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_latest_post_list_cursor_pagination(self):
+        page = self.get_page('/posts/latest/?page_size=2&cursor=')
+        self.assertIsNone(page['previous'])
+        self.assertNotIn('count', page)
+
+        ids = []
+        while True:
+            ids += [post['id'] for post in page['results']]
+            if not page['next']:
+                break
+            page = self.get_page(page['next'])
+        self.assertEqual(ids, [post.id for post in reversed(self.posts)])
+
+        # walk back to the first page
+        page = self.get_page(page['previous'])
+        self.assertEqual([post['id'] for post in page['results']], [self.posts[2].id, self.posts[1].id])
+        page = self.get_page(page['previous'])
+        self.assertEqual([post['id'] for post in page['results']], [self.posts[4].id, self.posts[3].id])
+        self.assertIsNone(page['previous'])
+
+    def test_search_post_list_cursor_pagination(self):
+        # the posts have equal ranks, which aren't exact in the cursor as real numbers
+        page = self.get_page('/posts/search/?q=sample&page_size=2&cursor=', views.PostSearchListAPIView)
+        ids = []
+        while True:
+            ids += [post['id'] for post in page['results']]
+            # a cursor which doesn't move would return the same page forever
+            self.assertLessEqual(len(ids), len(self.posts))
+            if not page['next']:
+                break
+            page = self.get_page(page['next'], views.PostSearchListAPIView)
+        self.assertEqual(ids, [post.id for post in reversed(self.posts)])
+
+    def test_latest_post_list_page_number_pagination(self):
+        # the page numbers are the default
+        page = self.get_page('/posts/latest/?page_size=2&page=2')
+        self.assertEqual(page['count'], 5)
+        self.assertEqual([post['id'] for post in page['results']], [self.posts[2].id, self.posts[1].id])
+        self.assertIn('page=3', page['next'])
+
+    def test_invalid_cursor(self):
+        view = views.LatestPostListView.as_view()
+        response = view(factory.get('/posts/latest/?cursor=invalid'))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class LatestPostCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserModel.objects.create_user(
+            email='sample@sample.sample',
+        )
+        self.post = Post.objects.create(title='sample', content='sample', author=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.publish()
+
+    def get_latest(self):
+        view = views.LatestPostListView.as_view()
+        return view(factory.get('/posts/latest/'))
+
+    def test_latest_post_list_cache_hit(self):
+        self.assertEqual(self.get_latest()['X-Cache'], 'MISS')
+        response = self.get_latest()
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['results'][0]['id'], self.post.id)
+        self.assertEqual(latest_feed_cache.get_stats()['hits'], 1)
+        self.assertEqual(latest_feed_cache.get_stats()['misses'], 1)
+
+    def test_latest_post_list_cache_invalidation(self):
+        self.get_latest()
+
+        # updating a listed post invalidates the feed
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = 'new title'
+            self.post.save()
+        response = self.get_latest()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['title'], 'new title')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.draft()
+        response = self.get_latest()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'], [])
+
+    def test_draft_post_update_keeps_cache(self):
+        draft = Post.objects.create(title='draft', author=self.user)
+        self.get_latest()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            draft.content = 'new content'
+            draft.save()
+        self.assertEqual(self.get_latest()['X-Cache'], 'HIT')
+
+
+class PostConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserModel.objects.create_user(email='sample@sample.sample')
+        self.post = Post.objects.create(title='sample', content='sample', author=self.user)
+        self.post.publish()
+        self.view = views.PostRetrieveAPIView.as_view()
+
+    def retrieve(self, user=None, **headers):
+        request = factory.get('/posts/', **headers)
+        if user is not None:
+            force_authenticate(request, user=user)
+        return self.view(request, slug=self.post.slug)
+
+    def test_post_retrieve_validators(self):
+        response = self.retrieve()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+    def test_post_not_modified(self):
+        etag = self.retrieve(user=self.user)['ETag']
+
+        # only the version of the post is queried
+        with self.assertNumQueries(1):
+            response = self.retrieve(user=self.user, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_post_not_modified_since(self):
+        last_modified = self.retrieve()['Last-Modified']
+
+        response = self.retrieve(HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_post_like_changes_etag(self):
+        etag = self.retrieve()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.like(self.post)
+
+        response = self.retrieve(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['likes_count'], 1)
+
+    def test_post_tags_change_etag(self):
+        etag = self.retrieve()['ETag']
+        request = factory.post('/tags/post/', data={'tag': 'django'})
+        force_authenticate(request, user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            tag_views.PostTagsAPIView.as_view()(request, hash=self.post.hash)
+
+        response = self.retrieve(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_author_change_changes_etag(self):
+        etag = self.retrieve()['ETag']
+        self.user.full_name = 'new name'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=['full_name'])
+
+        response = self.retrieve(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_etag_differs_for_each_user(self):
+        etag = self.retrieve()['ETag']
+
+        response = self.retrieve(user=self.user, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_missing_post(self):
+        request = factory.get('/posts/', HTTP_IF_NONE_MATCH='"etag"')
+        response = self.view(request, slug='missing')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PostDetailCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserModel.objects.create_user(email='sample@sample.sample')
+        self.post = Post.objects.create(title='sample', content='sample', author=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.publish()
+        self.view = views.PostRetrieveAPIView.as_view()
+
+    def retrieve(self, user=None):
+        request = factory.get('/posts/')
+        if user is not None:
+            force_authenticate(request, user=user)
+        return self.view(request, slug=self.post.slug)
+
+    def test_post_detail_cache_hit(self):
+        self.assertEqual(self.retrieve()['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            response = self.retrieve()
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content)['title'], 'sample')
+
+    def test_authenticated_user_is_not_cached(self):
+        response = self.retrieve(user=self.user)
+        self.assertNotIn('X-Cache', response)
+
+    def test_post_update_invalidates_cache(self):
+        self.retrieve()
+        request = factory.patch('/posts/update/', data={'title': 'new title'})
+        force_authenticate(request, user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            views.PostUpdateAPIView.as_view()(request, hash=self.post.hash)
+
+        self.post.refresh_from_db()
+        response = self.retrieve()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(json.loads(response.content)['title'], 'new title')
+
+    def test_post_draft_invalidates_cache(self):
+        self.retrieve()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.draft()
+
+        response = self.retrieve()
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_comment_invalidates_cache(self):
+        self.retrieve()
+        request = factory.post('/comments/', data={'text': 'comment'})
+        force_authenticate(request, user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            comment_views.PostCommentCreateAPIView.as_view()(request, post_hash=self.post.hash)
+
+        self.assertEqual(json.loads(self.retrieve().content)['comments_count'], 1)
+
+    def test_old_slug_is_not_served(self):
+        old_slug = self.post.slug
+        self.post.raw_slug = 'new-slug'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        # the entry of the post is cached by the new slug
+        self.retrieve()
+
+        response = self.view(factory.get('/posts/'), slug=old_slug)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(POST_DETAIL_CACHE_LOCK_WAIT=5)
+    def test_concurrent_misses_build_once(self):
+        builds = []
+
+        def build():
+            builds.append(1)
+            time.sleep(0.2)
+            return {'slug': self.post.slug}
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            results = list(executor.map(
+                lambda _: post_detail_cache.get_or_build(self.post.slug, build), range(5)
+            ))
+
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(sorted(hit for entry, hit in results), [False, True, True, True, True])
+
+    @override_settings(POST_DETAIL_CACHE_LOCK_WAIT=0.1)
+    def test_slow_build_is_not_waited_for(self):
+        built = Event()
+
+        def slow_build():
+            built.wait(5)
+            return {'slug': self.post.slug, 'build': 'slow'}
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            slow_result = executor.submit(post_detail_cache.get_or_build, self.post.slug, slow_build)
+            # wait until the slow build holds the lock
+            lock_key = f'{post_detail_cache.get_key(self.post.hash)}:lock'
+            while cache.get(lock_key) is None:
+                time.sleep(0.01)
+
+            start = time.monotonic()
+            entry, hit = post_detail_cache.get_or_build(self.post.slug, lambda: {'slug': self.post.slug})
+            # the waiting request builds the entry itself after the short wait
+            self.assertLess(time.monotonic() - start, 1)
+            self.assertEqual(entry, {'slug': self.post.slug})
+            self.assertFalse(hit)
+            built.set()
+            self.assertEqual(slow_result.result()[0]['build'], 'slow')
+
+
+@override_settings(POST_LIST_VALUES_RENDERING=False)
+class PostListProjectionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserModel.objects.create_user(email='sample@sample.sample')
+        for i in range(3):
+            post = Post.objects.create(title=f'sample {i}', content='sample content', author=self.user)
+            post.publish()
+
+    def test_latest_post_list_projection(self):
+        view = views.LatestPostListView.as_view()
+        with CaptureQueriesContext(connection) as context:
+            response = view(factory.get('/posts/latest/', {'cursor': ''}))
+
+        self.assertEqual(len(response.data['results']), 3)
+        # the posts and their authors are fetched in one query without the unused columns
+        self.assertEqual(len(context), 1)
+        sql = context[0]['sql']
+        self.assertNotIn('"posts_post"."content"', sql)
+        self.assertNotIn('"users_user"."last_login"', sql)
+        self.assertIn('"users_user"."username"', sql)
+
+    def test_search_post_list_projection(self):
+        view = views.PostSearchListAPIView.as_view()
+        with CaptureQueriesContext(connection) as context:
+            response = view(factory.get('/posts/search/', {'q': 'sample', 'cursor': ''}))
+
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(len(context), 1)
+        self.assertNotIn('"posts_post"."content"', context[0]['sql'].split(' FROM ')[0])
+
+
+class PostQueryBudgetTest(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserModel.objects.create_user(email='sample@sample.sample')
+        self.tags = Tag.objects.bulk_create([Tag(tag=f'tag{i}') for i in range(10)])
+        self.posts = []
+        for i in range(10):
+            post = Post.objects.create(title=f'sample {i}', content='sample content', author=self.user)
+            post.tags.set(self.tags[:i + 1])
+            post.publish()
+            self.user.like(post)
+            self.posts.append(post)
+
+    def test_retrieve_query_budget(self):
+        view = views.PostRetrieveAPIView.as_view()
+        # the queries don't depend on the number of the post tags
+        for post in (self.posts[0], self.posts[-1]):
+            request = factory.get('/posts/')
+            force_authenticate(request, user=self.user)
+            with self.assertMaxQueries(3):
+                response = view(request, slug=post.slug)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data['tags']), post.tags.count())
+
+    def test_list_query_budget(self):
+        list_views = (
+            (views.LatestPostListView.as_view(), '/posts/latest/', {}),
+            (views.PostSearchListAPIView.as_view(), '/posts/search/', {'q': 'sample'}),
+            (views.UserPostListAPIView.as_view(), '/posts/user/', {'username': self.user.username}),
+            (tag_views.TagPostListAPIView.as_view(), '/tags/', {'tag': 'tag0'}),
+        )
+        for view, path, kwargs in list_views:
+            params = {'q': kwargs.pop('q')} if 'q' in kwargs else {}
+            # the posts, their authors and the liked posts of the user, and the count of the page number pagination
+            for page_params, budget in (({'cursor': ''}, 2), ({}, 3)):
+                request = factory.get(path, {**params, **page_params})
+                force_authenticate(request, user=self.user)
+                with self.subTest(path=path, **page_params), self.assertMaxQueries(budget):
+                    response = view(request, **kwargs)
+                    self.assertEqual(len(response.data['results']), 10)
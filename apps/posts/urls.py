@@ -1,13 +1,14 @@
 from django.urls import path
 
+from apps.core.async_views import async_read_view
 from apps.posts import views
 
 app_name = 'posts'
 urlpatterns = [
-    path('latest/', views.LatestPostListView.as_view(), name='latest'),
-    path('search/', views.PostSearchListAPIView.as_view(), name='search'),
+    path('latest/', async_read_view(views.LatestPostListView.as_view()), name='latest'),
+    path('search/', async_read_view(views.PostSearchListAPIView.as_view()), name='search'),
     path('draft/', views.UserDraftPostListAPIView.as_view(), name='user_draft_posts'),
-    path('user/<str:username>/', views.UserPostListAPIView.as_view(), name='user_published_posts'),
+    path('user/<str:username>/', async_read_view(views.UserPostListAPIView.as_view()), name='user_published_posts'),
 
     path('create/', views.PostCreateAPIView.as_view(), name='create'),
     path('update/<str:hash>/', views.PostUpdateAPIView.as_view(), name='update'),
@@ -17,5 +18,5 @@ urlpatterns = [
 
     path('like/<str:hash>/', views.PostLikeAPIView.as_view(), name='like'),
 
-    path('<slug:slug>/', views.PostRetrieveAPIView.as_view(), name='detail'),
+    path('<slug:slug>/', async_read_view(views.PostRetrieveAPIView.as_view()), name='detail'),
 ]
@@ -1,13 +1,20 @@
+from django.conf import settings
+from django.http import HttpResponse
 from rest_framework.generics import (
     ListAPIView, RetrieveAPIView, DestroyAPIView,
     RetrieveUpdateAPIView, CreateAPIView, GenericAPIView,
 )
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.status import HTTP_204_NO_CONTENT
 
-from apps.core.paginators import BaseResultsPagination
+from apps.core.conditional import ConditionalRetrieveMixin
+from apps.core.paginators import CursorOrPagePagination
+from apps.core.projections import SerializerProjectionMixin
+from apps.core.renderers import FastJSONRenderer
 from apps.posts import serializers
+from apps.posts.cache import latest_feed_cache, post_detail_cache
 from apps.posts.models import Post
 
 
@@ -20,22 +27,60 @@ class IsPostAuthor(IsAuthenticated):
         return bool(obj.author == request.user)
 
 
-class LatestPostListView(ListAPIView):
+class PostValuesListMixin:
+    """
+    Render the posts list from `.values()` rows by `PostListValuesSerializer` and orjson
+    instead of the `PostListSerializer`, if `POST_LIST_VALUES_RENDERING` is enabled.
+    """
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+
+    def list(self, request, *args, **kwargs):
+        if not settings.POST_LIST_VALUES_RENDERING:
+            return super().list(request, *args, **kwargs)
+
+        serializer = serializers.PostListValuesSerializer(context=self.get_serializer_context())
+        ordering_fields = [field.lstrip('-') for field in self.ordering]
+        queryset = serializer.get_values(self.filter_queryset(self.get_queryset()), ordering_fields)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.to_representation(page))
+        return Response(serializer.to_representation(queryset))
+
+
+class LatestPostListView(PostValuesListMixin, SerializerProjectionMixin, ListAPIView):
     """
     List of latest posts.
+
+    The pages are cached for anonymous users.
     """
     queryset = Post.objects.latest().select_related('author')
     serializer_class = serializers.PostListSerializer
-    pagination_class = BaseResultsPagination
+    pagination_class = CursorOrPagePagination
+    ordering = ('-published_at', '-id')
+
+    def list(self, request, *args, **kwargs):
+        if not latest_feed_cache.is_cacheable(request):
+            return super().list(request, *args, **kwargs)
+
+        data = latest_feed_cache.get(request)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        response = super().list(request, *args, **kwargs)
+        latest_feed_cache.set(request, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
 
 
-class UserDraftPostListAPIView(ListAPIView):
+class UserDraftPostListAPIView(PostValuesListMixin, SerializerProjectionMixin, ListAPIView):
     """
     List of logged-in user draft posts.
     """
     serializer_class = serializers.PostListSerializer
     permission_classes = (IsAuthenticated,)
-    pagination_class = BaseResultsPagination
+    pagination_class = CursorOrPagePagination
+    ordering = ('-created_at', '-id')
 
     def get_queryset(self):
         return Post.objects.filter(
@@ -44,12 +89,13 @@ class UserDraftPostListAPIView(ListAPIView):
         ).select_related('author')
 
 
-class UserPostListAPIView(ListAPIView):
+class UserPostListAPIView(PostValuesListMixin, SerializerProjectionMixin, ListAPIView):
     """
     List of user published posts.
     """
     serializer_class = serializers.PostListSerializer
-    pagination_class = BaseResultsPagination
+    pagination_class = CursorOrPagePagination
+    ordering = ('-published_at', '-id')
 
     def get_queryset(self):
         return Post.objects.filter(
@@ -70,14 +116,46 @@ class PostCreateAPIView(CreateAPIView):
         serializer.save(author=self.request.user)
 
 
-class PostRetrieveAPIView(RetrieveAPIView):
+class PostRetrieveAPIView(ConditionalRetrieveMixin, RetrieveAPIView):
     """
     Retrieve a post by.
+
+    The rendered post is cached for anonymous users.
     """
     serializer_class = serializers.PostRetrieveSerializer
     lookup_field = 'slug'
+    version_fields = ('updated_at', 'author__updated_at')
     queryset = Post.objects.filter(is_draft=False).select_related('author')
 
+    def retrieve(self, request, *args, **kwargs):
+        if not post_detail_cache.is_cacheable(request):
+            return super().retrieve(request, *args, **kwargs)
+
+        entry, hit = post_detail_cache.get_or_build(kwargs[self.lookup_field], self.build_cache_entry)
+        response = self.get_conditional_response(entry['etag'], entry['last_modified'])
+        if response is None:
+            response = self.set_validators(
+                HttpResponse(entry['content'], content_type=request.accepted_media_type),
+                entry['etag'], entry['last_modified'],
+            )
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+    def build_cache_entry(self):
+        """ Render the post details and its validators to be cached. """
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        etag, last_modified = self.get_validators(self.get_instance_version(instance))
+        content = self.request.accepted_renderer.render(
+            serializer.data, self.request.accepted_media_type, self.get_renderer_context(),
+        )
+        return {
+            'slug': instance.slug,
+            'content': content,
+            'etag': etag,
+            'last_modified': last_modified,
+        }
+
 
 class PostUpdateAPIView(RetrieveUpdateAPIView):
     """
@@ -92,10 +170,17 @@ class PostUpdateAPIView(RetrieveUpdateAPIView):
 class PostDeleteAPIView(DestroyAPIView):
     """
     Delete a post.
+
+    The post is hidden at once, and deleted with its comments and likes by the background worker.
     """
     permission_classes = (IsPostAuthor,)
     lookup_field = 'hash'
-    queryset = Post.objects.select_related('author').only('author__id')
+    queryset = Post.objects \
+        .select_related('author') \
+        .only('is_draft', 'published_at', 'hash', 'author__id')
+
+    def perform_destroy(self, instance):
+        instance.hide()
 
 
 class PublishPostAPIView(GenericAPIView):
@@ -119,7 +204,7 @@ class DraftPostAPIView(GenericAPIView):
     Draft a post.
     """
     permission_classes = (IsPostAuthor,)
-    queryset = Post.objects.select_related('author').only('is_draft', 'author__id')
+    queryset = Post.objects.select_related('author').only('is_draft', 'hash', 'author__id')
     lookup_field = 'hash'
 
     def post(self, request, *args, **kwargs):
@@ -132,37 +217,28 @@ class PostLikeAPIView(GenericAPIView):
     Like (POST) and unlike (DELETE) a post.
     """
     permission_classes = (IsAuthenticated,)
-    queryset = Post.objects.filter(is_draft=False).only('likes_count')
+    queryset = Post.objects.filter(is_draft=False).only('id', 'hash')
     lookup_field = 'hash'
     serializer_class = serializers.PostRetrieveSerializer
 
     def post(self, request, *args, **kwargs):
-        post = self.get_object()
-        self.request.user.like(post)
-
-        # increase the post likes count
-        post.likes_count += 1
-        post.save(updating_likes_count=True)
-
+        # the likes count is increased with the like itself
+        self.request.user.like(self.get_object())
         return Response({'success': True})
 
     def delete(self, request, *args, **kwargs):
-        post = self.get_object()
-        self.request.user.unlike(post)
-
-        # decrease the post likes count
-        post.likes_count -= 1
-        post.save(updating_likes_count=True)
-
+        # the likes count is decreased with the unlike itself
+        self.request.user.unlike(self.get_object())
         return Response({'success': True}, status=HTTP_204_NO_CONTENT)
 
 
-class PostSearchListAPIView(ListAPIView):
+class PostSearchListAPIView(PostValuesListMixin, SerializerProjectionMixin, ListAPIView):
     """
     Search in posts and return result list.
     """
     serializer_class = serializers.PostListSerializer
-    pagination_class = BaseResultsPagination
+    pagination_class = CursorOrPagePagination
+    ordering = ('-rank', '-id')
 
     def get_queryset(self):
         query = self.request.query_params.get('q', '')
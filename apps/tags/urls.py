@@ -1,11 +1,12 @@
 from django.urls import path
 
+from apps.core.async_views import async_read_view
 from apps.tags import views
 
 app_name = 'tags'
 urlpatterns = [
     path('post/<str:hash>/', views.PostTagsAPIView.as_view(), name='post_tags'),
-    path('search/', views.TagSearchListAPIView.as_view(), name='search'),
+    path('search/', async_read_view(views.TagSearchListAPIView.as_view()), name='search'),
 
-    path('<str:tag>/', views.TagPostListAPIView.as_view(), name='tag_posts'),
+    path('<str:tag>/', async_read_view(views.TagPostListAPIView.as_view()), name='tag_posts'),
 ]
@@ -1,12 +1,17 @@
+from functools import partial
+
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 from rest_framework.generics import GenericAPIView, ListAPIView
 from rest_framework.response import Response
 from rest_framework.status import HTTP_400_BAD_REQUEST
 
-from apps.core.paginators import BaseResultsPagination
+from apps.core.paginators import CursorOrPagePagination
+from apps.core.projections import SerializerProjectionMixin
+from apps.posts.cache import post_detail_cache
 from apps.posts.models import Post
 from apps.posts.serializers import PostListSerializer
-from apps.posts.views import IsPostAuthor
+from apps.posts.views import IsPostAuthor, PostValuesListMixin
 from apps.tags.models import Tag
 from apps.tags.serializers import TagSerializer
 
@@ -17,7 +22,7 @@ class PostTagsAPIView(GenericAPIView):
     """
     permission_classes = (IsPostAuthor,)
     lookup_field = 'hash'
-    queryset = Post.objects.select_related('author').only('tags', 'author__id')
+    queryset = Post.objects.select_related('author').only('tags', 'hash', 'author__id')
     serializer_class = TagSerializer
 
     def get_tag(self):
@@ -25,6 +30,11 @@ class PostTagsAPIView(GenericAPIView):
         serializer.is_valid(raise_exception=True)
         return serializer.validated_data['tag']
 
+    @staticmethod
+    def post_tags_changed(post):
+        Post.objects.filter(pk=post.pk).touch()
+        transaction.on_commit(partial(post_detail_cache.invalidate, post.hash))
+
     def post(self, request, *args, **kwargs):
         tag = self.get_tag()
         post = self.get_object()
@@ -38,6 +48,7 @@ class PostTagsAPIView(GenericAPIView):
             defaults={'tag': tag}
         )
         post.tags.add(tag)
+        self.post_tags_changed(post)
         return Response({'success': True})
 
     def delete(self, request, *args, **kwargs):
@@ -49,15 +60,17 @@ class PostTagsAPIView(GenericAPIView):
             return Response({'detail': f'There is no {tag} tag.'}, status=HTTP_400_BAD_REQUEST)
 
         post.tags.remove(tag)
+        self.post_tags_changed(post)
         return Response({'success': True})
 
 
-class TagPostListAPIView(ListAPIView):
+class TagPostListAPIView(PostValuesListMixin, SerializerProjectionMixin, ListAPIView):
     """
     List of posts which have this tag.
     """
     serializer_class = PostListSerializer
-    pagination_class = BaseResultsPagination
+    pagination_class = CursorOrPagePagination
+    ordering = ('-published_at', '-id')
 
     def get_queryset(self):
         return Post.objects \
@@ -65,7 +78,7 @@ class TagPostListAPIView(ListAPIView):
             .filter(tags__tag=self.kwargs.get('tag'))
 
 
-class TagSearchListAPIView(ListAPIView):
+class TagSearchListAPIView(SerializerProjectionMixin, ListAPIView):
     """
     Search in tags and return result list
     """
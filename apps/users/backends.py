@@ -2,6 +2,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
 from django.db.models import Q
 
+from apps.users.cache import user_cache
 from apps.utils.otp import verify_otp
 
 UserModel = get_user_model()
@@ -25,3 +26,11 @@ class OTPModelBackend(ModelBackend):
 
         if verify_otp(user.id, otp_code):
             return user
+
+    def get_user(self, user_id):
+        # the user of each authenticated request is cached
+        user = user_cache.get(user_id, super().get_user)
+        # the cached user may be deactivated or hidden before its copy is invalidated
+        if user is None or user.deleted_at is not None or not self.user_can_authenticate(user):
+            return None
+        return user
@@ -0,0 +1,90 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class UserCache:
+    """
+    Cache of the authenticated users by their id.
+
+    The users are kept in a bounded LRU store of the current process for `USER_CACHE_TTL` seconds,
+    which may be backed by a cache shared by all processes (`USER_CACHE_ALIAS`).
+    Saving a user invalidates it in the shared cache and in the current process store,
+    the other processes see the change after their copy is expired.
+    """
+    key_prefix = 'users:user'
+
+    def __init__(self):
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared_cache(self):
+        alias = settings.USER_CACHE_ALIAS
+        return caches[alias] if alias else None
+
+    def get_key(self, user_id):
+        return f'{self.key_prefix}:{user_id}'
+
+    def get(self, user_id, load):
+        """
+        Return a copy of the cached user with the given id.
+        Call the load function to get the user if it isn't cached, the None results are not cached.
+        """
+        user = self._get_local(user_id)
+        if user is None and self.shared_cache is not None:
+            user = self.shared_cache.get(self.get_key(user_id))
+            if user is not None:
+                self._set_local(user_id, user)
+
+        if user is None:
+            user = load(user_id)
+            if user is None:
+                return None
+            self.set(user_id, user)
+
+        # the request may change the user, so the cached instance is not shared
+        return copy.copy(user)
+
+    def set(self, user_id, user):
+        self._set_local(user_id, user)
+        if self.shared_cache is not None:
+            self.shared_cache.set(self.get_key(user_id), user, settings.USER_CACHE_TTL)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+        if self.shared_cache is not None:
+            self.shared_cache.delete(self.get_key(user_id))
+
+    def clear(self):
+        """ Clear the current process store. """
+        with self._lock:
+            self._users.clear()
+
+    def _get_local(self, user_id):
+        with self._lock:
+            item = self._users.get(user_id)
+            if item is None:
+                return None
+
+            user, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+            return user
+
+    def _set_local(self, user_id, user):
+        with self._lock:
+            self._users[user_id] = (user, time.monotonic() + settings.USER_CACHE_TTL)
+            self._users.move_to_end(user_id)
+            while len(self._users) > settings.USER_CACHE_SIZE:
+                self._users.popitem(last=False)
+
+
+user_cache = UserCache()
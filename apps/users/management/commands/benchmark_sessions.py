@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from apps.core.benchmark import benchmark_environment, measure
+from apps.posts.models import Post
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the latency and database queries of the authenticated requests in each session mode. '
+        'The benchmark data is rolled back at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modes', nargs='+', default=list(settings.SESSION_ENGINES),
+            help='Session modes which are benchmarked.',
+        )
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Number of measured requests to each endpoint.',
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=20,
+            help='Number of requests to each endpoint before measuring.',
+        )
+
+    def handle(self, *args, **options):
+        unknown_modes = set(options['modes']) - set(settings.SESSION_ENGINES)
+        if unknown_modes:
+            raise CommandError(f'Unknown session modes: {", ".join(sorted(unknown_modes))}')
+
+        with benchmark_environment():
+            user = UserModel.objects.create_user(email='session-benchmark@benchmark.localhost')
+            post = Post.objects.create(title='benchmark', content='benchmark', author=user)
+            post.publish()
+
+            for mode in options['modes']:
+                with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[mode]):
+                    self.benchmark_mode(mode, user, post, options['requests'], options['warmup'])
+
+    def benchmark_mode(self, mode, user, post, requests, warmup):
+        client = Client()
+        # the database sessions are rolled back, but the cached and the cookie sessions
+        # aren't in the transaction, so the session is deleted after the mode
+        client.force_login(user)
+        try:
+            self.measure_endpoints(mode, client, user, post, requests, warmup)
+        finally:
+            client.logout()
+
+    def measure_endpoints(self, mode, client, user, post, requests, warmup):
+
+        profile_url = reverse('users:profile', kwargs={'username': user.username})
+        like_url = reverse('posts:like', kwargs={'hash': post.hash})
+
+        liked = False
+
+        def like():
+            # like and unlike in turn, so each request changes the likes
+            nonlocal liked
+            if liked:
+                client.delete(like_url)
+            else:
+                client.post(like_url)
+            liked = not liked
+
+        endpoints = (
+            ('profile', lambda: client.get(profile_url)),
+            ('like', like),
+        )
+        for name, func in endpoints:
+            result = measure(func, requests=requests, warmup=warmup)
+            self.stdout.write(
+                f'{mode:<15} {name:<8} '
+                f'mean: {result["mean"]:.2f}ms, p50: {result["p50"]:.2f}ms, '
+                f'p95: {result["p95"]:.2f}ms, queries/request: {result["queries"]:.1f}'
+            )
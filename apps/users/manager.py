@@ -1,8 +1,58 @@
+from datetime import timedelta
+from functools import partial
+
 from django.contrib.auth.base_user import BaseUserManager
-from django.db.models import Q
+from django.db import connections, transaction
+from django.db.models import Manager, Q
+from django.utils import timezone
+
+from apps.core.deletion import delete_in_batches
+from apps.users.cache import user_cache
 
 
 class UserManager(BaseUserManager):
+    def get_queryset(self):
+        # the hidden users are deleted by the `delete_hidden_objects` worker
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+    def hidden(self):
+        """ Return the hidden users, which are waiting to be deleted. """
+        return super().get_queryset().filter(deleted_at__isnull=False)
+
+    def delete_hidden(self, user_id, batch_size):
+        """
+        Delete a hidden user with their posts, likes and comments (including the replies of the other users),
+        in batches of separate transactions. The counters of the remaining posts and comments are decreased.
+        The avatar is deleted after the user is deleted. Return False if the user isn't hidden.
+        """
+        if not self.hidden().filter(pk=user_id).exists():
+            return False
+
+        post_model = self.model._meta.get_field('posts').related_model
+        comment_model = self.model._meta.get_field('comments').related_model
+
+        # the posts which were created after the user was hidden are hidden too
+        post_model._base_manager.filter(author_id=user_id, deleted_at__isnull=True).update(deleted_at=timezone.now())
+        for post_id in post_model.objects.hidden().filter(author_id=user_id).values_list('pk', flat=True):
+            post_model.objects.delete_hidden(post_id, batch_size)
+        post_model.objects.delete_user_likes(user_id, batch_size)
+        comment_model.objects.delete_user_comments(user_id, batch_size)
+
+        with transaction.atomic():
+            user = self.hidden().select_for_update().filter(pk=user_id).only('avatar').first()
+            if user is None:
+                return False
+
+            for field in self.model._meta.many_to_many:
+                delete_in_batches(field.remote_field.through.objects.filter(**{field.m2m_field_name(): user_id}), batch_size)
+            delete_in_batches(self.hidden().filter(pk=user_id), batch_size)
+
+            avatar = self.model._meta.get_field('avatar')
+            if user.avatar.name and user.avatar.name != avatar.default:
+                transaction.on_commit(partial(avatar.storage.delete, user.avatar.name))
+        user_cache.invalidate(user_id)
+        return True
+
     def _create_user(self, email, **extra_fields):
         if not email:
             raise ValueError('The given email must be set.')
@@ -37,3 +87,44 @@ class UserManager(BaseUserManager):
             Q(username__icontains=query) | Q(username__trigram_word_similar=query) |
             Q(biography__icontains=query) | Q(biography__trigram_word_similar=query)
         )
+
+
+class OTPCodeManager(Manager):
+    # Store the code of the user, replacing the previous one and its attempts.
+    set_code_sql = """
+        INSERT INTO {table} (user_id, code_hash, attempts, expires_at) VALUES (%s, %s, 0, %s)
+        ON CONFLICT (user_id) DO UPDATE SET code_hash = EXCLUDED.code_hash, attempts = 0, expires_at = EXCLUDED.expires_at
+    """
+
+    # Count a verify attempt of the unexpired code of the user and return the code hash and the attempts.
+    add_attempt_sql = """
+        UPDATE {table} SET attempts = attempts + 1
+        WHERE user_id = %s AND expires_at > %s
+        RETURNING code_hash, attempts
+    """
+
+    def _execute(self, sql, params):
+        connection = connections[self.db]
+        with connection.cursor() as cursor:
+            cursor.execute(sql.format(table=connection.ops.quote_name(self.model._meta.db_table)), params)
+            return cursor.fetchone() if cursor.description else None
+
+    def set_code(self, user_id, code_hash, ttl):
+        """ Store the code hash of the user for `ttl` seconds, the expired codes of all users are deleted. """
+        now = timezone.now()
+        self.filter(expires_at__lte=now).delete()
+        self._execute(self.set_code_sql, [user_id, code_hash, now + timedelta(seconds=ttl)])
+
+    def add_attempt(self, user_id):
+        """
+        Increase the verify attempts of the user code by one atomic update, so the concurrent attempts
+        are counted exactly. Return the code hash and the number of attempts, or None if there is no unexpired code.
+        """
+        return self._execute(self.add_attempt_sql, [user_id, timezone.now()])
+
+    def delete_code(self, user_id, code_hash=None):
+        """ Delete the code of the user (if it's the given one), return True if it was deleted. """
+        codes = self.filter(user_id=user_id)
+        if code_hash is not None:
+            codes = codes.filter(code_hash=code_hash)
+        return codes.delete()[0] > 0
@@ -1,15 +1,21 @@
 import re
+from functools import partial
 from os import path
 
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.contrib.postgres.fields import CICharField, CIEmailField
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from PIL import Image
 
-from apps.users.manager import UserManager
+from apps.core.models import FileTrackerMixin
+from apps.posts.cache import latest_feed_cache, post_detail_cache
+from apps.users.cache import user_cache
+from apps.users.manager import OTPCodeManager, UserManager
+from apps.utils.images import resize_image
+from apps.utils.tasks import run_in_background
 
 
 def user_avatar_upload_path(instance, filename):
@@ -31,7 +37,7 @@ def get_email_username(email):
         raise ValueError(f"Can't find username of {email}")
 
 
-class User(AbstractUser):
+class User(FileTrackerMixin, AbstractUser):
     first_name = None
     last_name = None
     password = None
@@ -64,35 +70,111 @@ class User(AbstractUser):
         upload_to=user_avatar_upload_path,
         default='default-avatar.jpg',
     )
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+    # the hidden users are deleted by the `delete_hidden_objects` worker
+    deleted_at = models.DateTimeField(_('deleted at'), null=True, editable=False)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
 
     objects = UserManager()
 
+    # fields which are shown as the post author
+    author_fields = ('email', 'full_name', 'avatar', 'biography', 'username')
+    tracked_file_fields = ('avatar',)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(deleted_at__isnull=False),
+                name='user_hidden_idx',
+            ),
+        ]
+
     def save(self, *args, **kwargs):
+        creating = not self.id
         # if user is creating, fill the `full_name` and `username` fields
-        if not self.id:
+        if creating:
             email_username = get_email_username(self.email)
             self.full_name = email_username
             self.username = email_username
 
+        update_fields = kwargs.get('update_fields')
+        if update_fields:
+            update_fields = kwargs['update_fields'] = [*update_fields, 'updated_at']
+        avatar_changed = self.file_changed('avatar', update_fields)
         super().save(*args, **kwargs)
 
-        # resize the user avatar
-        avatar = Image.open(self.avatar.path)
-        if (avatar.width, avatar.height) > settings.USER_AVATAR_SIZE:
-            avatar.thumbnail(settings.USER_AVATAR_SIZE)
-            avatar.save(self.avatar.path)  # saving avatar at the same path
+        # resize the new avatar out of the request
+        if avatar_changed:
+            run_in_background(resize_image, self.avatar.path, settings.USER_AVATAR_SIZE)
+        self.update_saved_file_names()
+        # invalidated after the commit, so a concurrent request doesn't cache the user before it's changed
+        transaction.on_commit(partial(user_cache.invalidate, self.pk))
+
+        author_changed = update_fields is None or set(self.author_fields) & set(update_fields)
+        if not creating and author_changed:
+            self._invalidate_posts_cache()
+
+    def _invalidate_posts_cache(self):
+        """ Invalidate the cached posts which show the user as their author. """
+        post_hashes = list(self.posts.filter(is_draft=False).values_list('hash', flat=True))
+        if not post_hashes:
+            return
+
+        transaction.on_commit(partial(post_detail_cache.invalidate, *post_hashes))
+        if self.posts.latest().exists():
+            transaction.on_commit(latest_feed_cache.invalidate)
+
+    def delete(self, *args, **kwargs):
+        transaction.on_commit(partial(user_cache.invalidate, self.pk))
+        return super().delete(*args, **kwargs)
+
+    def hide(self):
+        """
+        Hide the user and their posts. They're deleted with all of the user comments and likes
+        by the `delete_hidden_objects` worker.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            self.deleted_at = now
+            self.save(update_fields=['deleted_at'])
+            self._invalidate_posts_cache()
+            self.posts.update(deleted_at=now)
 
     def like(self, post):
-        """ Add user to given post likes. """
-        post.likes.add(self)
+        """ Add user to given post likes. Return False if the post was already liked. """
+        return type(post).objects.add_like(post, self)
 
     def unlike(self, post):
-        """ Remove user like from post likes. """
-        post.likes.remove(self)
+        """ Remove user like from post likes. Return False if the post wasn't liked. """
+        return type(post).objects.remove_like(post, self)
 
     def is_liked(self, post):
         """ Return a bool that shows the user liked the post or not. """
         return post.likes.filter(id=self.id).exists()
+
+    def get_liked_post_ids(self, post_ids):
+        """ Return a set of the given post ids which are liked by the user. """
+        return set(
+            self.liked_posts.through.objects
+            .filter(user_id=self.id, post_id__in=post_ids)
+            .values_list('post_id', flat=True)
+        )
+
+
+class OTPCode(models.Model):
+    """
+    The otp code of a user (stored as its hash) and its verify attempts, which are shared by all processes.
+    The user may not be created yet, e.g. the signup code.
+    """
+    user_id = models.BigIntegerField(_('user id'), primary_key=True)
+    code_hash = models.CharField(_('code hash'), max_length=64)
+    attempts = models.PositiveSmallIntegerField(_('attempts'), default=0)
+    expires_at = models.DateTimeField(_('expires at'), db_index=True)
+
+    objects = OTPCodeManager()
+
+    def __str__(self):
+        return f'otp code of {self.user_id}'
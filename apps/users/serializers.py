@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.validators import RegexValidator
 from django.db.models import Q
@@ -5,6 +6,7 @@ from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from apps.emails.models import OutboxEmail
 from apps.utils import otp
 
 UserModel = get_user_model()
@@ -48,7 +50,10 @@ class LoginSerializer(serializers.Serializer):
         code = otp.create_new_otp(user.id)
 
         # todo: real template message
-        user.email_user('Email-address verification', f'Your login verification code is {code}')
+        OutboxEmail.objects.enqueue(
+            user.email, 'Email-address verification', f'Your login verification code is {code}',
+            expires_in=settings.OTP_CODE_TTL,
+        )
 
     def validate(self, attrs):
         username = attrs.get('username')
@@ -77,15 +82,16 @@ class SignupSerializer(serializers.Serializer):
     def get_or_create_user(email):
         """
         Get or create user by given email.
-        Raise validation error if any active user have this email.
+        Raise validation error if any active or hidden user have this email.
         """
-        user, created = UserModel.objects.get_or_create(
+        # the default manager excludes the hidden users, whose emails are taken until they are deleted
+        user, created = UserModel._base_manager.get_or_create(
             email=email,
             defaults={
                 'is_active': False,
             },
         )
-        if user.is_active:
+        if user.is_active or user.deleted_at is not None:
             raise ValidationError({'email': _('A user with that email address already exists.')})
         return user
 
@@ -94,7 +100,10 @@ class SignupSerializer(serializers.Serializer):
 
         code = otp.create_new_otp(user.id)
         # todo: real template message
-        user.email_user('Email-address verification', f'Your login verification code is {code}')
+        OutboxEmail.objects.enqueue(
+            user.email, 'Email-address verification', f'Your login verification code is {code}',
+            expires_in=settings.OTP_CODE_TTL,
+        )
         return user
 
     def validate(self, attrs):
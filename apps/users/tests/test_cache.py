@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.users.backends import OTPModelBackend
+from apps.users.cache import user_cache
+
+UserModel = get_user_model()
+
+
+class UserCacheTest(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = UserModel.objects.create_user(email='sample@sample.sample')
+        self.backend = OTPModelBackend()
+
+    def tearDown(self):
+        user_cache.clear()
+
+    def test_get_user_is_cached(self):
+        self.backend.get_user(self.user.id)
+
+        with self.assertNumQueries(0):
+            user = self.backend.get_user(self.user.id)
+        self.assertEqual(user, self.user)
+
+    def test_cached_user_is_copied(self):
+        user = self.backend.get_user(self.user.id)
+        user.full_name = 'changed'
+
+        self.assertNotEqual(self.backend.get_user(self.user.id).full_name, 'changed')
+
+    def test_missing_user_is_not_cached(self):
+        self.assertIsNone(self.backend.get_user(0))
+        with self.assertNumQueries(1):
+            self.backend.get_user(0)
+
+    def test_save_invalidates_user(self):
+        self.backend.get_user(self.user.id)
+
+        self.user.full_name = 'new name'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=['full_name'])
+
+        with self.assertNumQueries(1):
+            user = self.backend.get_user(self.user.id)
+        self.assertEqual(user.full_name, 'new name')
+
+    def test_user_is_invalidated_after_commit(self):
+        self.backend.get_user(self.user.id)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.full_name = 'new name'
+            self.user.save(update_fields=['full_name'])
+            # a request before the commit still gets the cached user
+            with self.assertNumQueries(0):
+                self.backend.get_user(self.user.id)
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(self.backend.get_user(self.user.id).full_name, 'new name')
+
+    def test_hidden_user_is_not_returned(self):
+        # the cached copies of the user, which aren't invalidated yet
+        user = self.backend.get_user(self.user.id)
+        user.is_active = False
+        user_cache.set(self.user.id, user)
+        self.assertIsNone(self.backend.get_user(self.user.id))
+
+        user.is_active = True
+        user.deleted_at = timezone.now()
+        user_cache.set(self.user.id, user)
+        self.assertIsNone(self.backend.get_user(self.user.id))
+
+    @override_settings(USER_CACHE_SIZE=1)
+    def test_least_recently_used_user_is_evicted(self):
+        another_user = UserModel.objects.create_user(email='another@sample.sample')
+        self.backend.get_user(self.user.id)
+        self.backend.get_user(another_user.id)
+
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.user.id)
+
+    @override_settings(USER_CACHE_TTL=0)
+    def test_expired_user(self):
+        self.backend.get_user(self.user.id)
+
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.user.id)
+
+    @override_settings(USER_CACHE_ALIAS='default')
+    def test_shared_cache(self):
+        cache.clear()
+        self.backend.get_user(self.user.id)
+        # simulate another process which has not cached the user
+        user_cache.clear()
+
+        with self.assertNumQueries(0):
+            user = self.backend.get_user(self.user.id)
+        self.assertEqual(user, self.user)
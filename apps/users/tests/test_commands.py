@@ -0,0 +1,24 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+UserModel = get_user_model()
+
+
+class BenchmarkSessionsCommandTest(TestCase):
+    def test_benchmark_sessions(self):
+        out = StringIO()
+        call_command('benchmark_sessions', requests=2, warmup=1, stdout=out)
+
+        output = out.getvalue()
+        for mode in ('db', 'cached_db', 'signed_cookies'):
+            self.assertIn(mode, output)
+        self.assertIn('queries/request', output)
+        # the benchmark data is rolled back
+        self.assertFalse(UserModel.objects.exists())
+
+    def test_unknown_mode(self):
+        with self.assertRaises(CommandError):
+            call_command('benchmark_sessions', modes=['redis'], stdout=StringIO())
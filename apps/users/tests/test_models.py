@@ -1,8 +1,15 @@
+import shutil
+import tempfile
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from PIL import Image
 
+from apps.core.testing import create_image_file
 from apps.posts.models import Post
 from apps.users.models import User, get_email_username
+from apps.utils.tasks import run_in_background
 
 UserModel = get_user_model()
 
@@ -47,9 +54,57 @@ class UserModelTest(TestCase):
         self.assertEqual(admin.avatar, 'default-avatar.jpg')
 
     def test_user_like(self):
-        self.author.like(self.post)
+        self.assertTrue(self.author.like(self.post))
         self.assertTrue(self.author.is_liked(self.post))
+        self.assertEqual(self.post.likes_count, 1)
+
+        # liking again doesn't change anything
+        self.assertFalse(self.author.like(self.post))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
 
     def test_user_unlike(self):
         self.author.unlike(self.post)
         self.assertFalse(self.author.is_liked(self.post))
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True, USER_AVATAR_SIZE=(200, 200))
+class UserAvatarTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = UserModel.objects.create_user(email='sample@sample.sample')
+
+    def test_avatar_resized_after_upload(self):
+        self.user.avatar = create_image_file('avatar.jpg')
+        with mock.patch('apps.users.models.run_in_background', wraps=run_in_background) as run, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        run.assert_called_once()
+
+        with Image.open(self.user.avatar.path) as avatar:
+            self.assertEqual(avatar.size, (200, 150))
+
+    def test_avatar_not_processed_without_change(self):
+        self.user.avatar = create_image_file('avatar.jpg')
+        self.user.save()
+
+        user = UserModel.objects.get(pk=self.user.pk)
+        with mock.patch('apps.users.models.run_in_background') as run:
+            user.save(update_fields=['is_active'])
+            user.full_name = 'new name'
+            user.save()
+        run.assert_not_called()
+
+    def test_small_avatar_is_not_changed(self):
+        self.user.avatar = create_image_file('avatar.jpg', size=(100, 50))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+        with Image.open(self.user.avatar.path) as avatar:
+            self.assertEqual(avatar.size, (100, 50))
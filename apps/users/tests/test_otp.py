@@ -0,0 +1,104 @@
+import threading
+from unittest import mock
+
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from apps.users.models import OTPCode
+from apps.utils import otp
+
+
+class OTPStoreTest(TestCase):
+    user_id = 1
+
+    def test_verify_otp(self):
+        code = otp.create_new_otp(self.user_id)
+
+        self.assertTrue(otp.verify_otp(self.user_id, code))
+        # the code can be used only once
+        self.assertFalse(otp.verify_otp(self.user_id, code))
+
+    def test_stored_code(self):
+        code = otp.create_new_otp(self.user_id)
+
+        stored = OTPCode.objects.get(user_id=self.user_id)
+        self.assertEqual(stored.attempts, 0)
+        # the plain code is not stored
+        self.assertEqual(stored.code_hash, otp.hash_code(code))
+
+    def test_expired_code(self):
+        with override_settings(OTP_CODE_TTL=-1):
+            code = otp.create_new_otp(self.user_id)
+        self.assertFalse(otp.verify_otp(self.user_id, code))
+
+        # the expired codes are deleted when a new code is stored
+        otp.create_new_otp(self.user_id + 1)
+        self.assertFalse(OTPCode.objects.filter(user_id=self.user_id).exists())
+
+    def test_new_code_replaces_old_code(self):
+        # the generated codes are distinct, so the old code is always checked
+        with mock.patch('pyotp.HOTP.at', side_effect=['111111', '222222']):
+            old_code = otp.create_new_otp(self.user_id)
+            code = otp.create_new_otp(self.user_id)
+
+        self.assertFalse(otp.verify_otp(self.user_id, old_code))
+        self.assertTrue(otp.verify_otp(self.user_id, code))
+
+    @override_settings(OTP_MAX_ATTEMPTS=3)
+    def test_attempts_limit(self):
+        code = otp.create_new_otp(self.user_id)
+        for _ in range(3):
+            self.assertFalse(otp.verify_otp(self.user_id, 'invalid'))
+
+        # the code is deleted after all of the attempts were used
+        self.assertFalse(otp.verify_otp(self.user_id, code))
+        self.assertFalse(OTPCode.objects.filter(user_id=self.user_id).exists())
+
+    @override_settings(OTP_MAX_ATTEMPTS=3)
+    def test_new_code_resets_attempts(self):
+        otp.create_new_otp(self.user_id)
+        for _ in range(2):
+            otp.verify_otp(self.user_id, 'invalid')
+
+        code = otp.create_new_otp(self.user_id)
+        for _ in range(2):
+            otp.verify_otp(self.user_id, 'invalid')
+        self.assertTrue(otp.verify_otp(self.user_id, code))
+
+
+class OTPStoreConcurrencyTest(TransactionTestCase):
+    user_id = 1
+
+    def run_concurrently(self, func, count=10):
+        results = []
+        barrier = threading.Barrier(count)
+
+        def run():
+            try:
+                barrier.wait()
+                results.append(func())
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=run) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_attempts(self):
+        otp.create_new_otp(self.user_id)
+
+        results = self.run_concurrently(lambda: OTPCode.objects.add_attempt(self.user_id)[1])
+        # each attempt is counted once
+        self.assertEqual(sorted(results), list(range(1, 11)))
+
+    # the attempts over the limit would delete the code before the correct one is checked
+    @override_settings(OTP_MAX_ATTEMPTS=10)
+    def test_concurrent_verifications(self):
+        code = otp.create_new_otp(self.user_id)
+
+        results = self.run_concurrently(lambda: otp.verify_otp(self.user_id, code))
+        # the code is used only once
+        self.assertEqual(results.count(True), 1)
@@ -4,6 +4,7 @@ from django.test import TestCase
 from rest_framework import status
 from rest_framework.test import force_authenticate, APIRequestFactory
 
+from apps.emails.models import OutboxEmail
 from apps.users import views
 from apps.utils import otp
 
@@ -35,6 +36,8 @@ class UserLoginTest(TestCase):
 
         response = view(request)
         self.assertContains(response, 'Verification code for email sample@sample.sample submitted.')
+        # the verification code is sent by the email worker
+        self.assertTrue(OutboxEmail.objects.filter(to=self.user.email).exists())
 
     def test_login_with_email(self):
         view = views.LoginAPIView.as_view()
@@ -44,6 +47,16 @@ class UserLoginTest(TestCase):
         response = view(request)
         self.assertContains(response, 'Verification code for email sample@sample.sample submitted.')
 
+    def test_login_again_does_not_modify_session(self):
+        view = views.LoginAPIView.as_view()
+        request = factory.post('/users/login/', data={'email': self.user.email})
+        add_session(request)
+        request.session['user_email'] = self.user.email
+        request.session.modified = False
+
+        view(request)
+        self.assertFalse(request.session.modified)
+
     def test_login_verification(self):
         verification_code = otp.create_new_otp(self.user.id)
         view = views.LoginVerificationAPIView.as_view()
@@ -69,6 +82,19 @@ class UserSignupTest(TestCase):
 
         response = view(request)
         self.assertContains(response, 'Verification code for email sample@sample.sample submitted.')
+        # the email isn't sent after the code expires
+        self.assertIsNotNone(OutboxEmail.objects.get(to=self.user.email).expires_at)
+
+    def test_signup_hidden_user_email(self):
+        self.user.hide()
+        view = views.SignupAPIView.as_view()
+        request = factory.post('/users/signup/', data={'email': self.user.email})
+        add_session(request)
+
+        response = view(request)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('email', response.data)
+        self.assertFalse(OutboxEmail.objects.filter(to=self.user.email).exists())
 
     def test_signup_verification(self):
         verification_code = otp.create_new_otp(self.user.id)
@@ -105,6 +131,32 @@ class UserViewsTestCase(TestCase):
         response = view(request, username=self.user.username)
         self.assertContains(response, self.user.email)
 
+    def test_user_profile_not_modified(self):
+        view = views.ProfileAPIView.as_view()
+        etag = view(factory.get('/users/'), username=self.user.username)['ETag']
+
+        request = factory.get('/users/', HTTP_IF_NONE_MATCH=etag)
+        response = view(request, username=self.user.username)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.user.biography = 'new biography'
+        self.user.save()
+        request = factory.get('/users/', HTTP_IF_NONE_MATCH=etag)
+        response = view(request, username=self.user.username)
+        self.assertContains(response, 'new biography')
+
+    def test_own_profile_not_modified(self):
+        view = views.ProfileAPIView.as_view()
+        request = factory.get('/users/')
+        force_authenticate(request, user=self.user)
+        etag = view(request, username=self.user.username)['ETag']
+
+        request = factory.get('/users/', HTTP_IF_NONE_MATCH=etag)
+        force_authenticate(request, user=self.user)
+        with self.assertNumQueries(0):
+            response = view(request, username=self.user.username)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
     def test_update_profile(self):
         view = views.ProfileAPIView.as_view()
         request = factory.patch('/users/', data={'username': 'sample_username'})
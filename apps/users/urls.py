@@ -1,5 +1,6 @@
 from django.urls import path
 
+from apps.core.async_views import async_read_view
 from apps.users import views
 
 app_name = 'users'
@@ -10,7 +11,7 @@ urlpatterns = [
     path('signup-verification/', views.SignupVerificationAPIView.as_view(), name='signup_verification'),
     path('logout/', views.LogoutAPIView.as_view(), name='logout'),
 
-    path('search/', views.UserSearchListAPIView.as_view(), name='search'),
+    path('search/', async_read_view(views.UserSearchListAPIView.as_view()), name='search'),
 
     path('<str:username>/', views.ProfileAPIView.as_view(), name='profile'),
 ]
@@ -8,22 +8,33 @@ from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from apps.core.paginators import BaseResultsPagination
+from apps.core.conditional import ConditionalRetrieveMixin
+from apps.core.paginators import CursorOrPagePagination
+from apps.core.projections import SerializerProjectionMixin
 from apps.users import serializers
 
 UserModel = get_user_model()
 
 
-class LoginAPIView(GenericAPIView):
+class UserEmailSessionMixin:
+    def set_session_user_email(self, user_email):
+        """
+        Store the user email in the session, we need to access it in verification step.
+        The session is not saved again if it already has the same email.
+        """
+        session = self.request.session
+        if session.get('user_email') != user_email:
+            session['user_email'] = user_email
+
+
+class LoginAPIView(UserEmailSessionMixin, GenericAPIView):
     serializer_class = serializers.LoginSerializer
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user_email = serializer.validated_data['user'].email
-
-        # we need to access the user email in verification step
-        request.session['user_email'] = user_email
+        self.set_session_user_email(user_email)
 
         msg = _(
             f'Verification code for email {user_email} submitted.'
@@ -43,7 +54,7 @@ class LoginVerificationAPIView(GenericAPIView):
         return Response({'success': True})
 
 
-class SignupAPIView(GenericAPIView):
+class SignupAPIView(UserEmailSessionMixin, GenericAPIView):
     serializer_class = serializers.SignupSerializer
 
     def post(self, request, *args, **kwargs):
@@ -51,9 +62,8 @@ class SignupAPIView(GenericAPIView):
         serializer.is_valid(raise_exception=True)
         serializer.save()
         user_email = serializer.validated_data['email']
+        self.set_session_user_email(user_email)
 
-        # we need to access the user email in verification step
-        request.session['user_email'] = user_email
         msg = _(
             f'Verification code for email {user_email} submitted.'
         )
@@ -85,7 +95,7 @@ class LogoutAPIView(APIView):
         return Response({'detail': _('Successfully logged out.')})
 
 
-class ProfileAPIView(RetrieveUpdateAPIView):
+class ProfileAPIView(ConditionalRetrieveMixin, RetrieveUpdateAPIView):
     """
     Return user details.
 
@@ -95,6 +105,7 @@ class ProfileAPIView(RetrieveUpdateAPIView):
     serializer_class = serializers.UserDetailsSerializer
     lookup_field = 'username'
     queryset = UserModel.objects.all()
+    version_fields = ('updated_at',)
 
     def initial(self, request, *args, **kwargs):
         # for unsafe methods, user must be authenticated
@@ -114,18 +125,24 @@ class ProfileAPIView(RetrieveUpdateAPIView):
         self.get_object = lambda: self.request.user
         return super().update(request, *args, **kwargs)
 
+    def get_version(self):
+        if self.kwargs.get(self.lookup_field) == self.request.user.username:
+            return self.get_instance_version(self.request.user)
+        return super().get_version()
+
     def retrieve(self, request, *args, **kwargs):
         if kwargs.get(self.lookup_field) == request.user.username:
             self.get_object = lambda: self.request.user
         return super().retrieve(request, *args, **kwargs)
 
 
-class UserSearchListAPIView(ListAPIView):
+class UserSearchListAPIView(SerializerProjectionMixin, ListAPIView):
     """
     Search in users and return result list.
     """
     serializer_class = serializers.UserSearchListSerializer
-    pagination_class = BaseResultsPagination
+    pagination_class = CursorOrPagePagination
+    ordering = ('id',)
 
     def get_queryset(self):
         query = self.request.query_params.get('q', '')
@@ -0,0 +1,69 @@
+import os
+
+from PIL import Image
+
+
+def fits_in(image, size):
+    """ Return True if the image is not larger than given size (width, height). """
+    return image.width <= size[0] and image.height <= size[1]
+
+
+def resize_image(path, size):
+    """
+    Resize the image at the given path to fit in the given size and save it at the same path.
+    Return True if the image was resized.
+    """
+    with Image.open(path) as image:
+        # reading the size doesn't decode the image
+        if fits_in(image, size):
+            return False
+
+        image_format = image.format
+        # thumbnail configures the JPEG decoder (draft mode) to decode the
+        # image at a reduced scale, instead of decoding all of its pixels
+        image.thumbnail(size)
+        image.save(path, format=image_format)
+    return True
+
+
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+
+
+def to_rgb(image):
+    """ Convert the image to RGB, transparent images are flattened on a white background. """
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def create_image_variants(path, sizes, suffix=''):
+    """
+    Create resized variants of the image at the given path, next to the image.
+    `sizes` is a dict of variant names and their (width, height).
+
+    Each variant is saved as JPEG, and also as WebP if it's smaller than the JPEG one.
+    Return a dict of variant names and their {format: path}.
+    """
+    root = path.rsplit('.', 1)[0]
+    variants = {}
+    for name, size in sizes.items():
+        # the image is opened for each variant, so it's decoded at the variant scale
+        with Image.open(path) as image:
+            image.thumbnail(size)
+            image = to_rgb(image)
+
+        jpeg_path = f'{root}-{name}{suffix}.jpg'
+        image.save(jpeg_path, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+        variants[name] = {'jpeg': jpeg_path}
+
+        webp_path = f'{root}-{name}{suffix}.webp'
+        image.save(webp_path, format='WEBP', quality=WEBP_QUALITY)
+        if os.path.getsize(webp_path) < os.path.getsize(jpeg_path):
+            variants[name]['webp'] = webp_path
+        else:
+            os.remove(webp_path)
+    return variants
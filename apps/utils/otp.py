@@ -1,14 +1,54 @@
 import base64
 import hashlib
+import hmac
 
 import pyotp
 from django.conf import settings
-from django.core.cache import cache
 from django.utils import timezone
 
+from apps.users.models import OTPCode
+
 
 def hash_code(code):
-    return hashlib.sha256(code.encode()).hexdigest()
+    # keyed by the secret key, so the stored hashes of the short codes can't be brute-forced
+    return hmac.new(settings.SECRET_KEY.encode(), code.encode(), hashlib.sha256).hexdigest()
+
+
+class OTPStore:
+    """
+    Store of the users otp codes and their verification attempts.
+    The codes are kept in the `OTPCode` table which is shared by all processes, and the attempts
+    are counted by atomic updates, so the concurrent verifications can't exceed `OTP_MAX_ATTEMPTS`.
+    """
+
+    def set(self, user_id, code):
+        """ Store the code of the user, replacing the previous one and its attempts. """
+        OTPCode.objects.set_code(user_id, hash_code(code), settings.OTP_CODE_TTL)
+
+    def verify(self, user_id, code):
+        """
+        Return True if the given code match by stored code of the user.
+        The code is deleted after it is verified or the user used all of the verify attempts.
+        """
+        result = OTPCode.objects.add_attempt(user_id)
+        if result is None:
+            return False
+
+        stored, attempts = result
+        if attempts > settings.OTP_MAX_ATTEMPTS:
+            self.delete(user_id)
+            return False
+
+        if hmac.compare_digest(hash_code(code), stored):
+            # only one of the concurrent verifications deletes the code
+            return OTPCode.objects.delete_code(user_id, stored)
+        return False
+
+    def delete(self, user_id):
+        OTPCode.objects.delete_code(user_id)
+
+
+otp_store = OTPStore()
 
 
 def create_new_otp(user_id):
@@ -21,22 +61,14 @@ def create_new_otp(user_id):
 
     otp = pyotp.HOTP(gen_secret())
     code = otp.at(user_id)
-    hashed_code = hash_code(code)
 
-    cache.set(user_id, {'code': hashed_code}, settings.OTP_CODE_TTL)
+    otp_store.set(user_id, code)
     return code
 
 
 def verify_otp(user_id, code):
     """
     Return True if the given code match by stored code for the given user_id.
-    If the code is valid, it will be deleted from the cache.
+    If the code is valid, it will be deleted from the store.
     """
-    hashed_code = hash_code(code)
-
-    otp = cache.get(user_id)
-    if otp:
-        if hashed_code == otp['code']:
-            cache.delete(user_id)
-            return True
-    return False
+    return otp_store.verify(user_id, code)
@@ -0,0 +1,93 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_process_executor = None
+
+
+def get_executor():
+    """
+    Return the background worker pool of the process.
+    It's created lazily, so each forked server worker gets its own pool.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BACKGROUND_WORKERS,
+            thread_name_prefix='background',
+        )
+    return _executor
+
+
+def get_process_executor():
+    """
+    Return the process pool of the process for CPU-bound tasks, e.g. image processing.
+    The pool processes are spawned, so they don't inherit the server threads and connections.
+    """
+    global _process_executor
+    if _process_executor is None:
+        _process_executor = ProcessPoolExecutor(
+            max_workers=settings.PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _process_executor
+
+
+def _run_task(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed.', func.__name__)
+    finally:
+        # the worker threads have their own database connections
+        close_old_connections()
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    Run the function in the background worker pool, after the current transaction is committed.
+    If `BACKGROUND_TASKS_EAGER` is True, the function runs in the current thread.
+    """
+
+    def submit():
+        if settings.BACKGROUND_TASKS_EAGER:
+            func(*args, **kwargs)
+        else:
+            get_executor().submit(_run_task, func, args, kwargs)
+
+    transaction.on_commit(submit)
+
+
+def run_in_process_pool(func, *args, callback=None):
+    """
+    Run the function in the process pool, after the current transaction is committed.
+    The function must be picklable and must not use the database.
+
+    The `callback` is called by the function result in the background worker pool.
+    If `BACKGROUND_TASKS_EAGER` is True, both run in the current thread.
+    """
+
+    def done(future):
+        try:
+            result = future.result()
+        except Exception:
+            logger.exception('Process pool task %s failed.', func.__name__)
+            return
+        if callback is not None:
+            get_executor().submit(_run_task, callback, (result,), {})
+
+    def submit():
+        if settings.BACKGROUND_TASKS_EAGER:
+            result = func(*args)
+            if callback is not None:
+                callback(result)
+        else:
+            get_process_executor().submit(func, *args).add_done_callback(done)
+
+    transaction.on_commit(submit)
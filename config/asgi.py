@@ -0,0 +1,18 @@
+"""
+ASGI config for config project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# the read views are async when the project is served by an ASGI server
+os.environ.setdefault('DJANGO_ASYNC_READ_VIEWS', 'True')
+
+application = get_asgi_application()
@@ -0,0 +1,70 @@
+"""
+Gunicorn config for the production server.
+
+    gunicorn -c config/gunicorn.py config.wsgi
+    SERVER_INTERFACE=asgi gunicorn -c config/gunicorn.py config.asgi
+
+The application is loaded and warmed up (see `apps.core.warmup`) in the master process before
+the workers are forked, so the workers share it and each worker only opens its database connections.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import wait
+
+server_interface = os.environ.get('SERVER_INTERFACE', 'wsgi')
+cpu_count = multiprocessing.cpu_count()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+chdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if server_interface == 'asgi':
+    # the async workers serve the concurrent requests in one process
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    workers = int(os.environ.get('GUNICORN_WORKERS', cpu_count + 1))
+    threads = 1
+else:
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+    worker_class = 'gthread' if threads > 1 else 'sync'
+    workers = int(os.environ.get('GUNICORN_WORKERS', cpu_count * 2 + 1))
+
+preload_app = True
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# restart the workers after a number of requests to release their leaked memory
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+# an empty value disables the access log
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+
+
+def when_ready(server):
+    """ Warm up the preloaded application before forking the workers, the forked workers share it. """
+    from django.db import connections
+
+    from apps.core.warmup import warm_up
+
+    # the connections must not be shared by the workers, so they are opened by each worker
+    timings = warm_up(connect=False)
+    connections.close_all()
+    server.log.info('Warmed up in %s', ', '.join(f'{step} {duration:.1f}ms' for step, duration in timings.items()))
+
+
+def post_worker_init(worker):
+    """ Open the database connections of the worker threads before the worker accepts the requests. """
+    from apps.core.warmup import connect_databases
+
+    # the requests of the threaded worker are served by its thread pool, and each thread has its own connections
+    thread_pool = getattr(worker, 'tpool', None)
+    if thread_pool is None:
+        connect_databases()
+        return
+
+    # wait for all of the threads, so each thread runs one of the calls
+    barrier = threading.Barrier(worker.cfg.threads)
+
+    def connect():
+        barrier.wait(timeout)
+        connect_databases()
+
+    wait([thread_pool.submit(connect) for _ in range(worker.cfg.threads)])
@@ -60,11 +60,13 @@ LOCAL_APPS = [
     'apps.posts',
     'apps.comments',
     'apps.tags',
+    'apps.emails',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'apps.core.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
@@ -113,6 +115,29 @@ else:
         }
     }
 
+# seconds to keep the database connections open, 0 closes them at the end of each request
+DATABASES['default']['CONN_MAX_AGE'] = env.int('DJANGO_CONN_MAX_AGE', default=0)
+
+# take the connections from a bounded pool of each process, the closed connections are returned to the pool
+if env.bool('DJANGO_DATABASE_POOL', default=False):
+    DATABASES['default']['ENGINE'] = 'apps.core.db.backends.postgresql_pool'
+    DATABASES['default']['POOL'] = {
+        'MAX_SIZE': env.int('DJANGO_DATABASE_POOL_SIZE', default=10),
+        # seconds to wait for a free connection when the pool is full
+        'TIMEOUT': env.float('DJANGO_DATABASE_POOL_TIMEOUT', default=30),
+        # seconds after which the idle connections are closed
+        'MAX_IDLE': env.float('DJANGO_DATABASE_POOL_MAX_IDLE', default=300),
+        'MAX_LIFETIME': env.float('DJANGO_DATABASE_POOL_MAX_LIFETIME', default=3600),
+        # the idle connections are checked when they are taken if they weren't used for these seconds
+        'HEALTH_CHECK_INTERVAL': env.float('DJANGO_DATABASE_POOL_HEALTH_CHECK_INTERVAL', default=0),
+    }
+
+# Caches
+# https://docs.djangoproject.com/en/4.0/ref/settings/#caches
+CACHES = {
+    'default': env.cache('DJANGO_CACHE_URL', default='locmemcache://'),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -131,6 +156,21 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Sessions
+# https://docs.djangoproject.com/en/4.0/topics/http/sessions/#configuring-the-session-engine
+SESSION_ENGINES = {
+    # a session table query on each request
+    'db': 'django.contrib.sessions.backends.db',
+    # the sessions are read from the cache and written to both of cache and database.
+    # the default cache must be shared by all processes (DJANGO_CACHE_URL), otherwise logout isn't seen by other processes
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    # the session data is signed (not encrypted) and stored in the cookie, so there is no session query.
+    # note that logout can't revoke the copied cookies of a session.
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_MODE = env.str('DJANGO_SESSION_MODE', default='db')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_MODE]
+
 # Authentication backends
 # https://docs.djangoproject.com/en/4.0/topics/auth/customizing/#authentication-backends
 
@@ -139,8 +179,46 @@ AUTHENTICATION_BACKENDS = [
 ]
 
 AUTH_USER_MODEL = 'users.User'
+# The authenticated users are cached in each process, optionally backed by a shared cache alias
+USER_CACHE_SIZE = env.int('DJANGO_USER_CACHE_SIZE', default=1024)
+USER_CACHE_TTL = env.int('DJANGO_USER_CACHE_TTL', default=30)
+USER_CACHE_ALIAS = env.str('DJANGO_USER_CACHE_ALIAS', default=None)
 USER_AVATAR_SIZE = (200, 200)  # width and height
 OTP_CODE_TTL = 60 * 5
+# Number of times a user can try to verify an otp code
+OTP_MAX_ATTEMPTS = env.int('DJANGO_OTP_MAX_ATTEMPTS', default=5)
+
+# Text search configuration used for the posts search document.
+# After changing it, run `python manage.py update_post_search_vectors`.
+POST_SEARCH_CONFIG = env.str('DJANGO_POST_SEARCH_CONFIG', default='simple')
+# Resized variants of the posts primary image, name: (width, height)
+POST_IMAGE_VARIANTS = {
+    'thumbnail': (320, 320),
+    'medium': (960, 960),
+}
+# Render the posts lists from `.values()` rows instead of the model serializer
+POST_LIST_VALUES_RENDERING = env.bool('DJANGO_POST_LIST_VALUES_RENDERING', default=True)
+# Seconds which the latest posts feed pages are cached for
+LATEST_FEED_CACHE_TTL = 60 * 5
+# Seconds which the rendered post details are cached for
+POST_DETAIL_CACHE_TTL = 60 * 5
+# Seconds after which the lock of the request which renders a missing post details expires
+POST_DETAIL_CACHE_LOCK_TIMEOUT = 5
+# Seconds which the other requests wait for that request before they render the post details themselves
+POST_DETAIL_CACHE_LOCK_WAIT = 0.2
+
+# Background tasks
+# Number of threads which run the background tasks (e.g. image processing) in each process
+BACKGROUND_WORKERS = env.int('DJANGO_BACKGROUND_WORKERS', default=2)
+# Number of processes which run the CPU-bound background tasks, defaults to the number of CPUs
+PROCESS_WORKERS = env.int('DJANGO_PROCESS_WORKERS', default=None)
+# Run the background tasks in the current thread, useful for tests
+BACKGROUND_TASKS_EAGER = env.bool('DJANGO_BACKGROUND_TASKS_EAGER', default=False)
+
+# Serve the read views (e.g. the latest posts and the searches) by async views, which run the sync
+# view in a separate thread, so the concurrent requests of an ASGI server don't wait for each other.
+# It's True by default when the project is served by `config.asgi`
+ASYNC_READ_VIEWS = env.bool('DJANGO_ASYNC_READ_VIEWS', default=False)
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.0/topics/i18n/
@@ -171,9 +249,26 @@ MEDIA_ROOT = APPS_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# The hidden (deleted) posts and users are deleted by the `delete_hidden_objects` command
+# Number of rows deleted in each transaction
+DELETION_BATCH_SIZE = env.int('DJANGO_DELETION_BATCH_SIZE', default=1000)
+# Seconds which the worker waits before checking the hidden objects again
+DELETION_POLL_INTERVAL = env.float('DJANGO_DELETION_POLL_INTERVAL', default=5)
+
 # Email configs
 # https://docs.djangoproject.com/en/4.0/ref/settings/#email-backend
 EMAIL_BACKEND = env.str('DJANGO_EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+# Emails are queued in the outbox and sent by the `send_queued_emails` command
+# Number of emails sent in each batch
+EMAIL_OUTBOX_BATCH_SIZE = env.int('DJANGO_EMAIL_OUTBOX_BATCH_SIZE', default=50)
+# Number of times sending an email is tried before giving up
+EMAIL_OUTBOX_MAX_ATTEMPTS = env.int('DJANGO_EMAIL_OUTBOX_MAX_ATTEMPTS', default=5)
+# Seconds to wait before the first retry of a failed email, doubled on each retry
+EMAIL_OUTBOX_RETRY_DELAY = env.int('DJANGO_EMAIL_OUTBOX_RETRY_DELAY', default=30)
+# Seconds for which the emails claimed by a worker aren't sent by the other workers
+EMAIL_OUTBOX_LEASE = env.int('DJANGO_EMAIL_OUTBOX_LEASE', default=60)
+# Seconds which the worker waits before checking the empty outbox again
+EMAIL_OUTBOX_POLL_INTERVAL = env.float('DJANGO_EMAIL_OUTBOX_POLL_INTERVAL', default=1)
 
 # Django rest framework configs
 REST_FRAMEWORK = {
@@ -200,9 +295,13 @@ LOGGING = {
         },
     },
     'loggers': {
-        'django.db.backends': {
-            'level': 'DEBUG',
+        'apps.core.middleware': {
+            'level': env.str('DJANGO_QUERY_LOG_LEVEL', default='WARNING'),
             'handlers': ['console'],
         },
     },
 }
+
+# Record the database queries count, time and duplicate queries of each request,
+# they're added to the response headers in the debug mode
+QUERY_INSTRUMENTATION = env.bool('DJANGO_QUERY_INSTRUMENTATION', default=DEBUG)